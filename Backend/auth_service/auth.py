@@ -102,15 +102,10 @@ def check_permission(user: User, function_code: str, action: str, db: Session) -
     """Verifica se o usuário tem permissão para executar uma ação"""
     from models import Permission, Function
     
-    # Buscar a função pelo código
-    function = db.query(Function).filter(Function.code == function_code).first()
-    if not function:
-        return False
-    
-    # Verificar se o grupo do usuário tem permissão
-    permission = db.query(Permission).filter(
+    # Uma única consulta: permissão do grupo para a função com este código
+    permission = db.query(Permission.id).join(Function, Permission.function_id == Function.id).filter(
+        Function.code == function_code,
         Permission.group_id == user.group_id,
-        Permission.function_id == function.id,
         Permission.action == action
     ).first()
     
@@ -0,0 +1,112 @@
+"""
+Contadores do dashboard mantidos em memória
+
+Em vez de vários COUNT(*) a cada abertura do painel, cada contador é
+contado uma vez no banco e depois ajustado pelas próprias rotas de escrita
+(counters.add(...) logo após o commit). A leitura (snapshot) sai da
+memória, todos os contadores de uma vez.
+
+A deriva é corrigida por reconciliação: passado COUNTERS_RECONCILE_SECONDS
+desde a última contagem, a próxima leitura reconta tudo no banco. Isso
+cobre escritas feitas por outros workers, fora da API ou concorrentes a
+uma reconciliação (que podem ser contadas duas vezes ou nenhuma até a
+próxima).
+
+Contadores que mudam sozinhos com o tempo (visitantes do dia, avisos que
+expiram) informam até quando o valor vale; vencido o prazo, só aquele
+contador é recontado.
+
+Os contadores são separados por escopo: o shard, no Operations Service,
+cujas tabelas não têm condominium_id (os números somam todos os
+condomínios do shard), e um escopo único no Auth Service.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+
+
+class Counter(NamedTuple):
+    """Um contador: a contagem no banco e, opcionalmente, até quando ela vale"""
+    name: str
+    count: Callable[[Session, datetime], int]
+    valid_until: Optional[Callable[[Session, datetime], Optional[datetime]]] = None
+
+
+class _Scope:
+    def __init__(self):
+        self.values: Dict[str, int] = {}
+        self.expires: Dict[str, datetime] = {}
+        self.reconciled_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class CounterSet:
+    """Contadores por escopo, com ajuste incremental e reconciliação periódica"""
+
+    def __init__(self, counters: Iterable[Counter], now: Callable[[], datetime] = datetime.utcnow):
+        self.counters = {counter.name: counter for counter in counters}
+        self._now = now
+        self._scopes: Dict[str, _Scope] = {}
+        self._guard = threading.Lock()
+
+    def _scope(self, scope: str) -> _Scope:
+        with self._guard:
+            return self._scopes.setdefault(scope, _Scope())
+
+    def add(self, scope: str, name: str, delta: int = 1, until: Optional[datetime] = None):
+        """
+        Ajuste após um commit. `until` antecipa a validade do contador
+        (ex.: o aviso criado expira antes da validade atual).
+        """
+        state = self._scope(scope)
+        with state.lock:
+            # Ainda não contado: a primeira leitura conta no banco
+            if state.reconciled_at is None:
+                return
+            state.values[name] += delta
+            if until is not None and (name not in state.expires or until < state.expires[name]):
+                state.expires[name] = until
+
+    def _recount(self, state: _Scope, counter: Counter, db: Session, now: datetime):
+        state.values[counter.name] = counter.count(db, now)
+        expires = counter.valid_until(db, now) if counter.valid_until else None
+        if expires is None:
+            state.expires.pop(counter.name, None)
+        else:
+            state.expires[counter.name] = expires
+
+    def reconcile(self, scope: str, db: Session) -> Dict[str, int]:
+        """Reconta o escopo no banco; devolve a correção aplicada a cada contador com deriva"""
+        state = self._scope(scope)
+        with state.lock:
+            return self._reconcile(state, db)
+
+    def _reconcile(self, state: _Scope, db: Session) -> Dict[str, int]:
+        now = self._now()
+        drift = {}
+        for counter in self.counters.values():
+            before = state.values.get(counter.name)
+            self._recount(state, counter, db, now)
+            if before is not None and before != state.values[counter.name]:
+                drift[counter.name] = state.values[counter.name] - before
+        state.reconciled_at = time.monotonic()
+        return drift
+
+    def snapshot(self, scope: str, db: Session) -> Dict[str, int]:
+        """Todos os contadores do escopo; o banco só é consultado para reconciliar ou recontar vencidos"""
+        state = self._scope(scope)
+        interval = settings.COUNTERS_RECONCILE_SECONDS
+        with state.lock:
+            if state.reconciled_at is None or (interval and time.monotonic() - state.reconciled_at >= interval):
+                self._reconcile(state, db)
+            else:
+                now = self._now()
+                for name, expires in list(state.expires.items()):
+                    if expires <= now:
+                        self._recount(state, self.counters[name], db, now)
+            return dict(state.values)
@@ -1,21 +1,88 @@
 """
 Configuração do banco de dados com SQLAlchemy
+
+Com DATABASE_REPLICA_URLS configurado, as sessões leem das réplicas quando
+a requisição permite (ver replicas.py) e escrevem sempre no primário. Uma
+sessão que escreveu passa a ler do primário até ser fechada.
 """
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from config import settings
+from replicas import replicas, replica_reads_allowed, current_client
+
+
+
+def pool_options(url: str) -> dict:
+    """Pool de conexões do processo (SQLite em memória usa um pool próprio, sem tamanho)"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT
+    }
+
 
 # Criar engine do banco de dados
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=3600,
-    echo=False
+    echo=False,
+    **pool_options(settings.DATABASE_URL)
 )
 
+# Réplicas de leitura (opcionais)
+for replica_url in settings.DATABASE_REPLICA_URLS:
+    replicas.add(create_engine(
+        replica_url, pool_pre_ping=True, pool_recycle=3600, echo=False, **pool_options(replica_url)
+    ))
+
+
+def _discard_inherited_connections():
+    """Processo filho (workers do gunicorn): não reutiliza as conexões abertas pelo pai"""
+    engine.dispose(close=False)
+    for replica in replicas.replicas:
+        replica.engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_discard_inherited_connections)
+
+
+class RoutingSession(Session):
+    """Sessão que envia leituras para uma réplica e escritas para o primário"""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not replicas or self._flushing or self.info.get("wrote") or not replica_reads_allowed():
+            return engine
+        if clause is not None and not getattr(clause, "is_select", False):
+            # INSERT/UPDATE/DELETE e SQL textual: primário, e a sessão fica nele
+            self.info["wrote"] = True
+            return engine
+        if "replica" not in self.info:
+            # Uma réplica por sessão: as leituras de uma requisição veem o mesmo estado
+            self.info["replica"] = replicas.choose() or engine
+        return self.info["replica"]
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session):
+    if session.info.get("wrote"):
+        replicas.wrote(current_client())
+
+
 # Criar SessionLocal para gerenciar sessões
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 # Base para os modelos
 Base = declarative_base()
@@ -0,0 +1,88 @@
+"""
+Execução em produção: gunicorn com workers uvicorn
+
+    gunicorn -c gunicorn_conf.py main:app
+
+- Workers: WEB_CONCURRENCY, ou um por CPU disponível (afinidade do processo
+  e cota de CPU do container, cgroup v2).
+- O app é importado no processo mestre antes do fork (preload): os workers
+  compartilham o código já carregado e sobem mais rápido. Os engines do
+  SQLAlchemy descartam no filho as conexões herdadas (database.py).
+- Pool de conexões por worker: com DB_MAX_CONNECTIONS, o total é dividido
+  entre os workers (e o limite de concorrência acompanha o pool); sem ele,
+  cada worker usa DB_POOL_SIZE + DB_MAX_OVERFLOW.
+- Limites de taxa: os token buckets (ratelimit.py) são por processo; cada
+  worker aplica 1/workers de cada limite, para que o total do serviço não
+  passe do configurado. Um cliente cujas requisições caem sempre no mesmo
+  worker (keep-alive) fica com a fração daquele worker.
+- Reciclagem: cada worker é substituído após WORKER_MAX_REQUESTS
+  requisições (mais um jitter aleatório, para não reiniciarem juntos).
+- Reinício gracioso: SIGTERM/SIGQUIT no mestre param de aceitar conexões e
+  aguardam as requisições em andamento por até WORKER_GRACEFUL_TIMEOUT
+  segundos. Com preload, SIGHUP recria os workers com o código já
+  carregado; para publicar código novo sem derrubar requisições, envie
+  SIGUSR2 (sobe um novo mestre com o código atual) e depois SIGTERM ao
+  mestre antigo.
+"""
+import math
+import os
+
+from config import settings
+
+
+def available_cpus() -> int:
+    """CPUs que o processo pode usar (afinidade e cota do cgroup)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def split_rate_limits(workers: int):
+    """Divide os limites por minuto entre os workers (buckets por processo)"""
+    def share(per_minute):
+        return max(1.0, per_minute / workers)
+
+    settings.RATE_LIMIT_USER_PER_MINUTE = share(settings.RATE_LIMIT_USER_PER_MINUTE)
+    settings.RATE_LIMIT_IP_PER_MINUTE = share(settings.RATE_LIMIT_IP_PER_MINUTE)
+    settings.RATE_LIMIT_ROUTES = {spec: share(per_minute) for spec, per_minute in settings.RATE_LIMIT_ROUTES.items()}
+
+
+def split_pool(total: int, workers: int):
+    """Divide o total de conexões entre os workers (pool fixo, sem overflow)"""
+    per_worker = max(1, total // workers)
+    settings.DB_POOL_SIZE = per_worker
+    settings.DB_MAX_OVERFLOW = 0
+    # 0 (padrão) já acompanha o pool
+    if settings.MAX_CONCURRENT_REQUESTS > per_worker:
+        settings.MAX_CONCURRENT_REQUESTS = per_worker
+
+
+workers = settings.WEB_CONCURRENCY or available_cpus()
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"{settings.API_HOST}:{settings.API_PORT}"
+preload_app = True
+
+max_requests = settings.WORKER_MAX_REQUESTS
+max_requests_jitter = settings.WORKER_MAX_REQUESTS_JITTER
+graceful_timeout = settings.WORKER_GRACEFUL_TIMEOUT
+timeout = settings.WORKER_TIMEOUT
+keepalive = settings.KEEPALIVE_SECONDS
+
+# O app é importado depois deste arquivo: os engines já nascem com o pool de cada worker
+if settings.DB_MAX_CONNECTIONS:
+    split_pool(settings.DB_MAX_CONNECTIONS, workers)
+if workers > 1:
+    split_rate_limits(workers)
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s: pool de %s (+%s) conexões", worker.pid, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
@@ -4,13 +4,15 @@ Sistema de Condomínio
 """
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import List
 
 from config import settings
-from database import get_db, engine, Base
+from database import get_db, engine
 from models import User, Group, Function, Permission, Condominium, Unit, Resident
 from schemas import (
     Token, LoginRequest, UserCreate, UserUpdate, UserResponse,
@@ -26,9 +28,15 @@ from auth import (
     authenticate_user, create_access_token, get_current_active_user,
     get_password_hash, check_permission
 )
-
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
+from migrator import startup as prepare_schema
+from migrations import migrator
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, REGISTRY, CONTENT_TYPE, instrument_engine
+from profiler import SQLProfilerMiddleware, profiler, profile_engine
+from replicas import ReplicaRoutingMiddleware, replicas
+from ratelimit import RateLimitMiddleware
+from response_cache import response_cache
+from counters import Counter, CounterSet
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -37,7 +45,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
 # Configurar CORS
@@ -49,6 +58,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão gzip/brotli e ETag/304
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Métricas: latência por rota, consultas SQL e pool de conexões
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    for replica in replicas.replicas:
+        instrument_engine(replica.engine, pool_metrics=False)
+    app.add_middleware(MetricsMiddleware)
+
+# Profiler de SQL: header X-SQL-Profile e /debug/sql-profile
+if settings.SQL_PROFILER_ENABLED:
+    profile_engine(engine)
+    for replica in replicas.replicas:
+        profile_engine(replica.engine)
+    app.add_middleware(SQLProfilerMiddleware)
+
+# Réplicas de leitura: GET/HEAD leem das réplicas, respeitando read-your-writes
+if replicas:
+    app.add_middleware(ReplicaRoutingMiddleware)
+
+# Limite de taxa por usuário/IP/rota e descarte de carga (429/503 antes de qualquer outro processamento)
+if settings.RATE_LIMIT_ENABLED or settings.LOAD_SHED_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+
+@app.on_event("startup")
+def prepare_database():
+    """Prepara o schema conforme SCHEMA_MODE (migrate, check ou skip)"""
+    prepare_schema(migrator, settings.SCHEMA_MODE)
+
 
 # ========== Rotas de Autenticação ==========
 
@@ -199,14 +240,20 @@ async def delete_user(
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     
+    # Vínculos de morador são excluídos em cascata
+    today = date.today()
+    active_residents = sum(1 for resident in user.residents if _resident_active(resident, today))
     db.delete(user)
     db.commit()
+    if active_residents:
+        dashboard_counters.add(COUNTERS_SCOPE, "active_residents", -active_residents)
     return SuccessResponse(message="Usuário excluído com sucesso")
 
 
 # ========== Rotas de Grupos ==========
 
 @app.get("/api/groups", response_model=List[GroupResponse], tags=["Grupos"])
+@response_cache.cached("groups", "permissions")
 async def list_groups(
     skip: int = 0,
     limit: int = 100,
@@ -234,6 +281,7 @@ async def create_group(
     group = Group(**group_data.dict())
     db.add(group)
     db.commit()
+    response_cache.invalidate("groups")
     db.refresh(group)
     return group
 
@@ -241,6 +289,7 @@ async def create_group(
 # ========== Rotas de Funções ==========
 
 @app.get("/api/functions", response_model=List[FunctionResponse], tags=["Funções"])
+@response_cache.cached("functions")
 async def list_functions(
     skip: int = 0,
     limit: int = 100,
@@ -262,6 +311,7 @@ async def create_function(
     function = Function(**function_data.dict())
     db.add(function)
     db.commit()
+    response_cache.invalidate("functions")
     db.refresh(function)
     return function
 
@@ -299,6 +349,7 @@ async def create_permission(
     permission = Permission(**permission_data.dict())
     db.add(permission)
     db.commit()
+    response_cache.invalidate("permissions")
     db.refresh(permission)
     return permission
 
@@ -319,12 +370,14 @@ async def delete_permission(
     
     db.delete(permission)
     db.commit()
+    response_cache.invalidate("permissions")
     return SuccessResponse(message="Permissão excluída com sucesso")
 
 
 # ========== Rotas de Condomínios ==========
 
 @app.get("/api/condominiums", response_model=List[CondominiumResponse], tags=["Condomínios"])
+@response_cache.cached("condominiums")
 async def list_condominiums(
     skip: int = 0,
     limit: int = 100,
@@ -346,6 +399,7 @@ async def create_condominium(
     condominium = Condominium(**condominium_data.dict())
     db.add(condominium)
     db.commit()
+    response_cache.invalidate("condominiums")
     db.refresh(condominium)
     return condominium
 
@@ -416,15 +470,76 @@ async def create_resident(
     db.add(resident)
     db.commit()
     db.refresh(resident)
+    if _resident_active(resident, date.today()):
+        dashboard_counters.add(COUNTERS_SCOPE, "active_residents")
     return resident
 
 
+# ========== Rotas do Dashboard ==========
+
+# Escopo único: os contadores somam todos os condomínios
+COUNTERS_SCOPE = "default"
+
+
+def _resident_active(resident: Resident, today: date) -> bool:
+    """Morador já mudou para a unidade e ainda não saiu"""
+    return (
+        (resident.move_in_date is None or resident.move_in_date <= today)
+        and (resident.move_out_date is None or resident.move_out_date > today)
+    )
+
+
+def _count_active_residents(db: Session, now: datetime) -> int:
+    today = now.date()
+    return db.scalar(select(func.count()).select_from(Resident).where(
+        or_(Resident.move_in_date == None, Resident.move_in_date <= today),
+        or_(Resident.move_out_date == None, Resident.move_out_date > today)
+    ))
+
+
+# As datas de mudança são dias locais: o contador vale até a meia-noite
+dashboard_counters = CounterSet(
+    [Counter(
+        "active_residents",
+        _count_active_residents,
+        lambda db, now: datetime.combine(now.date() + timedelta(days=1), time.min)
+    )],
+    now=datetime.now
+)
+
+
+@app.get("/api/dashboard/counters", tags=["Dashboard"])
+async def get_dashboard_counters(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Contadores do painel (moradores ativos de todos os condomínios), servidos da memória"""
+    return dashboard_counters.snapshot(COUNTERS_SCOPE, db)
+
+
 # ========== Health Check ==========
 
 @app.get("/health", tags=["Sistema"])
 async def health_check():
     """Verificação de saúde do serviço"""
-    return {"status": "healthy", "service": "auth_service"}
+    health = {"status": "healthy", "service": "auth_service"}
+    if replicas:
+        health["replicas"] = replicas.status()
+    return health
+
+
+@app.get("/metrics", tags=["Sistema"], include_in_schema=False)
+async def metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/debug/sql-profile", tags=["Sistema"], include_in_schema=False)
+async def sql_profile(suspects: bool = False):
+    """Perfis de SQL das requisições recentes (apenas com SQL_PROFILER_ENABLED)"""
+    if not settings.SQL_PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler de SQL desativado")
+    return profiler.recent(only_suspects=suspects)
 
 
 if __name__ == "__main__":
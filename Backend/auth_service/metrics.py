@@ -0,0 +1,296 @@
+"""
+Métricas no formato de exposição do Prometheus
+
+Registro em processo, sem dependências externas:
+- MetricsMiddleware (ASGI puro) mede latência, status e requisições em
+  andamento por rota, usando o template do caminho (/api/x/{id}) como rótulo;
+- instrument_engine registra eventos do SQLAlchemy que contam e cronometram
+  cada consulta, globalmente e por requisição (via ContextVar);
+- o estado do pool de conexões é lido no momento da coleta.
+
+O custo por requisição é uma busca em dict, um bisect por histograma e
+alguns incrementos sob lock.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Rótulo das requisições que não casaram com nenhuma rota (evita cardinalidade alta)
+UNMATCHED = "<unmatched>"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base das métricas: nome, ajuda e nomes dos rótulos"""
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        collect: Optional[Callable[[], Dict[Tuple, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._collect = collect
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self) -> List[str]:
+        if self._collect is not None:
+            items = list(self._collect().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Por combinação de rótulos: [contagens por faixa (não acumuladas) + faixa +Inf, soma]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = []
+        names = self.labelnames + ("le",)
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas expostas em /metrics"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self._metrics:
+            samples = metric.samples()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        return ("\n".join(lines) + "\n").encode()
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.register(Counter(
+    "http_requests_total", "Requisições HTTP atendidas", ("method", "route", "status")
+))
+http_latency = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP", ("method", "route"), LATENCY_BUCKETS
+))
+http_in_progress = REGISTRY.register(Gauge(
+    "http_requests_in_progress", "Requisições HTTP em andamento", ("method",)
+))
+request_queries = REGISTRY.register(Histogram(
+    "http_request_db_queries", "Consultas SQL por requisição", ("method", "route"), COUNT_BUCKETS
+))
+request_query_time = REGISTRY.register(Histogram(
+    "http_request_db_duration_seconds", "Tempo em consultas SQL por requisição", ("method", "route"), LATENCY_BUCKETS
+))
+db_queries = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Duração das consultas SQL", ("operation",), QUERY_BUCKETS
+))
+
+
+class RequestStats:
+    """Consultas SQL executadas durante a requisição corrente"""
+    __slots__ = ("queries", "duration")
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que registra as métricas HTTP de cada requisição"""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[Callable, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED
+        route = self._routes.get(endpoint)
+        if route is None:
+            # Mapa endpoint -> template do caminho, montado sob demanda
+            for candidate in getattr(scope.get("app"), "routes", ()):
+                self._routes.setdefault(getattr(candidate, "endpoint", None), candidate.path)
+            route = self._routes.get(endpoint, UNMATCHED)
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_progress.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_progress.dec(method)
+            _request_stats.reset(token)
+            route = self._route(scope)
+            http_requests.inc(method, route, status)
+            http_latency.observe(elapsed, method, route)
+            request_queries.observe(stats.queries, method, route)
+            request_query_time.observe(stats.duration, method, route)
+
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip()[:6].lower()
+    return verb if verb in ("select", "insert", "update", "delete") else "other"
+
+
+def instrument_engine(engine: Engine, pool_metrics: bool = True):
+    """Registra os eventos de consulta e, opcionalmente, as métricas do pool do engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        db_queries.observe(elapsed, _operation(statement))
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.duration += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    if not pool_metrics:
+        return
+    pool = engine.pool
+
+    def _pool_stat(name: str) -> Callable[[], Dict[Tuple, float]]:
+        method = getattr(pool, name, None)
+        return lambda: {(): method()} if callable(method) else {}
+
+    REGISTRY.register(Gauge("db_pool_size", "Tamanho configurado do pool", collect=_pool_stat("size")))
+    REGISTRY.register(Gauge("db_pool_checked_out", "Conexões em uso", collect=_pool_stat("checkedout")))
+    REGISTRY.register(Gauge("db_pool_checked_in", "Conexões ociosas no pool", collect=_pool_stat("checkedin")))
+    REGISTRY.register(Gauge("db_pool_overflow", "Conexões além do tamanho do pool", collect=_pool_stat("overflow")))
@@ -0,0 +1,30 @@
+"""
+Migrações do schema do Auth Service
+
+Uso: python migrations.py upgrade|status|check|stamp <versão>
+"""
+from pathlib import Path
+
+from database import Base, engine
+import models  # noqa: F401 (registra as tabelas no metadata)
+from migrator import Migration, Migrator, create_tables, main
+
+SCRIPT = Path(__file__).resolve().parents[2] / "Script" / "01_create_auth_tables.sql"
+
+
+def baseline(connection, metadata):
+    create_tables(
+        connection, metadata,
+        "groups", "users", "functions", "permissions", "condominiums", "units", "residents"
+    )
+
+
+MIGRATIONS = [
+    Migration("0001", "Schema inicial", baseline),
+]
+
+migrator = Migrator(engine, Base.metadata, MIGRATIONS)
+
+
+if __name__ == "__main__":
+    main(migrator, SCRIPT)
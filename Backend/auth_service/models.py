@@ -124,13 +124,14 @@ class Resident(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     unit_id = Column(Integer, ForeignKey("units.id"), nullable=False, index=True)
+    
+    # Relacionamentos (declarados antes da coluna "relationship", que encobre a função no corpo da classe)
+    user = relationship("User", back_populates="residents")
+    unit = relationship("Unit", back_populates="residents")
+    
     relationship = Column(String(50), nullable=False)
     is_owner = Column(Boolean, default=False)
     is_primary = Column(Boolean, default=False)
     move_in_date = Column(Date)
     move_out_date = Column(Date)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    
-    # Relacionamentos
-    user = relationship("User", back_populates="residents")
-    unit = relationship("Unit", back_populates="residents")
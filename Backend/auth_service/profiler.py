@@ -0,0 +1,207 @@
+"""
+Profiler de SQL por requisição (opcional, SQL_PROFILER_ENABLED)
+
+Agrupa as consultas de cada requisição pela forma do comando (literais e
+listas IN normalizados). Formas repetidas SQL_PROFILER_N_PLUS_ONE_THRESHOLD
+vezes ou mais são sinalizadas como N+1; consultas acima de
+SQL_SLOW_QUERY_MS são registradas no log com o plano de execução (EXPLAIN).
+
+Cada resposta recebe o header X-SQL-Profile e os perfis recentes ficam
+disponíveis em GET /debug/sql-profile.
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+logger = logging.getLogger("sql_profiler")
+
+HEADER = "X-SQL-Profile"
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_IN_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Forma do comando: sem literais, espaços redundantes e tamanho de listas IN"""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _WHITESPACE.sub(" ", shape).strip()
+    return _IN_LIST.sub("(...)", shape)
+
+
+class RequestProfile:
+    """Consultas de uma requisição agrupadas por forma"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.queries = 0
+        self.duration = 0.0
+        self.statements: Dict[str, List] = {}
+        self.slow: List[dict] = []
+
+    def record(self, statement: str, elapsed: float):
+        self.queries += 1
+        self.duration += elapsed
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def by_shape(self) -> Dict[str, List]:
+        """Contagem e tempo por forma (listas IN de tamanhos diferentes se juntam)"""
+        grouped: Dict[str, List] = {}
+        for statement, (count, elapsed) in self.statements.items():
+            total = grouped.setdefault(statement_shape(statement), [0, 0.0])
+            total[0] += count
+            total[1] += elapsed
+        return grouped
+
+    def n_plus_one(self, threshold: int) -> List[dict]:
+        """Formas repetidas `threshold` vezes ou mais, da mais frequente para a menos"""
+        return [
+            {"statement": shape, "count": count, "duration_ms": round(elapsed * 1000, 2)}
+            for shape, (count, elapsed) in sorted(self.by_shape().items(), key=lambda item: -item[1][0])
+            if count >= threshold
+        ]
+
+    def summary(self, threshold: int) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "queries": self.queries,
+            "distinct_statements": len(self.by_shape()),
+            "duration_ms": round(self.duration * 1000, 2),
+            "n_plus_one": self.n_plus_one(threshold),
+            "slow_queries": self.slow
+        }
+
+    def header(self, threshold: int) -> str:
+        suspects = len(self.n_plus_one(threshold))
+        return f"queries={self.queries}; time={self.duration * 1000:.1f}ms; n+1={suspects}"
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+
+
+class SQLProfiler:
+    """Guarda os perfis das requisições mais recentes"""
+
+    def __init__(self, history_size: int):
+        self._recent: Deque[dict] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def add(self, summary: dict):
+        with self._lock:
+            self._recent.append(summary)
+
+    def recent(self, only_suspects: bool = False) -> List[dict]:
+        with self._lock:
+            items = list(self._recent)
+        if only_suspects:
+            items = [item for item in items if item["n_plus_one"] or item["slow_queries"]]
+        return items[::-1]
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+
+
+profiler = SQLProfiler(settings.SQL_PROFILER_HISTORY_SIZE)
+
+
+class SQLProfilerMiddleware:
+    """Middleware ASGI que abre um perfil por requisição HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/debug/"):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current.set(profile)
+        threshold = settings.SQL_PROFILER_N_PLUS_ONE_THRESHOLD
+
+        async def send_wrapper(message):
+            # Consultas feitas durante o streaming do corpo não entram no header
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((HEADER.lower().encode(), profile.header(threshold).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            summary = profile.summary(threshold)
+            for suspect in summary["n_plus_one"]:
+                logger.warning(
+                    "Possível N+1 em %s %s: %dx %s", profile.method, profile.path, suspect["count"], suspect["statement"]
+                )
+            profiler.add(summary)
+
+
+def _explain(cursor, statement: str, parameters, dialect: str) -> List[str]:
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    # Cursor DBAPI separado: não dispara os eventos do engine nem consome o resultado original
+    explain = cursor.connection.cursor()
+    try:
+        explain.execute(prefix + statement, parameters)
+        return [" | ".join(str(value) for value in row) for row in explain.fetchall()]
+    finally:
+        explain.close()
+
+
+def profile_engine(engine: Engine):
+    """Registra os eventos que alimentam o perfil da requisição corrente"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profiler_started"].pop()
+        profile = _current.get()
+        if profile is not None:
+            profile.record(statement, elapsed)
+
+        if elapsed * 1000 < settings.SQL_SLOW_QUERY_MS:
+            return
+        plan = []
+        if not executemany and statement.lstrip()[:6].lower() == "select":
+            try:
+                plan = _explain(cursor, statement, parameters, conn.dialect.name)
+            except Exception as exc:  # o EXPLAIN é apenas diagnóstico
+                plan = [f"EXPLAIN indisponível: {exc}"]
+        logger.warning("Consulta lenta (%.1f ms): %s", elapsed * 1000, "\n".join([statement] + plan))
+        if profile is not None:
+            profile.slow.append({
+                "statement": statement_shape(statement),
+                "duration_ms": round(elapsed * 1000, 2),
+                "plan": plan
+            })
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("profiler_started") if context.connection is not None else None
+        if started:
+            started.pop()
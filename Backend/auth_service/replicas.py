@@ -0,0 +1,212 @@
+"""
+Roteamento de leituras para réplicas (DATABASE_REPLICA_URLS)
+
+- Round-robin entre as réplicas saudáveis. Uma réplica com
+  REPLICA_FAILURE_THRESHOLD falhas de conexão seguidas é afastada por
+  REPLICA_EJECT_SECONDS; depois disso volta a receber leituras e a primeira
+  consulta bem-sucedida zera o contador (uma nova falha a afasta de novo).
+- Só requisições GET/HEAD leem das réplicas; as demais (e o código fora de
+  requisições, como a inicialização) usam sempre o primário.
+- Read-your-writes: depois de uma escrita confirmada, as leituras do mesmo
+  cliente (token de acesso ou, sem token, IP) vão para o primário por
+  READ_YOUR_WRITES_SECONDS, cobrindo o atraso de replicação. O registro em
+  memória é por processo; para valer em qualquer worker, a resposta da
+  escrita leva também o cookie READ_YOUR_WRITES_COOKIE com o fim da janela,
+  respeitado por todos os workers enquanto o cliente o reenviar.
+"""
+import threading
+import time
+from http.cookies import SimpleCookie
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+SAFE_METHODS = ("GET", "HEAD")
+READ_YOUR_WRITES_COOKIE = "ryw_until"
+
+# Cliente da requisição corrente (token ou IP) e se suas leituras podem ir para uma réplica
+_client: ContextVar[Optional[object]] = ContextVar("replica_client", default=None)
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+# Estado mutável da requisição: escritas confirmadas nela (também em threads do threadpool)
+_request_writes: ContextVar[Optional[dict]] = ContextVar("replica_request_writes", default=None)
+
+
+class Replica:
+    """Engine de uma réplica e seu estado de saúde"""
+
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class ReplicaSet:
+    """Réplicas de leitura com round-robin, afastamento por falha e janela read-your-writes"""
+
+    def __init__(self, failure_threshold: int, eject_seconds: float, sticky_seconds: float):
+        self.replicas: List[Replica] = []
+        self.failure_threshold = failure_threshold
+        self.eject_seconds = eject_seconds
+        self.sticky_seconds = sticky_seconds
+        self._next = 0
+        self._writes: "OrderedDict[object, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def add(self, engine: Engine) -> Replica:
+        replica = Replica(f"replica{len(self.replicas) + 1}", engine)
+        self.replicas.append(replica)
+        self._watch(replica)
+        return replica
+
+    def _watch(self, replica: Replica):
+        @event.listens_for(replica.engine, "handle_error")
+        def _error(context):
+            # Só falhas de conexão contam (erros de SQL não dizem nada sobre a saúde da réplica)
+            if context.is_disconnect or context.connection is None:
+                self.failed(replica)
+
+        @event.listens_for(replica.engine, "after_cursor_execute")
+        def _success(conn, cursor, statement, parameters, context, executemany):
+            if replica.failures:
+                replica.failures = 0
+
+    def failed(self, replica: Replica):
+        with self._lock:
+            replica.failures += 1
+            if replica.failures >= self.failure_threshold:
+                replica.ejected_until = time.monotonic() + self.eject_seconds
+
+    def choose(self) -> Optional[Engine]:
+        """Próxima réplica disponível (None quando todas estão afastadas)"""
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next]
+                self._next = (self._next + 1) % len(self.replicas)
+                if replica.available(now):
+                    return replica.engine
+        return None
+
+    def wrote(self, client):
+        """Registra uma escrita confirmada do cliente (abre a janela read-your-writes)"""
+        if client is None or not self.sticky_seconds:
+            return
+        request_writes = _request_writes.get()
+        if request_writes is not None:
+            request_writes["wrote"] = True
+        now = time.monotonic()
+        with self._lock:
+            self._writes[client] = now
+            self._writes.move_to_end(client)
+            # Entradas em ordem de escrita: as vencidas ficam no início
+            while self._writes:
+                oldest, written = next(iter(self._writes.items()))
+                if now - written < self.sticky_seconds:
+                    break
+                del self._writes[oldest]
+
+    def sticky(self, client) -> bool:
+        written = self._writes.get(client)
+        return written is not None and time.monotonic() - written < self.sticky_seconds
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.available(now),
+                "failures": replica.failures,
+                "ejected_for_seconds": round(max(0.0, replica.ejected_until - now), 1)
+            }
+            for replica in self.replicas
+        ]
+
+
+replicas = ReplicaSet(
+    settings.REPLICA_FAILURE_THRESHOLD, settings.REPLICA_EJECT_SECONDS, settings.READ_YOUR_WRITES_SECONDS
+)
+
+
+def current_client():
+    """Cliente da requisição corrente (None fora de requisições)"""
+    return _client.get()
+
+
+def replica_reads_allowed() -> bool:
+    return _replica_reads.get()
+
+
+def _client_key(scope):
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            return value
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def _cookie_sticky(scope) -> bool:
+    """O cookie de read-your-writes (de uma escrita em qualquer worker) ainda vale?"""
+    for name, value in scope.get("headers", ()):
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(READ_YOUR_WRITES_COOKIE)
+            if morsel is not None:
+                try:
+                    return float(morsel.value) > time.time()
+                except ValueError:
+                    return False
+    return False
+
+
+def _write_cookie(seconds: float) -> bytes:
+    until = time.time() + seconds
+    return (
+        f"{READ_YOUR_WRITES_COOKIE}={until:.3f}; Max-Age={int(seconds) + 1}; Path=/; HttpOnly; SameSite=Lax"
+    ).encode("latin-1")
+
+
+class ReplicaRoutingMiddleware:
+    """Middleware ASGI que libera leituras em réplica para GET/HEAD fora da janela read-your-writes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = _client_key(scope)
+        allowed = (
+            scope["method"] in SAFE_METHODS and client is not None
+            and not replicas.sticky(client) and not _cookie_sticky(scope)
+        )
+        request_writes = {"wrote": False}
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and request_writes["wrote"]:
+                message["headers"] = list(message.get("headers", ())) + [
+                    (b"set-cookie", _write_cookie(replicas.sticky_seconds))
+                ]
+            await send(message)
+
+        client_token = _client.set(client)
+        reads_token = _replica_reads.set(allowed)
+        writes_token = _request_writes.set(request_writes)
+        try:
+            await self.app(scope, receive, send_with_cookie if replicas else send)
+        finally:
+            _request_writes.reset(writes_token)
+            _replica_reads.reset(reads_token)
+            _client.reset(client_token)
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark da reconstrução "as of" de funcionários (Management Service)
+
+Gera funcionários com históricos longos e compara, para datas aleatórias,
+a reaplicação da cadeia inteira de alterações com a reconstrução a partir
+do último snapshot (no máximo HISTORY_SNAPSHOT_INTERVAL alterações).
+
+Uso:
+    python bench_as_of.py --employees 10 --changes 10000 --queries 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "bench_as_of.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "management_service"))
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from config import settings  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import Employee, EmployeeHistory  # noqa: E402
+from snapshots import EMPLOYEES, reconstruct, sync  # noqa: E402
+
+START = datetime(2015, 1, 1)
+ROLES = ["Porteiro", "Zelador", "Faxineiro", "Supervisor", "Vigia"]
+
+
+def seed(employees: int, changes: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(Employee), [
+            {
+                "id": i, "name": f"Funcionário {i}", "cpf": f"{i:011d}", "role": ROLES[0],
+                "hire_date": START.date(), "salary": 2000, "created_at": START
+            }
+            for i in range(1, employees + 1)
+        ])
+        rows = []
+        state = {i: {"role": ROLES[0], "salary": 2000} for i in range(1, employees + 1)}
+        for step in range(changes):
+            changed_at = START + timedelta(hours=step * 24 * 3650 // changes)
+            for i in range(1, employees + 1):
+                field = "salary" if rng.random() < 0.7 else "role"
+                old = state[i][field]
+                new = old + rng.randint(-50, 100) if field == "salary" else rng.choice(ROLES)
+                state[i][field] = new
+                rows.append({
+                    "employee_id": i, "field_name": field, "old_value": str(old),
+                    "new_value": str(new), "changed_at": changed_at
+                })
+        conn.execute(insert(EmployeeHistory), rows)
+        for i, values in state.items():
+            conn.execute(
+                Employee.__table__.update().where(Employee.id == i).values(**values)
+            )
+
+
+def full_replay(db, employee_id: int, as_of: datetime) -> dict:
+    """Reaplica todas as alterações desde a criação (caminho sem snapshots)"""
+    state = {"role": ROLES[0], "salary": "2000"}
+    for field, value in db.execute(
+        select(EmployeeHistory.field_name, EmployeeHistory.new_value)
+        .where(EmployeeHistory.employee_id == employee_id, EmployeeHistory.changed_at <= as_of)
+        .order_by(EmployeeHistory.id)
+    ):
+        state[field] = value
+    return state
+
+
+def measure(name: str, func, queries):
+    timings = []
+    with SessionLocal() as db:
+        for employee_id, as_of in queries:
+            start = time.perf_counter()
+            func(db, employee_id, as_of)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(
+        f"{name:<10} p50 {statistics.median(timings) * 1000:7.2f} ms"
+        f" | p95 {timings[int(len(timings) * 0.95) - 1] * 1000:7.2f} ms"
+    )
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--employees", type=int, default=10)
+    parser.add_argument("--changes", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    seed(args.employees, args.changes)
+    print(f"{args.employees} funcionários x {args.changes} alterações | intervalo de snapshot {settings.HISTORY_SNAPSHOT_INTERVAL}")
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        sync(db, EMPLOYEES)
+    print(f"snapshots materializados em {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    rng = random.Random(7)
+    queries = [
+        (rng.randint(1, args.employees), START + timedelta(days=rng.randint(0, 3650)))
+        for _ in range(args.queries)
+    ]
+    for employee_id, as_of in queries[:20]:
+        with SessionLocal() as db:
+            expected = full_replay(db, employee_id, as_of)
+            state = reconstruct(db, EMPLOYEES, [employee_id], as_of)[0]
+        assert state["role"] == expected["role"] and int(state["salary"]) == int(expected["salary"]), (state, expected)
+
+    replay = measure("cadeia", full_replay, queries)
+    snapshot = measure("snapshot", lambda db, i, t: reconstruct(db, EMPLOYEES, [i], t), queries)
+    print(f"{'':<10} {replay / snapshot:5.1f}x mais rápido que reaplicar a cadeia")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark de compressão e GET condicional (Operations Service)
+
+Duas partes:
+- codecs: para listagens de visitantes de vários tamanhos, bytes economizados
+  e custo de CPU de gzip (níveis 1, 6 e 9), brotli (se instalado) e do hash
+  do ETag;
+- ponta a ponta: GET /api/visitors pelo app real (em processo, com o
+  middleware), comparando identity, gzip e revalidação com If-None-Match
+  (304 respondido antes de executar a rota).
+
+Uso:
+    python bench_compression.py --rows 1000 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "bench_compression.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "operations_service"))
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from compression import brotli, etag_for  # noqa: E402
+from database import engine  # noqa: E402
+from models import Visitor  # noqa: E402
+from serialization import dumps  # noqa: E402
+
+
+def visitors(rows: int) -> list:
+    start = datetime(2025, 1, 1, 8)
+    return [
+        {
+            "name": f"Visitante {i}",
+            "document": f"{i:011d}",
+            "unit_id": i % 300,
+            "entry_time": start + timedelta(minutes=i),
+            "exit_time": start + timedelta(minutes=i + 45) if i % 7 else None,
+            "vehicle_plate": f"ABC{i % 10000:04d}" if i % 3 == 0 else None,
+            "purpose": "Visita social",
+            "registered_by": 1 + i % 4,
+            "created_at": start + timedelta(minutes=i)
+        }
+        for i in range(rows)
+    ]
+
+
+def _timed(func, body: bytes, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        output = func(body)
+    return (time.perf_counter() - started) / repeat, output
+
+
+def codecs(repeat: int):
+    candidates = [(f"gzip-{level}", lambda body, level=level: zlib.compress(body, level)) for level in (1, 6, 9)]
+    if brotli is not None:
+        candidates += [(f"br-{quality}", lambda body, quality=quality: brotli.compress(body, quality=quality))
+                       for quality in (4, 11)]
+    print(f"{'linhas':>7} {'corpo':>10} {'codec':<8} {'comprimido':>11} {'economia':>9} {'tempo':>9} {'MB/s':>8}")
+    for rows in (10, 100, 1000, 10000):
+        body = dumps(visitors(rows))
+        for name, func in candidates:
+            elapsed, output = _timed(func, body, repeat)
+            print(
+                f"{rows:>7} {len(body):>10,} {name:<8} {len(output):>11,} {1 - len(output) / len(body):>8.1%} "
+                f"{elapsed * 1000:>7.2f}ms {len(body) / elapsed / 1e6:>8.0f}"
+            )
+        elapsed, _ = _timed(etag_for, body, repeat)
+        print(f"{rows:>7} {len(body):>10,} {'etag':<8} {'':>11} {'':>9} {elapsed * 1000:>7.2f}ms {len(body) / elapsed / 1e6:>8.0f}")
+    if brotli is None:
+        print("(brotli não instalado: apenas gzip é negociado pelo middleware)")
+
+
+async def end_to_end(rows: int, requests: int):
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        with engine.begin() as conn:
+            conn.execute(insert(Visitor), visitors(rows))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            url = f"/api/visitors?limit={rows}"
+            etag = (await client.get(url)).headers["etag"]
+            scenarios = [
+                ("identity", {"Accept-Encoding": "identity"}),
+                ("gzip", {"Accept-Encoding": "gzip"}),
+                ("304", {"Accept-Encoding": "gzip", "If-None-Match": etag}),
+            ]
+            print(f"\n{'cenário':<10} {'status':>6} {'bytes/req':>10} {'média':>9}")
+            for name, headers in scenarios:
+                size = 0
+                status = None
+                started = time.perf_counter()
+                for _ in range(requests):
+                    # stream() expõe os bytes como chegaram (sem descompressão)
+                    async with client.stream("GET", url, headers=headers) as response:
+                        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+                        status = response.status_code
+                        size += len(raw)
+                elapsed = time.perf_counter() - started
+                print(f"{name:<10} {status:>6} {size // requests:>10,} {elapsed / requests * 1000:>7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000, help="Visitantes na listagem ponta a ponta")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20, help="Repetições por codec")
+    args = parser.parse_args()
+
+    codecs(args.repeat)
+    asyncio.run(end_to_end(args.rows, args.requests))
+
+
+if __name__ == "__main__":
+    main()
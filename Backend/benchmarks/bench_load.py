@@ -0,0 +1,369 @@
+"""
+Teste de carga dos endpoints mais usados dos três serviços
+
+Cada serviço roda em um processo próprio (os módulos dos serviços têm os
+mesmos nomes), em processo com httpx + ASGITransport sobre um SQLite local:
+o banco é migrado, populado com volumes realistas e cada cenário é
+disparado com N requisições e C requisições simultâneas.
+
+O relatório traz vazão (req/s) e latências p50/p95/p99 por cenário e é
+comparado com a linha de base salva em baseline_load.json: cenários com p95
+ou vazão piores que a tolerância são marcados como regressão e o processo
+termina com código 1. A linha de base depende da máquina; gere-a novamente
+no ambiente de CI com --save-baseline.
+
+O limite de taxa dos serviços é desligado (todas as requisições vêm do
+mesmo cliente); o limite de concorrência continua ativo. Respostas 503
+por sobrecarga contam como erro.
+
+Uso:
+    python bench_load.py --requests 500 --concurrency 8
+    python bench_load.py --services operations_service --scenarios visitors audit
+    python bench_load.py --save-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.dirname(BENCHMARKS)
+BASELINE = os.path.join(BENCHMARKS, "baseline_load.json")
+SERVICES = ("auth_service", "management_service", "operations_service")
+
+NOW = datetime(2025, 6, 1, 12, 0)
+PASSWORD = "senha-bench"
+
+
+class Scenario(NamedTuple):
+    """Requisição de um cenário: (método, caminho, kwargs do httpx) a partir do índice e do contexto"""
+    name: str
+    build: Callable[[int, dict], Tuple[str, str, dict]]
+    # Fração das requisições pedidas (login usa bcrypt e é deliberadamente caro)
+    share: float = 1.0
+
+
+def _bearer(index: int, context: dict) -> dict:
+    tokens = context["tokens"]
+    return {"headers": {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}}
+
+
+SCENARIOS: Dict[str, List[Scenario]] = {
+    "auth_service": [
+        Scenario("login", lambda i, ctx: (
+            "POST", "/api/auth/login",
+            {"data": {"username": f"usuario{i % ctx['users'] + 1}", "password": PASSWORD}}
+        ), share=0.1),
+        Scenario("me", lambda i, ctx: ("GET", "/api/auth/me", _bearer(i, ctx))),
+        Scenario("list_users", lambda i, ctx: ("GET", f"/api/users?skip={i % 10 * 100}&limit=100", _bearer(i, ctx))),
+    ],
+    "management_service": [
+        Scenario("providers", lambda i, ctx: ("GET", "/api/providers", {})),
+        Scenario("patrimony", lambda i, ctx: ("GET", "/api/patrimony", {})),
+        Scenario("search", lambda i, ctx: ("GET", f"/api/search?q={ctx['terms'][i % len(ctx['terms'])]}", {})),
+    ],
+    "operations_service": [
+        Scenario("notice_board", lambda i, ctx: ("GET", "/api/notice-board", {})),
+        Scenario("visitors", lambda i, ctx: (
+            "GET", f"/api/visitors?unit_id={i % ctx['units'] + 1}&limit=100", {}
+        )),
+        Scenario("visitors_present", lambda i, ctx: ("GET", "/api/visitors?present=true&limit=100", {})),
+        Scenario("schedulings", lambda i, ctx: (
+            "GET", f"/api/schedulings?unit_id={i % ctx['units'] + 1}&limit=100", {}
+        )),
+        Scenario("audit", lambda i, ctx: (
+            "GET", f"/api/audit?action={ctx['actions'][i % len(ctx['actions'])]}&limit=100", {}
+        )),
+    ],
+}
+
+
+# ========== Carga de dados (executada no processo do serviço) ==========
+
+def seed_auth(scale: float) -> dict:
+    from sqlalchemy import insert
+    from auth import get_password_hash, create_access_token
+    from database import engine
+    from models import Group, User, Function, Permission, Condominium, Unit
+
+    users = int(2000 * scale)
+    units = int(500 * scale)
+    # Um único hash bcrypt reaproveitado: o custo fica no login, não na carga
+    password_hash = get_password_hash(PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(Group), [{"id": 1, "name": "Síndicos"}, {"id": 2, "name": "Moradores"}])
+        conn.execute(insert(Function), [{"id": 1, "name": "Listar usuários", "code": "users.list", "module": "users"}])
+        conn.execute(insert(Permission), [{"group_id": 1, "function_id": 1, "action": "execute"}])
+        conn.execute(insert(Condominium), [{"id": 1, "name": "Condomínio Bench", "address": "Rua A, 1"}])
+        conn.execute(insert(Unit), [
+            {"id": i, "condominium_id": 1, "block": str(i % 10), "number": str(i)} for i in range(1, units + 1)
+        ])
+        conn.execute(insert(User), [
+            {
+                "id": i, "username": f"usuario{i}", "password_hash": password_hash, "email": f"usuario{i}@example.com",
+                "full_name": f"Usuário {i}", "group_id": 1 if i % 50 == 1 else 2
+            }
+            for i in range(1, users + 1)
+        ])
+    # Tokens dos síndicos, que têm permissão para listar usuários
+    tokens = [
+        create_access_token({"sub": f"usuario{i}", "user_id": i, "group_id": 1}, timedelta(hours=2))
+        for i in range(1, users + 1, 50)
+    ]
+    return {"users": users, "tokens": tokens}
+
+
+def seed_management(scale: float) -> dict:
+    from sqlalchemy import insert
+    from database import engine
+    from models import Provider, Employee, Patrimony
+
+    rng = random.Random(7)
+    names = ["Silva", "Souza", "Oliveira", "Pereira", "Costa", "Almeida", "Ferreira", "Rodrigues", "Lima", "Gomes"]
+    services = ["Elétrica", "Hidráulica", "Jardinagem", "Limpeza", "Portaria", "Elevadores"]
+    with engine.begin() as conn:
+        conn.execute(insert(Provider), [
+            {
+                "name": f"{rng.choice(names)} {rng.choice(services)} {i}", "service_type": rng.choice(services),
+                "cnpj_cpf": f"{i:014d}", "phone": "1130000000"
+            }
+            for i in range(1, int(1000 * scale) + 1)
+        ])
+        conn.execute(insert(Employee), [
+            {
+                "name": f"{rng.choice(names)} {rng.choice(names)} {i}", "cpf": f"{i:011d}", "role": "Porteiro",
+                "hire_date": NOW.date() - timedelta(days=rng.randint(0, 3000))
+            }
+            for i in range(1, int(300 * scale) + 1)
+        ])
+        conn.execute(insert(Patrimony), [
+            {
+                "name": f"Bem {i}", "category": rng.choice(["Móveis", "Equipamentos", "Veículos"]),
+                "serial_number": f"SN{i:08d}", "acquisition_date": NOW.date() - timedelta(days=rng.randint(0, 3650)),
+                "acquisition_value": rng.randint(100, 50000)
+            }
+            for i in range(1, int(2000 * scale) + 1)
+        ])
+    return {"terms": [name.lower() for name in names] + ["eletrica", "limpeza"]}
+
+
+def _visitor(rng: random.Random, index: int, units: int) -> dict:
+    entry = NOW - timedelta(minutes=rng.randint(0, 525600))
+    return {
+        "name": f"Visitante {index}", "unit_id": rng.randint(1, units), "registered_by": 1, "entry_time": entry,
+        # 1% ainda presentes
+        "exit_time": None if rng.random() < 0.01 else entry + timedelta(hours=2)
+    }
+
+
+def _scheduling(rng: random.Random, units: int) -> dict:
+    start = NOW + timedelta(hours=rng.randint(-4000, 4000))
+    return {
+        "area_id": rng.randint(1, 10), "unit_id": rng.randint(1, units), "user_id": rng.randint(1, 2000),
+        "start_datetime": start, "end_datetime": start + timedelta(hours=2),
+        "status": rng.choice(["pending", "approved"])
+    }
+
+
+def seed_operations(scale: float) -> dict:
+    from sqlalchemy import insert
+    from database import engine
+    from models import Area, Scheduling, Visitor, Notice, Log
+
+    rng = random.Random(7)
+    units = int(500 * scale)
+    actions = ["login", "create", "update", "delete", "approve", "export"]
+    with engine.begin() as conn:
+        conn.execute(insert(Area), [{"id": i, "name": f"Área {i}"} for i in range(1, 11)])
+        conn.execute(insert(Notice), [
+            {
+                "title": f"Aviso {i}", "content": "Manutenção programada. " * 20, "type": "geral",
+                "published_by": 1, "published_at": NOW - timedelta(days=i % 90),
+                "expires_at": NOW + timedelta(days=rng.randint(-60, 60)), "is_active": i % 10 != 0
+            }
+            for i in range(1, int(500 * scale) + 1)
+        ])
+        for offset in range(0, int(50000 * scale), 10000):
+            conn.execute(insert(Visitor), [
+                _visitor(rng, i, units) for i in range(offset, min(offset + 10000, int(50000 * scale)))
+            ])
+        conn.execute(insert(Scheduling), [_scheduling(rng, units) for _ in range(int(20000 * scale))])
+        for offset in range(0, int(100000 * scale), 10000):
+            conn.execute(insert(Log), [
+                {
+                    "user_id": rng.randint(1, 2000), "action": rng.choice(actions), "entity_type": "visitor",
+                    "entity_id": i, "created_at": NOW - timedelta(seconds=i * 30)
+                }
+                for i in range(offset, min(offset + 10000, int(100000 * scale)))
+            ])
+    return {"units": units, "actions": actions}
+
+
+SEEDERS = {"auth_service": seed_auth, "management_service": seed_management, "operations_service": seed_operations}
+
+
+# ========== Execução dos cenários ==========
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_scenario(client, scenario: Scenario, context: dict, requests: int, concurrency: int) -> dict:
+    total = max(1, int(requests * scenario.share))
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            method, path, kwargs = scenario.build(index, context)
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    # Aquecimento: caches, plano de consultas e pool de conexões
+    for index in range(min(10, total)):
+        method, path, kwargs = scenario.build(index, context)
+        await client.request(method, path, **kwargs)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def run_service(service: str, args) -> dict:
+    import httpx
+    import main
+    from migrations import migrator
+
+    migrator.upgrade()
+    context = SEEDERS[service](args.scale)
+    selected = [s for s in SCENARIOS[service] if not args.scenarios or s.name in args.scenarios]
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in selected:
+                results[scenario.name] = await run_scenario(client, scenario, context, args.requests, args.concurrency)
+    return results
+
+
+def child(service: str, args):
+    """Executa os cenários de um serviço (processo filho)"""
+    sys.path.insert(0, os.path.join(BACKEND, service))
+    os.chdir(os.path.join(BACKEND, service))
+    results = asyncio.run(run_service(service, args))
+    print(json.dumps(results))
+
+
+def spawn(service: str, args) -> dict:
+    path = os.path.join(tempfile.gettempdir(), f"bench_load_{service}.db")
+    if os.path.exists(path):
+        os.remove(path)
+    # Todas as requisições saem do mesmo "IP": o limite de taxa fica desligado
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", SCHEMA_MODE="migrate", RATE_LIMIT_ENABLED="false")
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", service,
+        "--requests", str(args.requests), "--concurrency", str(args.concurrency), "--scale", str(args.scale)
+    ]
+    if args.scenarios:
+        command += ["--scenarios", *args.scenarios]
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "falha")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressões em relação à linha de base (p95 maior ou vazão menor além da tolerância)"""
+    regressions = []
+    for key, result in current.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        if result["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {result['p95_ms']}ms (base {reference['p95_ms']}ms)")
+        if result["throughput"] < reference["throughput"] * (1 - tolerance):
+            regressions.append(f"{key}: vazão {result['throughput']} req/s (base {reference['throughput']} req/s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requisições simultâneas (acima de MAX_CONCURRENT_REQUESTS aguardam na fila do serviço)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplicador dos volumes de dados")
+    parser.add_argument("--services", nargs="+", default=list(SERVICES), choices=SERVICES)
+    parser.add_argument("--scenarios", nargs="+", help="Executa apenas estes cenários")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Piora aceita em relação à linha de base")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como linha de base")
+    parser.add_argument("--child", choices=SERVICES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args)
+        return
+
+    current = {}
+    for service in args.services:
+        try:
+            results = spawn(service, args)
+        except RuntimeError as exc:
+            print(f"{service}: não foi possível executar ({exc})")
+            continue
+        print(f"\n{service}")
+        print(f"  {'cenário':<18} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'erros':>6}")
+        for name, result in results.items():
+            current[f"{service}.{name}"] = result
+            print(
+                f"  {name:<18} {result['throughput']:>8.1f} {result['p50_ms']:>7.2f}ms "
+                f"{result['p95_ms']:>7.2f}ms {result['p99_ms']:>7.2f}ms {result['errors']:>6}"
+            )
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE):
+            with open(BASELINE, encoding="utf-8") as file:
+                baseline = json.load(file)
+        baseline.update(current)
+        with open(BASELINE, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"\nLinha de base gravada em {BASELINE}")
+        return
+
+    if not os.path.exists(BASELINE):
+        print("\nSem linha de base (use --save-baseline)")
+        return
+    with open(BASELINE, encoding="utf-8") as file:
+        regressions = compare(current, json.load(file), args.tolerance)
+    if regressions:
+        print(f"\nRegressões (tolerância {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\nSem regressões em relação à linha de base (tolerância {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark de conexões ociosas do canal de push (Operations Service)
+
+Abre N assinaturas ociosas no hub, como faria o endpoint /api/stream, e mede a
+memória retida por conexão e o tempo de fan-out de um aviso para todas elas.
+Não inclui o custo do socket em si (buffers do kernel e transporte do uvicorn).
+
+Uso:
+    python bench_push_connections.py --connections 10000 20000 50000
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "operations_service"))
+
+from realtime import EventHub, BROADCAST_CHANNEL, user_channel, unit_channel  # noqa: E402
+
+
+async def run(connections: int):
+    hub = EventHub(history_size=1000, queue_size=100)
+    received = 0
+    done = asyncio.Event()
+
+    async def client(index: int):
+        nonlocal received
+        channels = [BROADCAST_CHANNEL, user_channel(index), unit_channel(index % 500)]
+        async for event in hub.listen(channels, keepalive=3600):
+            received += 1
+            if received == connections:
+                done.set()
+            break
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(client(i)) for i in range(connections)]
+    await asyncio.sleep(0)
+    while hub.connections < connections:
+        await asyncio.sleep(0.01)
+    setup = time.perf_counter() - start
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    hub.publish("notice.created", {"id": 1, "title": "Aviso"}, [BROADCAST_CHANNEL])
+    await done.wait()
+    fanout = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+
+    per_connection = (after - before) / connections
+    print(
+        f"{connections:>8} conexões | setup {setup:7.3f}s | "
+        f"{per_connection:8.0f} B/conexão | total {(after - before) / 2**20:8.1f} MiB | "
+        f"fan-out {fanout * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    for connections in args.connections:
+        asyncio.run(run(connections))
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"RSS máximo do processo: {peak_rss:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
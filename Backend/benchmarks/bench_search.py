@@ -0,0 +1,94 @@
+"""
+Micro-benchmark da busca aproximada (Management Service)
+
+Indexa N prestadores/funcionários sintéticos no índice de trigramas e mede
+a latência das consultas por trecho de nome e de documento, comparando com
+uma varredura linear de substring sobre os mesmos registros.
+
+Uso:
+    python bench_search.py --records 50000 --queries 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "management_service"))
+
+from search import DirectorySearch, normalize  # noqa: E402
+
+FIRST = ["João", "José", "Maria", "Ana", "Antônio", "Francisco", "Luíza", "Conceição", "Sebastião", "Márcia"]
+SYLLABLES = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ra", "sa", "te", "vi", "xo", "zu", "ção", "lhe", "nha"]
+
+
+def surname(rng) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def cpf(number: int) -> str:
+    digits = f"{number:011d}"
+    return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+
+
+def generate(records: int):
+    rng = random.Random(42)
+    employees = []
+    for i in range(1, records + 1):
+        name = f"{rng.choice(FIRST)} {surname(rng)} {surname(rng)}"
+        employees.append(SimpleNamespace(
+            id=i, name=name, cpf=cpf(rng.randrange(10 ** 11)), role="Porteiro", is_active=True
+        ))
+    return employees
+
+
+def percentile(timings, fraction: float) -> float:
+    return sorted(timings)[int(len(timings) * fraction) - 1]
+
+
+def measure(name: str, func, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append(time.perf_counter() - start)
+    print(
+        f"{name:<10} p50 {statistics.median(timings) * 1000:7.2f} ms"
+        f" | p95 {percentile(timings, 0.95) * 1000:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    employees = generate(args.records)
+    directory = DirectorySearch()
+    start = time.perf_counter()
+    for employee in employees:
+        directory.add_employee(employee)
+    print(f"{args.records} registros indexados em {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    rng = random.Random(7)
+    queries = []
+    for _ in range(args.queries):
+        employee = rng.choice(employees)
+        queries.append(employee.name.split()[1].lower() if rng.random() < 0.5 else employee.cpf[:7])
+
+    normalized = [(normalize(employee.name), normalize(employee.cpf)) for employee in employees]
+
+    def linear(query):
+        needle = normalize(query)
+        return [row for row in normalized if needle in row[0] or needle in row[1]][:10]
+
+    measure("trigramas", lambda query: directory.search(query, 10, min_score=0.3), queries)
+    measure("linear", linear, queries)
+
+
+if __name__ == "__main__":
+    main()
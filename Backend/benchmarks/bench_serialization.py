@@ -0,0 +1,102 @@
+"""
+Micro-benchmark de serialização de listagens (Operations Service)
+
+Compara, para blocos de 10 mil visitantes:
+- legado: objetos ORM + jsonable_encoder + json.dumps (rotas sem response_model);
+- response_model: objetos ORM validados pelo schema Pydantic v2 + orjson;
+- tuplas: select() de colunas serializado direto com orjson (caminho rápido).
+
+Uso:
+    python bench_serialization.py --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "bench_serialization.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "operations_service"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import Visitor  # noqa: E402
+from schemas import VisitorResponse  # noqa: E402
+from serialization import dumps, rows_to_dicts  # noqa: E402
+
+
+def seed(rows: int):
+    Base.metadata.drop_all(bind=engine, tables=[Visitor.__table__])
+    Base.metadata.create_all(bind=engine, tables=[Visitor.__table__])
+    start = datetime(2025, 1, 1, 8)
+    with engine.begin() as conn:
+        conn.execute(insert(Visitor), [
+            {
+                "name": f"Visitante {i}",
+                "document": f"{i:011d}",
+                "unit_id": i % 300,
+                "entry_time": start + timedelta(minutes=i),
+                "exit_time": start + timedelta(minutes=i + 45),
+                "vehicle_plate": f"ABC{i % 10000:04d}",
+                "purpose": "Visita social",
+                "registered_by": 1,
+                "created_at": start + timedelta(minutes=i)
+            }
+            for i in range(rows)
+        ])
+
+
+def legacy(db) -> bytes:
+    return json.dumps(jsonable_encoder(db.query(Visitor).all())).encode()
+
+
+adapter = TypeAdapter(List[VisitorResponse])
+
+
+def response_model(db) -> bytes:
+    validated = adapter.validate_python(db.query(Visitor).all(), from_attributes=True)
+    return dumps(adapter.dump_python(validated, mode="json"))
+
+
+def tuples(db) -> bytes:
+    result = db.execute(select(Visitor.__table__))
+    return dumps(rows_to_dicts(list(result.keys()), result))
+
+
+def measure(name: str, func, repeat: int, rows: int):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            size = len(func(db))
+            timings.append(time.perf_counter() - start)
+    best = min(timings)
+    per_10k = best * 10000 / rows
+    print(f"{name:<16} melhor {best * 1000:8.1f} ms | {per_10k * 1000:8.1f} ms/10k linhas | {size / 2**20:6.2f} MiB")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    baseline = measure("legado", legacy, args.repeat, args.rows)
+    for name, func in (("response_model", response_model), ("tuplas", tuples)):
+        best = measure(name, func, args.repeat, args.rows)
+        print(f"{'':<16} {baseline / best:5.1f}x mais rápido que o legado")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
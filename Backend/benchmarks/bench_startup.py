@@ -0,0 +1,92 @@
+"""
+Benchmark de inicialização dos serviços
+
+Para cada serviço, executa processos novos com o banco já migrado e mede:
+- tempo de importação do main.py;
+- tempo até a primeira resposta (importação + eventos de startup + GET /health).
+
+Modos comparados:
+- legacy: create_all na importação, como antes das migrações versionadas;
+- migrate: SCHEMA_MODE=migrate com o schema em dia (uma consulta);
+- skip: SCHEMA_MODE=skip, sem nenhum acesso ao schema.
+
+Uso:
+    python bench_startup.py --runs 5 --services management_service operations_service
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SERVICES = ("auth_service", "management_service", "operations_service")
+MODES = ("legacy", "migrate", "skip")
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+if sys.argv[1] == "legacy":
+    from database import Base, engine
+    import models
+    Base.metadata.create_all(bind=engine)
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+    ready = time.perf_counter()
+print(json.dumps({"import": imported - started, "first_request": ready - started}))
+"""
+
+
+def run(service: str, mode: str, database_url: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, SCHEMA_MODE="skip" if mode == "legacy" else mode)
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, mode],
+        cwd=os.path.join(BACKEND, service), env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def migrate(service: str, database_url: str):
+    subprocess.run(
+        [sys.executable, "migrations.py", "upgrade"],
+        cwd=os.path.join(BACKEND, service), env=dict(os.environ, DATABASE_URL=database_url),
+        check=True, capture_output=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--services", nargs="+", default=list(SERVICES), choices=SERVICES)
+    args = parser.parse_args()
+
+    for service in args.services:
+        path = os.path.join(tempfile.gettempdir(), f"bench_startup_{service}.db")
+        if os.path.exists(path):
+            os.remove(path)
+        database_url = f"sqlite:///{path}"
+        try:
+            migrate(service, database_url)
+            run(service, "skip", database_url)  # aquece o cache de bytecode
+        except (RuntimeError, subprocess.CalledProcessError) as exc:
+            print(f"{service}: não foi possível iniciar ({exc})")
+            continue
+
+        print(f"{service} ({args.runs} execuções, mediana)")
+        print(f"  {'modo':<8} {'importação':>12} {'1ª resposta':>12}")
+        for mode in MODES:
+            samples = [run(service, mode, database_url) for _ in range(args.runs)]
+            imported = statistics.median(sample["import"] for sample in samples) * 1000
+            ready = statistics.median(sample["first_request"] for sample in samples) * 1000
+            print(f"  {mode:<8} {imported:>10.1f}ms {ready:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
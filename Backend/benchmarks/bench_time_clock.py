@@ -0,0 +1,118 @@
+"""
+Benchmark do ponto eletrônico (Management Service)
+
+Gera um ano de marcações (quatro por dia útil por funcionário, com faltas e
+turnos noturnos ocasionais) e mede:
+- ingestão em lotes (marcações/s), incluindo o reenvio de um lote;
+- consolidação inicial do ano inteiro e consolidação incremental de um dia;
+- relatório mensal lido da consolidação.
+
+Uso:
+    python bench_time_clock.py --employees 100 --days 365 --batch 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "bench_time_clock.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "management_service"))
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from models import Employee, TimeClockDaily  # noqa: E402
+import time_clock  # noqa: E402
+
+START = date(2025, 1, 1)
+
+
+def seed_employees(employees: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Employee), [
+            {"id": i, "name": f"Funcionário {i}", "cpf": f"{i:011d}", "role": "Porteiro", "hire_date": START}
+            for i in range(1, employees + 1)
+        ])
+
+
+def day_punches(rng: random.Random, employee_id: int, day: date):
+    if day.weekday() >= 5 or rng.random() < 0.03:
+        return []
+    if rng.random() < 0.05:
+        start = datetime.combine(day, datetime.min.time()) + timedelta(hours=22)
+        return [(employee_id, start, "in"), (employee_id, start + timedelta(hours=9), "out")]
+    base = datetime.combine(day, datetime.min.time()) + timedelta(hours=8, minutes=rng.randint(-15, 15))
+    lunch = base + timedelta(hours=4)
+    back = lunch + timedelta(hours=1)
+    leave = back + timedelta(hours=4, minutes=rng.randint(-10, 90))
+    return [(employee_id, base, "in"), (employee_id, lunch, "out"), (employee_id, back, "in"), (employee_id, leave, "out")]
+
+
+def generate(employees: int, days: int):
+    rng = random.Random(42)
+    punches = []
+    for offset in range(days):
+        day = START + timedelta(days=offset)
+        for employee_id in range(1, employees + 1):
+            punches.extend(day_punches(rng, employee_id, day))
+    punches.sort(key=lambda punch: punch[1])
+    return [
+        {"employee_id": employee_id, "punched_at": moment, "kind": kind, "terminal_id": "T1"}
+        for employee_id, moment, kind in punches
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed_employees(args.employees)
+    punches = generate(args.employees, args.days)
+    last_day = START + timedelta(days=args.days - 1)
+    history = [punch for punch in punches if punch["punched_at"].date() < last_day]
+    today = [punch for punch in punches if punch["punched_at"].date() >= last_day]
+
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        for offset in range(0, len(history), args.batch):
+            time_clock.ingest(db, history[offset:offset + args.batch])
+        elapsed = time.perf_counter() - start
+        print(f"ingestão: {len(history)} marcações em {elapsed:.2f} s ({len(history) / elapsed:,.0f}/s)")
+
+        batch = history[:args.batch]
+        start = time.perf_counter()
+        inserted, _ = time_clock.ingest(db, batch)
+        print(f"reenvio de {len(batch)} marcações: {inserted} gravadas em {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        start = time.perf_counter()
+        result = time_clock.rollup(db, until=last_day - timedelta(days=1))
+        print(f"consolidação inicial: {result['rows']} dias em {time.perf_counter() - start:.2f} s")
+
+        time_clock.ingest(db, today)
+        start = time.perf_counter()
+        result = time_clock.rollup(db, until=last_day)
+        print(f"consolidação incremental ({result['punches']} marcações novas): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        start = time.perf_counter()
+        result = time_clock.rollup(db, until=last_day)
+        print(f"consolidação repetida (idempotente, {result['days']} dias): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        rows = db.scalar(select(func.count(TimeClockDaily.id)))
+        month = START.strftime("%Y-%m")
+        start = time.perf_counter()
+        report = time_clock.monthly_report(db, month)
+        print(f"relatório mensal ({len(report)} funcionários, {rows} linhas consolidadas): {(time.perf_counter() - start) * 1000:.1f} ms")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark de depreciação do patrimônio (Management Service)
+
+Compara, para N bens, o cálculo do valor contábil bem a bem em Python puro
+com a passada vetorizada do motor de valoração (NumPy), nos dois métodos.
+
+Uso:
+    python bench_valuation.py --assets 100000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "management_service"))
+
+from config import settings  # noqa: E402
+from valuation import METHODS, STRAIGHT_LINE, Inventory, book_values  # noqa: E402
+
+CATEGORIES = list(settings.DEPRECIATION_USEFUL_LIFE_YEARS) + ["Outros"]
+LOCATIONS = ["Salão de festas", "Academia", "Portaria", "Garagem", "Área de serviço", None]
+
+
+def generate(assets: int):
+    rng = random.Random(42)
+    start = date(2005, 1, 1)
+    return [
+        (
+            i, f"Bem {i}", rng.choice(CATEGORIES), rng.choice(LOCATIONS),
+            start + timedelta(days=rng.randrange(7300)), round(rng.uniform(100, 50000), 2)
+        )
+        for i in range(1, assets + 1)
+    ]
+
+
+def per_row(rows, method: str, as_of: date) -> float:
+    total = 0.0
+    for _, _, category, _, acquired, cost in rows:
+        age = (as_of - acquired).days / 365.25
+        if age < 0:
+            continue
+        life = settings.DEPRECIATION_USEFUL_LIFE_YEARS.get(category, settings.DEPRECIATION_DEFAULT_USEFUL_LIFE_YEARS)
+        salvage = cost * settings.DEPRECIATION_SALVAGE_RATE
+        if method == STRAIGHT_LINE:
+            value = cost - (cost - salvage) * min(age / life, 1.0)
+        elif age >= life:
+            value = salvage
+        else:
+            rate = min(settings.DEPRECIATION_DECLINING_FACTOR / life, 1.0)
+            value = max(cost * (1.0 - rate) ** age, salvage)
+        total += round(value, 2)
+    return total
+
+
+def vectorized(inventory: Inventory, method: str, as_of: date) -> float:
+    values, owned = book_values(inventory, method, as_of)
+    return float(values[owned].sum())
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--assets", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = generate(args.assets)
+    as_of = date(2025, 6, 30)
+    load = best_of(lambda: Inventory(rows), 1)
+    inventory = Inventory(rows)
+    print(f"{args.assets} bens | carga do inventário em arrays: {load * 1000:.1f} ms")
+
+    for method in METHODS:
+        expected = per_row(rows, method, as_of)
+        got = vectorized(inventory, method, as_of)
+        assert abs(expected - got) < 0.01 * args.assets, (expected, got)
+        python_time = best_of(lambda: per_row(rows, method, as_of), args.repeat)
+        numpy_time = best_of(lambda: vectorized(inventory, method, as_of), args.repeat)
+        print(
+            f"{method:<18} python {python_time * 1000:8.1f} ms | numpy {numpy_time * 1000:7.1f} ms"
+            f" | {python_time / numpy_time:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark de vazão por número de workers (modo de produção)
+
+Sobe o serviço com gunicorn_conf.py (gunicorn + workers uvicorn, app
+pré-carregado) para cada número de workers e mede vazão e latências
+p50/p95/p99 de uma carga HTTP real, gerada por processos clientes
+separados, sobre um SQLite migrado e populado com os mesmos volumes e
+cenários do bench_load.py. O Operations Service roda sempre com um worker
+(hub de push em processo) e não entra na comparação.
+
+Os clientes disputam CPU com os workers: em máquinas pequenas, a vazão com
+mais workers que CPUs livres para eles tende a cair. O limite de taxa fica
+desligado (todas as requisições vêm do mesmo IP); o de concorrência segue
+ativo.
+
+Uso:
+    python bench_workers.py --service auth_service --duration 10
+    python bench_workers.py --workers 1 2 4 8 --clients 4 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_load import BACKEND, SCENARIOS, percentile  # noqa: E402
+
+SEED = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import bench_load
+from migrations import migrator
+migrator.upgrade()
+print(json.dumps(bench_load.SEEDERS[sys.argv[2]](float(sys.argv[3]))))
+"""
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers() -> List[int]:
+    cpus = available_cpus()
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(service: str, database_url: str, scale: float) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, SCHEMA_MODE="migrate")
+    result = subprocess.run(
+        [sys.executable, "-c", SEED, os.path.dirname(os.path.abspath(__file__)), service, str(scale)],
+        cwd=os.path.join(BACKEND, service), env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def start_server(service: str, database_url: str, workers: int, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ, DATABASE_URL=database_url, SCHEMA_MODE="skip", WEB_CONCURRENCY=str(workers),
+        API_HOST="127.0.0.1", API_PORT=str(port), RATE_LIMIT_ENABLED="false"
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "main:app"],
+        cwd=os.path.join(BACKEND, service), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    import httpx
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn terminou com código {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("o serviço não respondeu em 60 s")
+
+
+def stop_server(server: subprocess.Popen):
+    # SIGTERM: desligamento gracioso, aguardando as requisições em andamento
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+async def _drive(base_url: str, service: str, context: dict, concurrency: int, duration: float, offset: int):
+    import httpx
+
+    scenarios = [scenario for scenario in SCENARIOS[service] if scenario.share == 1.0]
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            scenario = scenarios[index % len(scenarios)]
+            method, path, kwargs = scenario.build(index, context)
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            index += concurrency
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(offset + i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(arguments) -> tuple:
+    """Processo gerador de carga: devolve latências e erros"""
+    return asyncio.run(_drive(*arguments))
+
+
+def measure(service: str, context: dict, port: int, args) -> dict:
+    base_url = f"http://127.0.0.1:{port}"
+    jobs = [
+        (base_url, service, context, args.concurrency, args.duration, client * args.concurrency)
+        for client in range(args.clients)
+    ]
+    with Pool(args.clients) as pool:
+        results = pool.map(client_process, jobs)
+    latencies = sorted(latency for result in results for latency in result[0])
+    return {
+        "requests": len(latencies),
+        "errors": sum(result[1] for result in results),
+        "throughput": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--service", default="management_service", choices=sorted(set(SCENARIOS) - {"operations_service"}))
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="Números de workers (padrão: 1, 2, 4... até as CPUs)")
+    parser.add_argument("--clients", type=int, default=max(1, available_cpus() // 2), help="Processos geradores de carga")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requisições simultâneas por processo cliente")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga por número de workers")
+    parser.add_argument("--scale", type=float, default=0.2, help="Multiplicador dos volumes de dados")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"bench_workers_{args.service}.db")
+    if os.path.exists(path):
+        os.remove(path)
+    database_url = f"sqlite:///{path}"
+    context = seed(args.service, database_url, args.scale)
+
+    print(f"{args.service}: {available_cpus()} CPUs, {args.clients} clientes x {args.concurrency} conexões, {args.duration:g}s")
+    print(f"  {'workers':>7} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'erros':>6} {'escala':>7}")
+    base = None
+    for workers in args.workers or default_workers():
+        port = free_port()
+        server = start_server(args.service, database_url, workers, port)
+        try:
+            result = measure(args.service, context, port, args)
+        finally:
+            stop_server(server)
+        base = base or result["throughput"] or 1
+        print(
+            f"  {workers:>7} {result['throughput']:>9.1f} {result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms "
+            f"{result['p99_ms']:>7.2f}ms {result['errors']:>6} {result['throughput'] / base:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Chamadas concorrentes aos serviços de origem
+
+Cada seção do dashboard é uma chamada GET independente, feita pelo mesmo
+httpx.AsyncClient (pool keep-alive compartilhado pelo processo), com
+timeout próprio. Uma falha (timeout, conexão recusada, status >= 400,
+corpo inválido) afeta apenas a sua seção: o resultado traz o erro e as
+demais seções seguem normalmente.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+
+# Headers repassados aos serviços de origem (mais o X-Forwarded-For, com o IP do cliente)
+FORWARDED_HEADERS = ("authorization", "x-condominium-id", "accept-language")
+
+
+class Section(NamedTuple):
+    """Uma parte do dashboard e a chamada que a produz"""
+    name: str
+    service: str
+    path: str
+    params: Callable[[], dict]
+    timeout: Optional[float] = None
+
+
+class SectionResult(NamedTuple):
+    name: str
+    data: object
+    error: Optional[str]
+    elapsed_ms: float
+
+
+def forwarded(headers, client_ip: Optional[str] = None) -> Dict[str, str]:
+    """Headers repassados, com o IP do cliente acrescentado ao X-Forwarded-For"""
+    result = {name: headers[name] for name in FORWARDED_HEADERS if name in headers}
+    if client_ip:
+        chain = headers.get("x-forwarded-for")
+        result["x-forwarded-for"] = f"{chain}, {client_ip}" if chain else client_ip
+    return result
+
+
+async def fetch(
+    client: httpx.AsyncClient,
+    section: Section,
+    base_urls: Dict[str, str],
+    headers: Dict[str, str],
+    default_timeout: float
+) -> SectionResult:
+    started = time.perf_counter()
+    timeout = section.timeout or default_timeout
+    error = None
+    data = None
+    try:
+        response = await client.get(
+            base_urls[section.service] + section.path,
+            params=section.params(),
+            headers=headers,
+            timeout=timeout
+        )
+        if response.status_code >= 400:
+            error = f"{section.service} respondeu {response.status_code}"
+        else:
+            data = response.json()
+    except httpx.TimeoutException:
+        error = f"{section.service} não respondeu em {timeout:g}s"
+    except httpx.HTTPError as exc:
+        error = f"{section.service} indisponível: {type(exc).__name__}"
+    except ValueError:
+        error = f"{section.service} devolveu JSON inválido"
+    return SectionResult(section.name, data, error, round((time.perf_counter() - started) * 1000, 1))
+
+
+async def gather_sections(
+    client: httpx.AsyncClient,
+    sections: List[Section],
+    base_urls: Dict[str, str],
+    headers: Dict[str, str],
+    default_timeout: float
+) -> List[SectionResult]:
+    """Todas as seções em paralelo; o tempo total é o da chamada mais lenta"""
+    return await asyncio.gather(*(fetch(client, section, base_urls, headers, default_timeout) for section in sections))
@@ -0,0 +1,57 @@
+"""
+Configurações do Gateway Service (backend-for-frontend)
+"""
+from pydantic_settings import BaseSettings
+from typing import List
+
+
+class Settings(BaseSettings):
+    """Configurações da aplicação"""
+
+    # Serviços de origem
+    AUTH_SERVICE_URL: str = "http://localhost:8001"
+    MANAGEMENT_SERVICE_URL: str = "http://localhost:8002"
+    OPERATIONS_SERVICE_URL: str = "http://localhost:8003"
+
+    # Pool HTTP compartilhado (keep-alive) e timeouts por chamada, em segundos
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    UPSTREAM_CONNECT_TIMEOUT: float = 1.0
+    UPSTREAM_TIMEOUT: float = 2.0
+
+    # Dashboard
+    DASHBOARD_LIST_LIMIT: int = 100
+    # Orçamentos aguardando aprovação (status inicial no Operations Service)
+    DASHBOARD_PENDING_BUDGET_STATUS: str = "draft"
+
+    # JWT (mesma chave do Auth Service: o token é validado uma única vez, aqui)
+    SECRET_KEY: str = "your-secret-key-change-in-production"
+    ALGORITHM: str = "HS256"
+
+    # Produção (gunicorn -c gunicorn_conf.py main:app)
+    # Workers (0 = um por CPU disponível)
+    WEB_CONCURRENCY: int = 0
+    WORKER_MAX_REQUESTS: int = 10000
+    WORKER_MAX_REQUESTS_JITTER: int = 1000
+    WORKER_GRACEFUL_TIMEOUT: int = 30
+    WORKER_TIMEOUT: int = 60
+    KEEPALIVE_SECONDS: int = 5
+    
+    # API
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8004
+    API_RELOAD: bool = True
+
+    # CORS
+    ALLOWED_ORIGINS: List[str] = [
+        "http://localhost:3000",
+        "http://localhost:5173",
+        "http://localhost:8000"
+    ]
+
+    class Config:
+        env_file = ".env"
+        case_sensitive = True
+
+
+settings = Settings()
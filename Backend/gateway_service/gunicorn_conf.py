@@ -0,0 +1,51 @@
+"""
+Execução em produção: gunicorn com workers uvicorn
+
+    gunicorn -c gunicorn_conf.py main:app
+
+- Workers: WEB_CONCURRENCY, ou um por CPU disponível (afinidade do processo
+  e cota de CPU do container, cgroup v2).
+- O app é importado no processo mestre antes do fork (preload): os workers
+  compartilham o código já carregado e sobem mais rápido. O cliente HTTP
+  dos serviços de origem é criado em cada worker, na inicialização.
+- Reciclagem: cada worker é substituído após WORKER_MAX_REQUESTS
+  requisições (mais um jitter aleatório, para não reiniciarem juntos).
+- Reinício gracioso: SIGTERM/SIGQUIT no mestre param de aceitar conexões e
+  aguardam as requisições em andamento por até WORKER_GRACEFUL_TIMEOUT
+  segundos. Com preload, SIGHUP recria os workers com o código já
+  carregado; para publicar código novo sem derrubar requisições, envie
+  SIGUSR2 (sobe um novo mestre com o código atual) e depois SIGTERM ao
+  mestre antigo.
+"""
+import math
+import os
+
+from config import settings
+
+
+def available_cpus() -> int:
+    """CPUs que o processo pode usar (afinidade e cota do cgroup)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+workers = settings.WEB_CONCURRENCY or available_cpus()
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"{settings.API_HOST}:{settings.API_PORT}"
+preload_app = True
+
+max_requests = settings.WORKER_MAX_REQUESTS
+max_requests_jitter = settings.WORKER_MAX_REQUESTS_JITTER
+graceful_timeout = settings.WORKER_GRACEFUL_TIMEOUT
+timeout = settings.WORKER_TIMEOUT
+keepalive = settings.KEEPALIVE_SECONDS
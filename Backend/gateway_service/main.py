@@ -0,0 +1,134 @@
+"""
+Gateway Service - Backend-for-frontend do dashboard
+Sistema de Condomínio
+
+Compõe o dashboard em uma única chamada: valida o token uma vez e consulta
+os serviços de origem em paralelo, por um pool HTTP keep-alive
+compartilhado.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import List
+
+import httpx
+from fastapi import FastAPI, Depends, HTTPException, Request, status
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+
+from aggregator import Section, forwarded, gather_sections
+from config import settings
+
+# Criar aplicação FastAPI
+app = FastAPI(
+    title="Gateway Service",
+    description="Backend-for-frontend - Sistema de Condomínio",
+    version="1.0.0",
+    docs_url="/api/docs",
+    redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse
+)
+
+# Configurar CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.ALLOWED_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.AUTH_SERVICE_URL}/api/auth/login")
+
+BASE_URLS = {
+    "auth": settings.AUTH_SERVICE_URL,
+    "management": settings.MANAGEMENT_SERVICE_URL,
+    "operations": settings.OPERATIONS_SERVICE_URL,
+}
+
+
+@app.on_event("startup")
+async def open_upstream_pool():
+    """Cliente HTTP único do processo: conexões reaproveitadas entre requisições"""
+    app.state.upstream = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        timeout=httpx.Timeout(settings.UPSTREAM_TIMEOUT, connect=settings.UPSTREAM_CONNECT_TIMEOUT)
+    )
+
+
+@app.on_event("shutdown")
+async def close_upstream_pool():
+    await app.state.upstream.aclose()
+
+
+def token_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    """Valida o JWT localmente (sem ida ao Auth Service)"""
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        claims = {}
+    if claims.get("user_id") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não foi possível validar as credenciais",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims
+
+
+def dashboard_sections() -> List[Section]:
+    limit = settings.DASHBOARD_LIST_LIMIT
+
+    def today() -> dict:
+        start = datetime.combine(date.today(), time.min)
+        return {"start_from": start.isoformat(), "start_to": (start + timedelta(days=1)).isoformat(), "limit": limit}
+
+    return [
+        Section("user", "auth", "/api/auth/me", dict),
+        Section("counters", "operations", "/api/dashboard/counters", dict),
+        Section("resident_counters", "auth", "/api/dashboard/counters", dict),
+        Section("bookings_today", "operations", "/api/schedulings", today),
+        Section("present_visitors", "operations", "/api/visitors", lambda: {"present": "true", "limit": limit}),
+        Section("active_notices", "operations", "/api/notice-board", dict),
+        Section(
+            "pending_budgets", "operations", "/api/budgets",
+            lambda: {"status": settings.DASHBOARD_PENDING_BUDGET_STATUS, "limit": limit}
+        ),
+    ]
+
+
+# ========== Rotas do Dashboard ==========
+
+@app.get("/api/dashboard", tags=["Dashboard"])
+async def get_dashboard(request: Request, claims: dict = Depends(token_claims)):
+    """
+    Dashboard composto: usuário, contadores, reservas de hoje, visitantes
+    presentes, avisos ativos e orçamentos pendentes. Seções que falharem vêm como null,
+    com o motivo em `errors`; só quando todas falham a resposta é 502.
+    """
+    client_ip = request.client.host if request.client else None
+    results = await gather_sections(
+        app.state.upstream, dashboard_sections(), BASE_URLS, forwarded(request.headers, client_ip), settings.UPSTREAM_TIMEOUT
+    )
+    payload = {"generated_at": datetime.now().isoformat(timespec="seconds")}
+    payload.update((result.name, result.data) for result in results)
+    payload["errors"] = {result.name: result.error for result in results if result.error}
+    payload["timings_ms"] = {result.name: result.elapsed_ms for result in results}
+    status_code = 502 if len(payload["errors"]) == len(results) else 200
+    return ORJSONResponse(payload, status_code=status_code)
+
+
+# ========== Health Check ==========
+
+@app.get("/health", tags=["Sistema"])
+async def health_check():
+    """Verificação de saúde do serviço"""
+    return {"status": "healthy", "service": "gateway_service"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("main:app", host=settings.API_HOST, port=settings.API_PORT, reload=settings.API_RELOAD)
@@ -0,0 +1,212 @@
+"""
+Auditoria física do patrimônio (leitura de etiquetas de código de barras/QR)
+
+Cada sessão mantém em memória um índice serial -> (bem, local esperado) e os
+conjuntos de seriais esperados e lidos por local. Um lote de leituras é
+conciliado com operações de conjunto:
+
+- found: lido no local esperado;
+- misplaced: bem cadastrado lido em outro local;
+- unknown: serial sem bem ativo cadastrado;
+- missing: esperado e não lido em lugar nenhum (gravado ao encerrar).
+
+As leituras são gravadas com INSERT IGNORE sobre (audit_id, serial_number),
+de modo que o banco descarta duplicatas vindas de outros workers. O relatório
+é sempre recalculado a partir do banco.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Patrimony, PatrimonyAudit, PatrimonyAuditItem
+from search import normalize
+
+FOUND = "found"
+MISPLACED = "misplaced"
+UNKNOWN = "unknown"
+MISSING = "missing"
+
+
+def normalize_serial(serial: str) -> str:
+    return serial.strip().upper()
+
+
+class AuditIndex:
+    """Índice em memória de uma sessão de auditoria"""
+
+    def __init__(self, assets: Iterable[Tuple[int, str, Optional[str]]]):
+        self.assets: Dict[str, Tuple[int, Optional[str]]] = {}
+        self.expected: Dict[str, Set[str]] = {}
+        self.labels: Dict[str, Optional[str]] = {}
+        for patrimony_id, serial, location in assets:
+            serial = normalize_serial(serial)
+            if not serial or serial in self.assets:
+                continue
+            self.assets[serial] = (patrimony_id, location)
+            key = self._key(location)
+            self.expected.setdefault(key, set()).add(serial)
+        self.seen: Set[str] = set()
+        self.found: Dict[str, Set[str]] = {}
+        self.misplaced: Dict[str, Set[str]] = {}
+        self.unknown: Dict[str, Set[str]] = {}
+
+    def _key(self, location: Optional[str]) -> str:
+        key = normalize(location)
+        self.labels.setdefault(key, location)
+        return key
+
+    def scan(self, location: str, serials: Iterable[str]) -> Dict[str, Set[str]]:
+        """Concilia um lote de leituras de um local; ignora seriais já lidos"""
+        key = self._key(location)
+        batch = {serial for serial in map(normalize_serial, serials) if serial}
+        new = batch - self.seen
+        found = new & self.expected.get(key, set())
+        misplaced = (new - found) & self.assets.keys()
+        unknown = new - found - misplaced
+
+        self.seen |= new
+        self.found.setdefault(key, set()).update(found)
+        self.misplaced.setdefault(key, set()).update(misplaced)
+        self.unknown.setdefault(key, set()).update(unknown)
+        return {FOUND: found, MISPLACED: misplaced, UNKNOWN: unknown, "duplicates": batch - new}
+
+    def missing(self) -> Set[str]:
+        """Seriais esperados que não foram lidos em nenhum local"""
+        return self.assets.keys() - self.seen
+
+    def report(self) -> List[dict]:
+        """Resumo por local"""
+        keys = set(self.expected) | set(self.found) | set(self.misplaced) | set(self.unknown)
+        rows = []
+        for key in sorted(keys):
+            expected = self.expected.get(key, set())
+            rows.append({
+                "location": self.labels.get(key),
+                "expected": len(expected),
+                "found": len(self.found.get(key, ())),
+                "missing": len(expected - self.seen),
+                "misplaced": len(self.misplaced.get(key, ())),
+                "unknown": len(self.unknown.get(key, ()))
+            })
+        return rows
+
+
+def _items(db: Session, audit_id: int) -> List:
+    return db.execute(
+        select(
+            PatrimonyAuditItem.serial_number, PatrimonyAuditItem.patrimony_id, PatrimonyAuditItem.location,
+            PatrimonyAuditItem.expected_location, PatrimonyAuditItem.result
+        ).where(PatrimonyAuditItem.audit_id == audit_id)
+    ).all()
+
+
+def load_index(db: Session, audit: PatrimonyAudit) -> AuditIndex:
+    """
+    Monta o índice de uma sessão: para sessões abertas, a partir do
+    patrimônio ativo atual; para encerradas, do que foi gravado nos itens.
+    Em seguida reaplica as leituras já gravadas.
+    """
+    items = _items(db, audit.id)
+    if audit.status == "open":
+        assets = db.execute(
+            select(Patrimony.id, Patrimony.serial_number, Patrimony.location)
+            .where(Patrimony.is_active == True, Patrimony.serial_number != None)
+            .order_by(Patrimony.id)
+        ).all()
+    else:
+        assets = [
+            (item.patrimony_id, item.serial_number, item.expected_location)
+            for item in items if item.patrimony_id is not None
+        ]
+    index = AuditIndex(assets)
+    by_location: Dict[Optional[str], List[str]] = {}
+    for item in items:
+        if item.result != MISSING:
+            by_location.setdefault(item.location, []).append(item.serial_number)
+    for location, serials in by_location.items():
+        index.scan(location, serials)
+    return index
+
+
+def _insert_ignore():
+    """INSERT que descarta violações de (audit_id, serial_number)"""
+    return (
+        insert(PatrimonyAuditItem)
+        .prefix_with("OR IGNORE", dialect="sqlite")
+        .prefix_with("IGNORE", dialect="mysql")
+    )
+
+
+class AuditRegistry:
+    """Índices das sessões abertas, mantidos em memória (LRU)"""
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._indexes: "OrderedDict[int, AuditIndex]" = OrderedDict()
+
+    def get(self, db: Session, audit: PatrimonyAudit) -> AuditIndex:
+        index = self._indexes.get(audit.id)
+        if index is None:
+            index = self._indexes[audit.id] = load_index(db, audit)
+            while len(self._indexes) > self._capacity:
+                self._indexes.popitem(last=False)
+        else:
+            self._indexes.move_to_end(audit.id)
+        return index
+
+    def drop(self, audit_id: int):
+        self._indexes.pop(audit_id, None)
+
+    def scan(self, db: Session, audit: PatrimonyAudit, location: str, serials: List[str], device_id: Optional[str]) -> dict:
+        """Concilia e grava um lote de leituras"""
+        index = self.get(db, audit)
+        result = index.scan(location, serials)
+        now = datetime.utcnow()
+        rows = []
+        for outcome in (FOUND, MISPLACED, UNKNOWN):
+            for serial in result[outcome]:
+                patrimony_id, expected_location = index.assets.get(serial, (None, None))
+                rows.append({
+                    "audit_id": audit.id, "serial_number": serial, "patrimony_id": patrimony_id,
+                    "location": location, "expected_location": expected_location,
+                    "result": outcome, "device_id": device_id, "scanned_at": now
+                })
+        if rows:
+            db.execute(_insert_ignore(), rows)
+            db.commit()
+        return {
+            "received": len(serials),
+            "duplicates": len(result["duplicates"]),
+            "found": len(result[FOUND]),
+            "misplaced": [
+                {"serial_number": serial, "expected_location": index.assets[serial][1]}
+                for serial in sorted(result[MISPLACED])
+            ],
+            "unknown": sorted(result[UNKNOWN])
+        }
+
+    def close(self, db: Session, audit: PatrimonyAudit) -> AuditIndex:
+        """Encerra a sessão gravando os bens não encontrados"""
+        index = load_index(db, audit)
+        rows = [
+            {
+                "audit_id": audit.id, "serial_number": serial, "patrimony_id": index.assets[serial][0],
+                "location": None, "expected_location": index.assets[serial][1], "result": MISSING
+            }
+            for serial in sorted(index.missing())
+        ]
+        if rows:
+            db.execute(_insert_ignore(), rows)
+        audit.status = "closed"
+        audit.closed_at = datetime.utcnow()
+        db.commit()
+        self.drop(audit.id)
+        return index
+
+
+# Índices compartilhados pelo processo
+audits = AuditRegistry(settings.AUDIT_INDEX_CACHE_SIZE)
@@ -0,0 +1,185 @@
+"""
+Compressão de respostas (gzip/brotli) e GET condicional (ETag / 304)
+
+CompressionMiddleware (ASGI puro):
+- respostas GET/HEAD 200 completas ganham um ETag fraco (hash BLAKE2b do
+  corpo) quando a rota não definiu um; If-None-Match igual devolve 304 sem
+  corpo. Rotas com cache ou versão (response_cache) já trazem o ETag e
+  respondem 304 antes de executar;
+- corpos a partir de COMPRESSION_MIN_SIZE bytes e de tipos textuais são
+  comprimidos com brotli (se o pacote estiver instalado) ou gzip, conforme o
+  Accept-Encoding; respostas em streaming são comprimidas bloco a bloco
+  (exceto text/event-stream, que precisa chegar sem atraso).
+
+O ETag é fraco (W/) porque identifica o conteúdo, não a codificação.
+"""
+import hashlib
+import zlib
+from typing import Optional
+
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só gzip é negociado
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/xml", "application/javascript",
+    "text/plain", "text/csv", "text/html", "text/xml", "text/css"
+)
+CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+def etag_for(body: bytes) -> str:
+    return 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca (RFC 9110): ignora o prefixo W/ dos dois lados"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Melhor codificação aceita pelo cliente: br > gzip (q=0 recusa)"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Compressor incremental com a mesma interface para gzip e brotli"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            # wbits 16 + MAX_WBITS: formato gzip (cabeçalho e CRC)
+            self._zlib = zlib.compressobj(settings.COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self._brotli is not None:
+            output = self._brotli.process(data)
+            return output + (self._brotli.finish() if final else self._brotli.flush())
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+def _compressible(headers) -> bool:
+    if _header(headers, b"content-encoding") is not None:
+        return False
+    content_type = (_header(headers, b"content-type") or b"").decode("latin-1").split(";")[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """Middleware ASGI de ETag/304 e compressão negociada"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope.get("headers", ()))
+        encoding = choose_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        conditional = settings.ETAGS_ENABLED and scope["method"] in CONDITIONAL_METHODS
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+        start = None
+        compressor = None
+
+        async def send_wrapper(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+                buffered = (conditional and message["status"] == 200) or (encoding and _compressible(headers))
+                if not buffered or content_type.startswith("text/event-stream"):
+                    # Nada a fazer (ou SSE, que precisa dos headers imediatamente): repassa sem tocar
+                    await send(message)
+                    return
+                # Adia o início até conhecer o corpo (tamanho, ETag)
+                start = message
+                return
+            if message["type"] == "http.response.body" and compressor is not None:
+                more_body = message.get("more_body", False)
+                await send({**message, "body": compressor.compress(message.get("body", b""), final=not more_body)})
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            headers = list(start.get("headers", []))
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if more_body:
+                # Streaming: sem ETag; comprime bloco a bloco quando o tipo permite
+                if encoding and _compressible(headers):
+                    compressor = _Compressor(encoding)
+                    headers = [(k, v) for k, v in headers if k != b"content-length"]
+                    headers += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+                    body = compressor.compress(body, final=False)
+                await send({**start, "headers": headers})
+                start = None
+                await send({**message, "body": body})
+                return
+
+            status = start["status"]
+            if conditional and status == 200:
+                etag = _header(headers, b"etag")
+                if etag is None:
+                    etag = etag_for(body).encode()
+                    headers.append((b"etag", etag))
+                if etag_matches(if_none_match, etag.decode("latin-1")):
+                    headers = [(k, v) for k, v in headers if k not in (b"content-length", b"content-type")]
+                    await send({**start, "status": 304, "headers": headers})
+                    await send({"type": "http.response.body", "body": b""})
+                    return
+
+            if encoding and len(body) >= settings.COMPRESSION_MIN_SIZE and _compressible(headers):
+                body = _Compressor(encoding).compress(body, final=True)
+                headers = [(k, v) for k, v in headers if k != b"content-length"]
+                headers += [
+                    (b"content-length", str(len(body)).encode()),
+                    (b"content-encoding", encoding.encode()),
+                    (b"vary", b"Accept-Encoding")
+                ]
+            await send({**start, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
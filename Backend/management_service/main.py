@@ -2,19 +2,47 @@
 Management Service - Microserviço de Gerenciamento
 Sistema de Condomínio
 """
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy import insert, select, update
 from sqlalchemy.orm import Session
 from typing import List
-from pydantic import BaseModel, Field
 from datetime import date, datetime
+from xml.etree.ElementTree import ParseError
+import zipfile
 
 from config import settings
-from database import get_db, engine, Base
-from models import Provider, Employee, EmployeeHistory, Patrimony, PatrimonyHistory
-
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
+from database import get_db, engine, SessionLocal
+from models import (
+    Provider, Employee, EmployeeHistory, Patrimony, PatrimonyHistory, PatrimonyAudit, PatrimonyAuditItem,
+    TimeClockDaily
+)
+from schemas import (
+    ProviderCreate, ProviderResponse,
+    EmployeeCreate, EmployeeResponse, EmployeeHistoryResponse,
+    PatrimonyCreate, PatrimonyResponse, PatrimonyHistoryResponse,
+    PatrimonyImportResponse, ValuationSummaryResponse, ValuationItemResponse, SearchResult,
+    PatrimonyAuditCreate, PatrimonyAuditResponse, AuditScanBatch, AuditScanResult,
+    PatrimonyAuditReport, PatrimonyAuditItemResponse,
+    TimePunchBatch, TimePunchBatchResult, TimeClockRollupResult, TimeClockDailyResponse, TimeClockMonthlyResponse,
+    MessageResponse
+)
+from serialization import rows_response
+from valuation import valuation_engine, METHODS, STRAIGHT_LINE
+from search import directory, KINDS
+from snapshots import EMPLOYEES, PATRIMONY, parse_as_of, reconstruct, to_text, sync as sync_snapshots
+from spreadsheet import stream_csv, stream_xlsx, read_csv, read_xlsx, CSV_MEDIA_TYPE, XLSX_MEDIA_TYPE
+from patrimony_io import EXPORT_COLUMNS, export_rows, import_rows
+from audit import audits, load_index
+import time_clock
+from migrator import startup as prepare_schema
+from migrations import migrator
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, REGISTRY, CONTENT_TYPE, instrument_engine
+from profiler import SQLProfilerMiddleware, profiler, profile_engine
+from replicas import ReplicaRoutingMiddleware, replicas
+from ratelimit import RateLimitMiddleware
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -22,7 +50,8 @@ app = FastAPI(
     description="Microserviço de Gerenciamento - Sistema de Condomínio",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configurar CORS
@@ -34,58 +63,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ========== Schemas ==========
-
-class ProviderCreate(BaseModel):
-    name: str
-    cnpj_cpf: str = None
-    service_type: str
-    phone: str = None
-    email: str = None
-    address: str = None
-    contact_person: str = None
-    notes: str = None
-
-class EmployeeCreate(BaseModel):
-    name: str
-    cpf: str
-    role: str
-    phone: str = None
-    email: str = None
-    address: str = None
-    hire_date: date
-    salary: float = None
-
-class PatrimonyCreate(BaseModel):
-    name: str
-    description: str = None
-    category: str
-    location: str = None
-    acquisition_date: date = None
-    acquisition_value: float = None
-    current_value: float = None
-    condition: str = None
-    serial_number: str = None
-    notes: str = None
+# Compressão gzip/brotli e ETag/304
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Métricas: latência por rota, consultas SQL e pool de conexões
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    for replica in replicas.replicas:
+        instrument_engine(replica.engine, pool_metrics=False)
+    app.add_middleware(MetricsMiddleware)
+
+# Profiler de SQL: header X-SQL-Profile e /debug/sql-profile
+if settings.SQL_PROFILER_ENABLED:
+    profile_engine(engine)
+    for replica in replicas.replicas:
+        profile_engine(replica.engine)
+    app.add_middleware(SQLProfilerMiddleware)
+
+# Réplicas de leitura: GET/HEAD leem das réplicas, respeitando read-your-writes
+if replicas:
+    app.add_middleware(ReplicaRoutingMiddleware)
+
+# Limite de taxa por usuário/IP/rota e descarte de carga (429/503 antes de qualquer outro processamento)
+if settings.RATE_LIMIT_ENABLED or settings.LOAD_SHED_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+
+@app.on_event("startup")
+def prepare_database():
+    """
+    Prepara o schema conforme SCHEMA_MODE (migrate, check ou skip) e só
+    depois constrói o índice de busca em memória
+    """
+    prepare_schema(migrator, settings.SCHEMA_MODE)
+    with SessionLocal() as db:
+        directory.rebuild(db)
+
+# ========== Rotas de Busca ==========
+
+@app.get("/api/search", response_model=List[SearchResult], tags=["Busca"])
+async def search_directory(
+    q: str = Query(..., min_length=2, description="Trecho de nome, CPF ou CNPJ"),
+    type: str = Query(None, description="provider ou employee"),
+    limit: int = Query(settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    db: Session = Depends(get_db)
+):
+    """Busca aproximada de prestadores e funcionários por nome ou documento"""
+    if type is not None and type not in KINDS:
+        raise HTTPException(status_code=400, detail=f"Tipo deve ser um de: {', '.join(KINDS)}")
+    directory.ensure(db)
+    return directory.search(q, limit, type, settings.SEARCH_MIN_SCORE)
 
 # ========== Rotas de Prestadores ==========
 
-@app.get("/api/providers", tags=["Prestadores"])
+@app.get("/api/providers", response_model=List[ProviderResponse], tags=["Prestadores"])
 async def list_providers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """Listar prestadores"""
-    providers = db.query(Provider).offset(skip).limit(limit).all()
-    return providers
+    return rows_response(db, select(Provider.__table__).order_by(Provider.id).offset(skip).limit(limit))
 
-@app.post("/api/providers", status_code=201, tags=["Prestadores"])
+@app.post("/api/providers", response_model=ProviderResponse, status_code=201, tags=["Prestadores"])
 async def create_provider(provider_data: ProviderCreate, db: Session = Depends(get_db)):
     """Criar novo prestador"""
     provider = Provider(**provider_data.dict())
     db.add(provider)
     db.commit()
     db.refresh(provider)
+    directory.add_provider(provider)
     return provider
 
-@app.get("/api/providers/{provider_id}", tags=["Prestadores"])
+@app.get("/api/providers/{provider_id}", response_model=ProviderResponse, tags=["Prestadores"])
 async def get_provider(provider_id: int, db: Session = Depends(get_db)):
     """Obter prestador por ID"""
     provider = db.query(Provider).filter(Provider.id == provider_id).first()
@@ -93,7 +140,7 @@ async def get_provider(provider_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Prestador não encontrado")
     return provider
 
-@app.delete("/api/providers/{provider_id}", tags=["Prestadores"])
+@app.delete("/api/providers/{provider_id}", response_model=MessageResponse, tags=["Prestadores"])
 async def delete_provider(provider_id: int, db: Session = Depends(get_db)):
     """Excluir prestador"""
     provider = db.query(Provider).filter(Provider.id == provider_id).first()
@@ -101,40 +148,55 @@ async def delete_provider(provider_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Prestador não encontrado")
     db.delete(provider)
     db.commit()
+    directory.remove_provider(provider_id)
     return {"message": "Prestador excluído com sucesso"}
 
 # ========== Rotas de Funcionários ==========
 
-@app.get("/api/employees", tags=["Funcionários"])
-async def list_employees(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Listar funcionários"""
-    employees = db.query(Employee).offset(skip).limit(limit).all()
-    return employees
+def _ids_as_of(db: Session, model, moment: datetime, skip: int, limit: int) -> List[int]:
+    """IDs (paginados) dos registros já existentes em `moment`"""
+    statement = select(model.id).where(model.created_at <= moment).order_by(model.id).offset(skip).limit(limit)
+    return list(db.scalars(statement))
+
+@app.get("/api/employees", response_model=List[EmployeeResponse], tags=["Funcionários"])
+async def list_employees(skip: int = 0, limit: int = 100, as_of: str = None, db: Session = Depends(get_db)):
+    """Listar funcionários (no estado de uma data com ?as_of=)"""
+    if as_of is not None:
+        moment = parse_as_of(as_of)
+        return reconstruct(db, EMPLOYEES, _ids_as_of(db, Employee, moment, skip, limit), moment)
+    return rows_response(db, select(Employee.__table__).order_by(Employee.id).offset(skip).limit(limit))
 
-@app.post("/api/employees", status_code=201, tags=["Funcionários"])
+@app.post("/api/employees", response_model=EmployeeResponse, status_code=201, tags=["Funcionários"])
 async def create_employee(employee_data: EmployeeCreate, db: Session = Depends(get_db)):
     """Criar novo funcionário"""
     employee = Employee(**employee_data.dict())
     db.add(employee)
     db.commit()
+    sync_snapshots(db, EMPLOYEES, [employee.id])
     db.refresh(employee)
+    directory.add_employee(employee)
     return employee
 
-@app.get("/api/employees/{employee_id}", tags=["Funcionários"])
-async def get_employee(employee_id: int, db: Session = Depends(get_db)):
-    """Obter funcionário por ID"""
+@app.get("/api/employees/{employee_id}", response_model=EmployeeResponse, tags=["Funcionários"])
+async def get_employee(employee_id: int, as_of: str = None, db: Session = Depends(get_db)):
+    """Obter funcionário por ID (no estado de uma data com ?as_of=)"""
+    if as_of is not None:
+        states = reconstruct(db, EMPLOYEES, [employee_id], parse_as_of(as_of))
+        if not states:
+            raise HTTPException(status_code=404, detail="Funcionário não encontrado na data informada")
+        return states[0]
     employee = db.query(Employee).filter(Employee.id == employee_id).first()
     if not employee:
         raise HTTPException(status_code=404, detail="Funcionário não encontrado")
     return employee
 
-@app.get("/api/employees/{employee_id}/history", tags=["Funcionários"])
+@app.get("/api/employees/{employee_id}/history", response_model=List[EmployeeHistoryResponse], tags=["Funcionários"])
 async def get_employee_history(employee_id: int, db: Session = Depends(get_db)):
     """Obter histórico de funcionário"""
     history = db.query(EmployeeHistory).filter(EmployeeHistory.employee_id == employee_id).all()
     return history
 
-@app.delete("/api/employees/{employee_id}", tags=["Funcionários"])
+@app.delete("/api/employees/{employee_id}", response_model=MessageResponse, tags=["Funcionários"])
 async def delete_employee(employee_id: int, db: Session = Depends(get_db)):
     """Excluir funcionário"""
     employee = db.query(Employee).filter(Employee.id == employee_id).first()
@@ -142,40 +204,190 @@ async def delete_employee(employee_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Funcionário não encontrado")
     db.delete(employee)
     db.commit()
+    directory.remove_employee(employee_id)
     return {"message": "Funcionário excluído com sucesso"}
 
+# ========== Rotas de Ponto Eletrônico ==========
+
+@app.post("/api/time-clock/punches", response_model=TimePunchBatchResult, tags=["Ponto Eletrônico"])
+async def ingest_punches(batch: TimePunchBatch, db: Session = Depends(get_db)):
+    """Receber lote de marcações dos terminais (reenvios são ignorados)"""
+    if len(batch.punches) > settings.TIME_CLOCK_MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Lote deve ter no máximo {settings.TIME_CLOCK_MAX_BATCH_SIZE} marcações")
+    inserted, rejected = time_clock.ingest(db, [punch.dict() for punch in batch.punches])
+    return {
+        "received": len(batch.punches),
+        "inserted": inserted,
+        "duplicates": len(batch.punches) - len(rejected) - inserted,
+        "rejected": rejected
+    }
+
+@app.post("/api/time-clock/rollup", response_model=TimeClockRollupResult, tags=["Ponto Eletrônico"])
+def rollup_time_clock(start: date = None, end: date = None, db: Session = Depends(get_db)):
+    """Consolidar o ponto (incremental; com start/end recalcula o período)"""
+    if start is not None or end is not None:
+        if start is None or end is None or end < start:
+            raise HTTPException(status_code=400, detail="Informe start e end (end >= start)")
+        return time_clock.rebuild(db, start, end)
+    return time_clock.rollup(db)
+
+@app.get("/api/time-clock/daily", response_model=List[TimeClockDailyResponse], tags=["Ponto Eletrônico"])
+async def list_time_clock_daily(
+    start: date,
+    end: date,
+    employee_id: int = None,
+    db: Session = Depends(get_db)
+):
+    """Consolidação diária de um período"""
+    statement = select(TimeClockDaily.__table__).where(
+        TimeClockDaily.work_date >= start, TimeClockDaily.work_date <= end
+    )
+    if employee_id is not None:
+        statement = statement.where(TimeClockDaily.employee_id == employee_id)
+    return rows_response(db, statement.order_by(TimeClockDaily.employee_id, TimeClockDaily.work_date))
+
+@app.get("/api/time-clock/monthly", response_model=List[TimeClockMonthlyResponse], tags=["Ponto Eletrônico"])
+async def get_time_clock_monthly(month: str, employee_id: int = None, db: Session = Depends(get_db)):
+    """Relatório mensal por funcionário (lido da consolidação diária)"""
+    try:
+        return time_clock.monthly_report(db, month, employee_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Mês deve estar no formato AAAA-MM")
+
 # ========== Rotas de Patrimônio ==========
 
-@app.get("/api/patrimony", tags=["Patrimônio"])
-async def list_patrimony(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Listar patrimônio"""
-    patrimonies = db.query(Patrimony).offset(skip).limit(limit).all()
-    return patrimonies
+@app.get("/api/patrimony", response_model=List[PatrimonyResponse], tags=["Patrimônio"])
+async def list_patrimony(skip: int = 0, limit: int = 100, as_of: str = None, db: Session = Depends(get_db)):
+    """Listar patrimônio (no estado de uma data com ?as_of=)"""
+    if as_of is not None:
+        moment = parse_as_of(as_of)
+        return reconstruct(db, PATRIMONY, _ids_as_of(db, Patrimony, moment, skip, limit), moment)
+    return rows_response(db, select(Patrimony.__table__).order_by(Patrimony.id).offset(skip).limit(limit))
 
-@app.post("/api/patrimony", status_code=201, tags=["Patrimônio"])
+@app.post("/api/patrimony", response_model=PatrimonyResponse, status_code=201, tags=["Patrimônio"])
 async def create_patrimony(patrimony_data: PatrimonyCreate, db: Session = Depends(get_db)):
     """Criar novo patrimônio"""
     patrimony = Patrimony(**patrimony_data.dict())
     db.add(patrimony)
     db.commit()
+    sync_snapshots(db, PATRIMONY, [patrimony.id])
     db.refresh(patrimony)
+    valuation_engine.invalidate()
     return patrimony
 
-@app.get("/api/patrimony/{patrimony_id}", tags=["Patrimônio"])
-async def get_patrimony(patrimony_id: int, db: Session = Depends(get_db)):
-    """Obter patrimônio por ID"""
+@app.get("/api/patrimony/export", tags=["Patrimônio"])
+async def export_patrimony(format: str = "csv", db: Session = Depends(get_db)):
+    """Exportar todo o inventário em CSV ou XLSX (streaming)"""
+    if format == "csv":
+        body, media_type = stream_csv(EXPORT_COLUMNS, export_rows(db)), CSV_MEDIA_TYPE
+    elif format == "xlsx":
+        body, media_type = stream_xlsx(EXPORT_COLUMNS, export_rows(db), "Patrimonio"), XLSX_MEDIA_TYPE
+    else:
+        raise HTTPException(status_code=400, detail="Formato deve ser csv ou xlsx")
+    filename = f"patrimonio_{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.post("/api/patrimony/import", response_model=PatrimonyImportResponse, tags=["Patrimônio"])
+def import_patrimony(file: UploadFile = File(...), changed_by: int = None, db: Session = Depends(get_db)):
+    """Importar inventário (CSV ou XLSX) com upsert por serial_number"""
+    filename = (file.filename or "").lower()
+    if filename.endswith(".xlsx"):
+        rows = read_xlsx(file.file)
+    elif filename.endswith(".csv"):
+        rows = read_csv(file.file)
+    else:
+        raise HTTPException(status_code=400, detail="Arquivo deve ser .csv ou .xlsx")
+    try:
+        report = import_rows(db, rows, changed_by)
+    except (zipfile.BadZipFile, ParseError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Arquivo inválido ou corrompido")
+    if report.inserted or report.updated:
+        sync_snapshots(db, PATRIMONY)
+    valuation_engine.invalidate()
+    return report.to_dict()
+
+def _valuation_method(method: str) -> str:
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"Método deve ser um de: {', '.join(METHODS)}")
+    return method
+
+@app.get("/api/patrimony/valuation", response_model=ValuationSummaryResponse, tags=["Patrimônio"])
+async def get_patrimony_valuation(
+    method: str = STRAIGHT_LINE,
+    as_of: date = None,
+    category: str = None,
+    location: str = None,
+    db: Session = Depends(get_db)
+):
+    """Valor contábil depreciado do patrimônio, com totais por categoria e local"""
+    return valuation_engine.summary(db, _valuation_method(method), as_of or date.today(), category, location)
+
+@app.get("/api/patrimony/valuation/items", response_model=List[ValuationItemResponse], tags=["Patrimônio"])
+async def list_patrimony_valuation(
+    method: str = STRAIGHT_LINE,
+    as_of: date = None,
+    category: str = None,
+    location: str = None,
+    db: Session = Depends(get_db)
+):
+    """Valor contábil depreciado de cada bem"""
+    return valuation_engine.items(db, _valuation_method(method), as_of or date.today(), category, location)
+
+@app.post("/api/patrimony/valuation/apply", response_model=MessageResponse, tags=["Patrimônio"])
+async def apply_patrimony_valuation(
+    method: str = STRAIGHT_LINE,
+    as_of: date = None,
+    category: str = None,
+    location: str = None,
+    changed_by: int = None,
+    db: Session = Depends(get_db)
+):
+    """Grava o valor contábil calculado em current_value (atualização em lote, com histórico)"""
+    items = valuation_engine.items(db, _valuation_method(method), as_of or date.today(), category, location)
+    book_values = {item["id"]: item["book_value"] for item in items}
+    current = db.execute(select(Patrimony.id, Patrimony.current_value).where(Patrimony.is_active == True)).all()
+    changed = [
+        (row.id, row.current_value) for row in current
+        if row.id in book_values and (row.current_value is None or float(row.current_value) != book_values[row.id])
+    ]
+    if changed:
+        now = datetime.utcnow()
+        db.execute(update(Patrimony), [{"id": patrimony_id, "current_value": book_values[patrimony_id]} for patrimony_id, _ in changed])
+        db.execute(insert(PatrimonyHistory), [
+            {
+                "patrimony_id": patrimony_id, "field_name": "current_value", "old_value": to_text(old),
+                "new_value": to_text(book_values[patrimony_id]), "changed_by": changed_by, "changed_at": now
+            }
+            for patrimony_id, old in changed
+        ])
+        db.commit()
+        sync_snapshots(db, PATRIMONY, [patrimony_id for patrimony_id, _ in changed])
+    return {"message": f"{len(changed)} bens atualizados"}
+
+@app.get("/api/patrimony/{patrimony_id}", response_model=PatrimonyResponse, tags=["Patrimônio"])
+async def get_patrimony(patrimony_id: int, as_of: str = None, db: Session = Depends(get_db)):
+    """Obter patrimônio por ID (no estado de uma data com ?as_of=)"""
+    if as_of is not None:
+        states = reconstruct(db, PATRIMONY, [patrimony_id], parse_as_of(as_of))
+        if not states:
+            raise HTTPException(status_code=404, detail="Patrimônio não encontrado na data informada")
+        return states[0]
     patrimony = db.query(Patrimony).filter(Patrimony.id == patrimony_id).first()
     if not patrimony:
         raise HTTPException(status_code=404, detail="Patrimônio não encontrado")
     return patrimony
 
-@app.get("/api/patrimony/{patrimony_id}/history", tags=["Patrimônio"])
+@app.get("/api/patrimony/{patrimony_id}/history", response_model=List[PatrimonyHistoryResponse], tags=["Patrimônio"])
 async def get_patrimony_history(patrimony_id: int, db: Session = Depends(get_db)):
     """Obter histórico de patrimônio"""
     history = db.query(PatrimonyHistory).filter(PatrimonyHistory.patrimony_id == patrimony_id).all()
     return history
 
-@app.delete("/api/patrimony/{patrimony_id}", tags=["Patrimônio"])
+@app.delete("/api/patrimony/{patrimony_id}", response_model=MessageResponse, tags=["Patrimônio"])
 async def delete_patrimony(patrimony_id: int, db: Session = Depends(get_db)):
     """Excluir patrimônio"""
     patrimony = db.query(Patrimony).filter(Patrimony.id == patrimony_id).first()
@@ -183,14 +395,98 @@ async def delete_patrimony(patrimony_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Patrimônio não encontrado")
     db.delete(patrimony)
     db.commit()
+    valuation_engine.invalidate()
     return {"message": "Patrimônio excluído com sucesso"}
 
+# ========== Rotas de Auditoria de Patrimônio ==========
+
+def _get_audit(db: Session, audit_id: int) -> PatrimonyAudit:
+    audit = db.query(PatrimonyAudit).filter(PatrimonyAudit.id == audit_id).first()
+    if not audit:
+        raise HTTPException(status_code=404, detail="Auditoria não encontrada")
+    return audit
+
+@app.get("/api/patrimony-audits", response_model=List[PatrimonyAuditResponse], tags=["Auditoria de Patrimônio"])
+async def list_patrimony_audits(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    """Listar sessões de auditoria"""
+    return rows_response(db, select(PatrimonyAudit.__table__).order_by(PatrimonyAudit.id).offset(skip).limit(limit))
+
+@app.post("/api/patrimony-audits", response_model=PatrimonyAuditResponse, status_code=201, tags=["Auditoria de Patrimônio"])
+async def create_patrimony_audit(audit_data: PatrimonyAuditCreate, db: Session = Depends(get_db)):
+    """Abrir sessão de auditoria"""
+    audit = PatrimonyAudit(**audit_data.dict(), status="open")
+    db.add(audit)
+    db.commit()
+    db.refresh(audit)
+    return audit
+
+@app.post("/api/patrimony-audits/{audit_id}/scans", response_model=AuditScanResult, tags=["Auditoria de Patrimônio"])
+async def upload_audit_scans(audit_id: int, batch: AuditScanBatch, db: Session = Depends(get_db)):
+    """Enviar lote de leituras de um local"""
+    audit = _get_audit(db, audit_id)
+    if audit.status != "open":
+        raise HTTPException(status_code=409, detail="Auditoria encerrada")
+    if len(batch.serial_numbers) > settings.AUDIT_MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Lote deve ter no máximo {settings.AUDIT_MAX_BATCH_SIZE} leituras")
+    return audits.scan(db, audit, batch.location, batch.serial_numbers, batch.device_id)
+
+@app.get("/api/patrimony-audits/{audit_id}", response_model=PatrimonyAuditReport, tags=["Auditoria de Patrimônio"])
+async def get_patrimony_audit(audit_id: int, db: Session = Depends(get_db)):
+    """Relatório da auditoria por local"""
+    audit = _get_audit(db, audit_id)
+    return {"audit": audit, "locations": load_index(db, audit).report()}
+
+@app.get("/api/patrimony-audits/{audit_id}/items", response_model=List[PatrimonyAuditItemResponse], tags=["Auditoria de Patrimônio"])
+async def list_patrimony_audit_items(
+    audit_id: int,
+    result: str = None,
+    location: str = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """Listar itens da auditoria (filtro por resultado e local)"""
+    _get_audit(db, audit_id)
+    statement = select(PatrimonyAuditItem.__table__).where(PatrimonyAuditItem.audit_id == audit_id)
+    if result is not None:
+        statement = statement.where(PatrimonyAuditItem.result == result)
+    if location is not None:
+        statement = statement.where(PatrimonyAuditItem.location == location)
+    return rows_response(db, statement.order_by(PatrimonyAuditItem.id).offset(skip).limit(limit))
+
+@app.post("/api/patrimony-audits/{audit_id}/close", response_model=PatrimonyAuditReport, tags=["Auditoria de Patrimônio"])
+async def close_patrimony_audit(audit_id: int, db: Session = Depends(get_db)):
+    """Encerrar auditoria, registrando os bens não encontrados"""
+    audit = _get_audit(db, audit_id)
+    if audit.status != "open":
+        raise HTTPException(status_code=409, detail="Auditoria já encerrada")
+    index = audits.close(db, audit)
+    db.refresh(audit)
+    return {"audit": audit, "locations": index.report()}
+
 # ========== Health Check ==========
 
 @app.get("/health", tags=["Sistema"])
 async def health_check():
     """Verificação de saúde do serviço"""
-    return {"status": "healthy", "service": "management_service"}
+    health = {"status": "healthy", "service": "management_service"}
+    if replicas:
+        health["replicas"] = replicas.status()
+    return health
+
+
+@app.get("/metrics", tags=["Sistema"], include_in_schema=False)
+async def metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/debug/sql-profile", tags=["Sistema"], include_in_schema=False)
+async def sql_profile(suspects: bool = False):
+    """Perfis de SQL das requisições recentes (apenas com SQL_PROFILER_ENABLED)"""
+    if not settings.SQL_PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler de SQL desativado")
+    return profiler.recent(only_suspects=suspects)
 
 if __name__ == "__main__":
     import uvicorn
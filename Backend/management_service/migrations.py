@@ -0,0 +1,48 @@
+"""
+Migrações do schema do Management Service
+
+Uso: python migrations.py upgrade|status|check|stamp <versão>
+"""
+from pathlib import Path
+
+from database import Base, engine
+import models  # noqa: F401 (registra as tabelas no metadata)
+from migrator import Migration, Migrator, create_indexes, create_tables, main
+
+SCRIPT = Path(__file__).resolve().parents[2] / "Script" / "02_create_management_tables.sql"
+
+
+def baseline(connection, metadata):
+    create_tables(connection, metadata, "providers", "employees", "employee_history", "patrimonies", "patrimony_history")
+
+
+def history_snapshots(connection, metadata):
+    create_tables(connection, metadata, "employee_snapshots", "patrimony_snapshots")
+
+
+def patrimony_audits(connection, metadata):
+    create_tables(connection, metadata, "patrimony_audits", "patrimony_audit_items")
+
+
+def time_clock(connection, metadata):
+    create_tables(connection, metadata, "time_punches", "time_clock_daily", "time_clock_rollup_state")
+
+
+def patrimony_serial_index(connection, metadata):
+    # Importação e auditoria localizam bens pelo número de série
+    create_indexes(connection, metadata, "patrimonies", ["serial_number"])
+
+
+MIGRATIONS = [
+    Migration("0001", "Schema inicial", baseline),
+    Migration("0002", "Snapshots do histórico de funcionários e patrimônio", history_snapshots),
+    Migration("0003", "Auditorias de patrimônio", patrimony_audits),
+    Migration("0004", "Ponto eletrônico", time_clock),
+    Migration("0005", "Índice de patrimônio por número de série", patrimony_serial_index),
+]
+
+migrator = Migrator(engine, Base.metadata, MIGRATIONS)
+
+
+if __name__ == "__main__":
+    main(migrator, SCRIPT)
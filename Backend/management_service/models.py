@@ -1,7 +1,7 @@
 """
 Modelos de dados do Management Service
 """
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, DECIMAL, Date
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, DECIMAL, Date, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -45,6 +45,7 @@ class Employee(Base):
     
     # Relacionamentos
     history = relationship("EmployeeHistory", back_populates="employee", cascade="all, delete-orphan")
+    snapshots = relationship("EmployeeSnapshot", cascade="all, delete-orphan")
 
 
 class EmployeeHistory(Base):
@@ -63,6 +64,19 @@ class EmployeeHistory(Base):
     employee = relationship("Employee", back_populates="history")
 
 
+class EmployeeSnapshot(Base):
+    """Modelo de Snapshot de Funcionário (estado completo após history_id)"""
+    __tablename__ = "employee_snapshots"
+    __table_args__ = (UniqueConstraint("employee_id", "history_id", name="uq_emp_snapshot"),)
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False, index=True)
+    history_id = Column(Integer, nullable=False, default=0)
+    taken_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    data = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Patrimony(Base):
     """Modelo de Patrimônio"""
     __tablename__ = "patrimonies"
@@ -76,7 +90,7 @@ class Patrimony(Base):
     acquisition_value = Column(DECIMAL(10, 2))
     current_value = Column(DECIMAL(10, 2))
     condition = Column(String(50))
-    serial_number = Column(String(100))
+    serial_number = Column(String(100), index=True)
     notes = Column(Text)
     is_active = Column(Boolean, default=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -84,6 +98,7 @@ class Patrimony(Base):
     
     # Relacionamentos
     history = relationship("PatrimonyHistory", back_populates="patrimony", cascade="all, delete-orphan")
+    snapshots = relationship("PatrimonySnapshot", cascade="all, delete-orphan")
 
 
 class PatrimonyHistory(Base):
@@ -100,3 +115,96 @@ class PatrimonyHistory(Base):
     
     # Relacionamentos
     patrimony = relationship("Patrimony", back_populates="history")
+
+
+class PatrimonySnapshot(Base):
+    """Modelo de Snapshot de Patrimônio (estado completo após history_id)"""
+    __tablename__ = "patrimony_snapshots"
+    __table_args__ = (UniqueConstraint("patrimony_id", "history_id", name="uq_pat_snapshot"),)
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    patrimony_id = Column(Integer, ForeignKey("patrimonies.id", ondelete="CASCADE"), nullable=False, index=True)
+    history_id = Column(Integer, nullable=False, default=0)
+    taken_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    data = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PatrimonyAudit(Base):
+    """Modelo de Sessão de Auditoria (inventário físico) do Patrimônio"""
+    __tablename__ = "patrimony_audits"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    name = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, default="open", index=True)  # open, closed
+    started_by = Column(Integer)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    closed_at = Column(DateTime(timezone=True))
+    notes = Column(Text)
+    
+    # Relacionamentos
+    items = relationship("PatrimonyAuditItem", back_populates="audit", cascade="all, delete-orphan")
+
+
+class PatrimonyAuditItem(Base):
+    """Modelo de Item de Auditoria (leitura ou bem não encontrado)"""
+    __tablename__ = "patrimony_audit_items"
+    __table_args__ = (UniqueConstraint("audit_id", "serial_number", name="uq_audit_item_serial"),)
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    audit_id = Column(Integer, ForeignKey("patrimony_audits.id"), nullable=False, index=True)
+    serial_number = Column(String(100), nullable=False)
+    patrimony_id = Column(Integer, ForeignKey("patrimonies.id", ondelete="SET NULL"))
+    location = Column(String(255))
+    expected_location = Column(String(255))
+    result = Column(String(20), nullable=False, index=True)  # found, misplaced, unknown, missing
+    device_id = Column(String(100))
+    scanned_at = Column(DateTime(timezone=True))
+    
+    # Relacionamentos
+    audit = relationship("PatrimonyAudit", back_populates="items")
+
+
+class TimePunch(Base):
+    """Modelo de Marcação de Ponto (somente inserção)"""
+    __tablename__ = "time_punches"
+    __table_args__ = (UniqueConstraint("employee_id", "punched_at", name="uq_punch_employee_time"),)
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    punched_at = Column(DateTime, nullable=False, index=True)
+    kind = Column(String(3), nullable=False)  # in, out
+    terminal_id = Column(String(50))
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TimeClockDaily(Base):
+    """Modelo de Consolidação Diária do Ponto (horas trabalhadas, extras e faltas)"""
+    __tablename__ = "time_clock_daily"
+    __table_args__ = (
+        UniqueConstraint("employee_id", "work_date", name="uq_daily_employee_date"),
+        Index("idx_daily_date_employee", "work_date", "employee_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    work_date = Column(Date, nullable=False)
+    first_in = Column(DateTime)
+    last_out = Column(DateTime)
+    punches = Column(Integer, nullable=False, default=0)
+    worked_minutes = Column(Integer, nullable=False, default=0)
+    expected_minutes = Column(Integer, nullable=False, default=0)
+    overtime_minutes = Column(Integer, nullable=False, default=0)
+    is_absence = Column(Boolean, nullable=False, default=False)
+    is_incomplete = Column(Boolean, nullable=False, default=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TimeClockRollupState(Base):
+    """Modelo de Estado da Consolidação do Ponto (linha única)"""
+    __tablename__ = "time_clock_rollup_state"
+    
+    id = Column(Integer, primary_key=True)
+    last_punch_id = Column(Integer, nullable=False, default=0)
+    absences_through = Column(Date)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
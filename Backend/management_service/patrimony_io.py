@@ -0,0 +1,231 @@
+"""
+Exportação e importação em lote do inventário de patrimônio
+
+A exportação lê o patrimônio em partições (yield_per) e escreve CSV/XLSX
+linha a linha. A importação processa o arquivo em blocos: cada bloco é
+validado linha a linha, os bens existentes são localizados por
+serial_number com uma única consulta e as inserções/atualizações são
+enviadas em lote (executemany) em uma transação por bloco.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Patrimony, PatrimonyHistory
+from schemas import PatrimonyCreate
+from snapshots import to_text
+from spreadsheet import excel_date
+
+# Colunas exportadas (as de sistema são ignoradas na importação)
+EXPORT_COLUMNS = [column.key for column in Patrimony.__table__.columns]
+SYSTEM_COLUMNS = {"id", "created_at", "updated_at"}
+IMPORT_FIELDS = [name for name in EXPORT_COLUMNS if name not in SYSTEM_COLUMNS]
+DATE_FIELDS = {"acquisition_date"}
+DECIMAL_FIELDS = {"acquisition_value", "current_value"}
+
+
+def export_rows(db: Session) -> Iterator[Tuple]:
+    """Todas as linhas do patrimônio, em partições de PATRIMONY_EXPORT_BATCH_SIZE"""
+    statement = select(Patrimony.__table__).order_by(Patrimony.id)
+    result = db.execute(statement.execution_options(yield_per=settings.PATRIMONY_EXPORT_BATCH_SIZE))
+    for partition in result.partitions():
+        yield from partition
+
+
+class ImportReport:
+    """Resultado da importação: contagens e erros por linha"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.errors: List[dict] = []
+        self.error_count = 0
+
+    def error(self, line: int, message: str, serial_number: Optional[str] = None):
+        self.error_count += 1
+        if len(self.errors) < settings.PATRIMONY_IMPORT_MAX_ERRORS:
+            self.errors.append({"row": line, "serial_number": serial_number, "error": message})
+
+    def to_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "error_count": self.error_count,
+            "errors": self.errors
+        }
+
+
+def _cell(field: str, value):
+    """Normaliza o valor lido da planilha (vazio -> None, datas seriais do Excel)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        # Formatos brasileiros: 1.234,56 e 31/12/2024
+        if field in DECIMAL_FIELDS and "," in value:
+            return value.replace(".", "").replace(",", ".")
+        if field in DATE_FIELDS and "/" in value:
+            return datetime.strptime(value, "%d/%m/%Y").date()
+        return value
+    if isinstance(value, float):
+        if field in DATE_FIELDS:
+            return excel_date(value)
+        if field == "serial_number" and value.is_integer():
+            return str(int(value))
+    return value
+
+
+def _is_active(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "1.0", "true", "t", "sim", "s", "yes")
+
+
+def _parse(header: List[str], values: List) -> dict:
+    """Valida uma linha com o schema de criação; lança ValueError/ValidationError"""
+    record = {}
+    for index, field in enumerate(header):
+        if field in IMPORT_FIELDS and index < len(values):
+            try:
+                record[field] = _cell(field, values[index])
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f"{field}: valor inválido ({values[index]})")
+    is_active = _is_active(record.pop("is_active", None))
+    data = PatrimonyCreate(**{key: value for key, value in record.items() if value is not None}).dict()
+    data["is_active"] = is_active
+    return data
+
+
+def _raw_serial(header: List[str], values: List) -> Optional[str]:
+    """serial_number da linha para o relatório de erros, mesmo se inválida"""
+    if "serial_number" not in header:
+        return None
+    index = header.index("serial_number")
+    return _cell("serial_number", values[index]) if index < len(values) else None
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+
+
+def _differences(current, data: dict, fields: List[str]) -> Dict[str, Tuple]:
+    """Campos presentes na planilha cujo valor difere do cadastrado"""
+    changes = {}
+    for field in fields:
+        old, value = getattr(current, field), data[field]
+        if to_text(old) != to_text(value) and not (old is not None and value is not None and _same_number(old, value)):
+            changes[field] = (old, value)
+    return changes
+
+
+def _same_number(old, new) -> bool:
+    try:
+        return float(old) == float(new)
+    except (TypeError, ValueError):
+        return False
+
+
+def import_rows(db: Session, rows: Iterable[List], changed_by: Optional[int] = None) -> ImportReport:
+    """
+    Importa as linhas (a primeira é o cabeçalho) fazendo upsert por
+    serial_number. Linhas sem serial_number são sempre inseridas.
+    """
+    report = ImportReport()
+    rows = iter(rows)
+    header = [str(name or "").strip().lower() for name in next(rows, [])]
+    missing = [field for field in ("name", "category") if field not in header]
+    if missing:
+        report.error(1, f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+        return report
+
+    # Na atualização, só as colunas presentes na planilha são consideradas
+    fields = [field for field in IMPORT_FIELDS if field in header]
+    seen_serials = set()
+    chunk: List[Tuple[int, dict]] = []
+    for line, values in enumerate(rows, start=2):
+        if not any(value not in (None, "") for value in values):
+            continue
+        try:
+            data = _parse(header, values)
+        except ValidationError as exc:
+            report.error(line, _validation_message(exc), _raw_serial(header, values))
+            continue
+        except (TypeError, ValueError, OverflowError) as exc:
+            report.error(line, str(exc), _raw_serial(header, values))
+            continue
+        serial = data.get("serial_number")
+        if serial is not None:
+            if serial in seen_serials:
+                report.error(line, "serial_number repetido no arquivo", serial)
+                continue
+            seen_serials.add(serial)
+        chunk.append((line, data))
+        if len(chunk) >= settings.PATRIMONY_IMPORT_CHUNK_SIZE:
+            _flush(db, chunk, fields, report, changed_by)
+            chunk = []
+    if chunk:
+        _flush(db, chunk, fields, report, changed_by)
+    return report
+
+
+def _flush(db: Session, chunk: List[Tuple[int, dict]], fields: List[str], report: ImportReport, changed_by: Optional[int]):
+    """Grava um bloco em uma transação: inserções e atualizações em lote"""
+    serials = [data["serial_number"] for _, data in chunk if data.get("serial_number")]
+    existing: Dict[str, list] = {}
+    if serials:
+        for row in db.execute(
+            select(Patrimony.__table__).where(Patrimony.serial_number.in_(serials)).order_by(Patrimony.id)
+        ):
+            existing.setdefault(row.serial_number, []).append(row)
+
+    inserts, updates, history, written = [], [], [], []
+    now = datetime.utcnow()
+    for line, data in chunk:
+        matches = existing.get(data.get("serial_number"), [])
+        if len(matches) > 1:
+            report.error(line, "serial_number pertence a mais de um bem cadastrado", data["serial_number"])
+        elif matches:
+            current = matches[0]
+            changes = _differences(current, data, fields)
+            if changes:
+                written.append((line, data))
+                updates.append({"id": current.id, **{field: new for field, (_, new) in changes.items()}})
+                history.extend(
+                    {
+                        "patrimony_id": current.id, "field_name": field, "old_value": to_text(old),
+                        "new_value": to_text(new), "changed_by": changed_by, "changed_at": now
+                    }
+                    for field, (old, new) in changes.items()
+                )
+        else:
+            written.append((line, data))
+            inserts.append(data)
+
+    try:
+        if inserts:
+            db.execute(insert(Patrimony), inserts)
+        # Agrupa por conjunto de colunas para que cada grupo seja um executemany
+        groups: Dict[tuple, list] = {}
+        for values in updates:
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+        for group in groups.values():
+            db.execute(update(Patrimony), group)
+        if history:
+            db.execute(insert(PatrimonyHistory), history)
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        for line, data in written:
+            report.error(line, f"Falha ao gravar o bloco: {exc.__class__.__name__}", data.get("serial_number"))
+        return
+    report.inserted += len(inserts)
+    report.updated += len(updates)
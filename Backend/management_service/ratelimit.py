@@ -0,0 +1,221 @@
+"""
+Limite de taxa (token bucket) e descarte de carga
+
+Dois controles, num único middleware ASGI:
+
+- Token buckets em memória: um por usuário (user_id do JWT, com assinatura
+  verificada) e um por IP, com RATE_LIMIT_USER_PER_MINUTE e
+  RATE_LIMIT_IP_PER_MINUTE; rotas listadas em RATE_LIMIT_ROUTES
+  ("MÉTODO /caminho/{param}" -> requisições por minuto) têm ainda um bucket
+  próprio por usuário (ou, sem token, por IP), como o login contra força
+  bruta. Cada bucket comporta um minuto de requisições e é reabastecido
+  continuamente. Bucket vazio: 429 com Retry-After.
+  Atrás de um proxy listado em TRUSTED_PROXIES (como o Gateway Service), o
+  IP é o do cliente, lido do X-Forwarded-For: o último endereço da lista
+  que não seja de um proxy confiável.
+- Limite global de concorrência: no máximo MAX_CONCURRENT_REQUESTS (padrão:
+  as conexões do pool) requisições executando; as demais aguardam (sem
+  bloquear o event loop) e, se a espera passar de
+  LOAD_SHED_QUEUE_TIMEOUT_SECONDS, recebem 503.
+  A latência fica limitada sob sobrecarga e, com o limite igual ao número
+  de conexões do pool, rotas `async` nunca bloqueiam o event loop
+  esperando conexão (o que travava o processo com mais requisições
+  simultâneas que conexões).
+
+Caminhos em LIMITS_EXEMPT_PATHS (health check, métricas, streams de longa
+duração) não passam por nenhum dos dois. O estado é por processo: com
+vários workers, gunicorn_conf.py divide cada limite entre eles.
+"""
+import asyncio
+import functools
+import ipaddress
+import math
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from config import settings
+from metrics import REGISTRY, Counter
+
+limited_requests = REGISTRY.register(Counter(
+    "rate_limited_requests_total", "Requisições recusadas por limite de taxa ou sobrecarga", ("reason",)
+))
+
+
+class TokenBucket:
+    """Capacidade de `capacity` requisições, reabastecida a `rate` por segundo"""
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Consome uma ficha; devolve 0 ou os segundos até haver uma"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Buckets por chave, em ordem de uso (LRU) até max_keys"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[tuple, TokenBucket]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: tuple, per_minute: int, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(per_minute, per_minute / 60, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now)
+
+
+def _route_limits(routes) -> List[Tuple[str, str, Pattern, int]]:
+    limits = []
+    for spec, per_minute in routes.items():
+        method, _, path = spec.partition(" ")
+        regex, _, _ = compile_path(path)
+        limits.append((spec, method.upper(), regex, per_minute))
+    return limits
+
+
+@functools.lru_cache(maxsize=4096)
+def _user_id(token: str) -> Optional[int]:
+    """user_id de um token com assinatura válida (a expiração fica a cargo das rotas)"""
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM], options={"verify_exp": False})
+    except JWTError:
+        return None
+    return claims.get("user_id")
+
+
+def _networks(entries: Iterable[str]) -> tuple:
+    return tuple(ipaddress.ip_network(entry, strict=False) for entry in entries)
+
+
+def _trusted(address: str, networks: tuple) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(scope, trusted: tuple) -> Optional[str]:
+    """IP do cliente: o da conexão ou, vinda de um proxy confiável, o do X-Forwarded-For"""
+    client = scope.get("client")
+    ip = client[0] if client else None
+    if ip is None or not _trusted(ip, trusted):
+        return ip
+    hops = []
+    for name, value in scope.get("headers", ()):
+        if name == b"x-forwarded-for":
+            hops.extend(hop.strip() for hop in value.decode("latin-1").split(","))
+    # Da direita para a esquerda: cada proxy confiável acrescentou quem o chamou
+    for hop in reversed(hops):
+        if not hop:
+            continue
+        ip = hop
+        if not _trusted(hop, trusted):
+            break
+    return ip
+
+
+def _identity(scope, trusted: tuple = ()) -> Tuple[Optional[int], Optional[str]]:
+    user_id = None
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                user_id = _user_id(token)
+            break
+    return user_id, client_ip(scope, trusted)
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI: limite de taxa por usuário/IP/rota e limite global de concorrência"""
+
+    def __init__(self, app):
+        self.app = app
+        self.limiter = RateLimiter(settings.RATE_LIMIT_MAX_KEYS)
+        self.routes = _route_limits(settings.RATE_LIMIT_ROUTES)
+        self.exempt = frozenset(settings.LIMITS_EXEMPT_PATHS)
+        self.trusted = _networks(settings.TRUSTED_PROXIES)
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _retry_after(self, scope) -> Tuple[float, Optional[str]]:
+        """Espera exigida pelo primeiro bucket vazio (e qual), ou 0"""
+        now = time.monotonic()
+        user_id, ip = _identity(scope, self.trusted)
+        checks = []
+        if user_id is not None:
+            checks.append((("user", user_id), settings.RATE_LIMIT_USER_PER_MINUTE, "user"))
+        if ip is not None:
+            checks.append((("ip", ip), settings.RATE_LIMIT_IP_PER_MINUTE, "ip"))
+        who = ("user", user_id) if user_id is not None else ("ip", ip)
+        for spec, method, regex, per_minute in self.routes:
+            if scope["method"] == method and regex.match(scope["path"]):
+                checks.append(((spec,) + who, per_minute, "route"))
+        for key, per_minute, reason in checks:
+            wait = self.limiter.take(key, per_minute, now)
+            if wait:
+                return wait, reason
+        return 0.0, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        if settings.RATE_LIMIT_ENABLED:
+            wait, reason = self._retry_after(scope)
+            if wait:
+                limited_requests.inc(reason)
+                response = JSONResponse(
+                    {"detail": "Muitas requisições. Tente novamente mais tarde."},
+                    status_code=429,
+                    headers={"Retry-After": str(math.ceil(wait))}
+                )
+                await response(scope, receive, send)
+                return
+
+        if not settings.LOAD_SHED_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(
+                settings.MAX_CONCURRENT_REQUESTS or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+            )
+        try:
+            await asyncio.wait_for(self._slots.acquire(), settings.LOAD_SHED_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            limited_requests.inc("overload")
+            response = JSONResponse(
+                {"detail": "Serviço sobrecarregado. Tente novamente."},
+                status_code=503,
+                headers={"Retry-After": "1"}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._slots.release()
@@ -0,0 +1,322 @@
+"""
+Schemas Pydantic para validação de dados
+"""
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import date, datetime
+
+
+# ========== Provider Schemas ==========
+
+class ProviderCreate(BaseModel):
+    name: str
+    cnpj_cpf: str = None
+    service_type: str
+    phone: str = None
+    email: str = None
+    address: str = None
+    contact_person: str = None
+    notes: str = None
+
+
+class ProviderResponse(BaseModel):
+    id: int
+    name: str
+    cnpj_cpf: Optional[str] = None
+    service_type: str
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    address: Optional[str] = None
+    contact_person: Optional[str] = None
+    notes: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Employee Schemas ==========
+
+class EmployeeCreate(BaseModel):
+    name: str
+    cpf: str
+    role: str
+    phone: str = None
+    email: str = None
+    address: str = None
+    hire_date: date
+    salary: float = None
+
+
+class EmployeeResponse(BaseModel):
+    id: int
+    name: str
+    cpf: str
+    role: str
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    address: Optional[str] = None
+    hire_date: date
+    termination_date: Optional[date] = None
+    salary: Optional[float] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class EmployeeHistoryResponse(BaseModel):
+    id: int
+    employee_id: int
+    field_name: str
+    old_value: Optional[str] = None
+    new_value: Optional[str] = None
+    changed_by: Optional[int] = None
+    changed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Patrimony Schemas ==========
+
+class PatrimonyCreate(BaseModel):
+    name: str
+    description: str = None
+    category: str
+    location: str = None
+    acquisition_date: date = None
+    acquisition_value: float = None
+    current_value: float = None
+    condition: str = None
+    serial_number: str = None
+    notes: str = None
+
+
+class PatrimonyResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    category: str
+    location: Optional[str] = None
+    acquisition_date: Optional[date] = None
+    acquisition_value: Optional[float] = None
+    current_value: Optional[float] = None
+    condition: Optional[str] = None
+    serial_number: Optional[str] = None
+    notes: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class PatrimonyHistoryResponse(BaseModel):
+    id: int
+    patrimony_id: int
+    field_name: str
+    old_value: Optional[str] = None
+    new_value: Optional[str] = None
+    changed_by: Optional[int] = None
+    changed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class PatrimonyImportError(BaseModel):
+    row: int
+    serial_number: Optional[str] = None
+    error: str
+
+
+class PatrimonyImportResponse(BaseModel):
+    inserted: int
+    updated: int
+    error_count: int
+    errors: List[PatrimonyImportError]
+
+
+# ========== Audit Schemas ==========
+
+class PatrimonyAuditCreate(BaseModel):
+    name: str
+    started_by: int = None
+    notes: str = None
+
+
+class PatrimonyAuditResponse(BaseModel):
+    id: int
+    name: str
+    status: str
+    started_by: Optional[int] = None
+    started_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
+    notes: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class AuditScanBatch(BaseModel):
+    location: str
+    device_id: str = None
+    serial_numbers: List[str]
+
+
+class AuditMisplacedItem(BaseModel):
+    serial_number: str
+    expected_location: Optional[str] = None
+
+
+class AuditScanResult(BaseModel):
+    received: int
+    duplicates: int
+    found: int
+    misplaced: List[AuditMisplacedItem]
+    unknown: List[str]
+
+
+class AuditLocationSummary(BaseModel):
+    location: Optional[str] = None
+    expected: int
+    found: int
+    missing: int
+    misplaced: int
+    unknown: int
+
+
+class PatrimonyAuditReport(BaseModel):
+    audit: PatrimonyAuditResponse
+    locations: List[AuditLocationSummary]
+
+
+class PatrimonyAuditItemResponse(BaseModel):
+    id: int
+    audit_id: int
+    serial_number: str
+    patrimony_id: Optional[int] = None
+    location: Optional[str] = None
+    expected_location: Optional[str] = None
+    result: str
+    device_id: Optional[str] = None
+    scanned_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Time Clock Schemas ==========
+
+class TimePunchCreate(BaseModel):
+    employee_id: int
+    punched_at: datetime
+    kind: str
+    terminal_id: str = None
+
+
+class TimePunchBatch(BaseModel):
+    punches: List[TimePunchCreate]
+
+
+class TimePunchRejected(BaseModel):
+    index: int
+    error: str
+
+
+class TimePunchBatchResult(BaseModel):
+    received: int
+    inserted: int
+    duplicates: int
+    rejected: List[TimePunchRejected]
+
+
+class TimeClockRollupResult(BaseModel):
+    days: int
+    rows: int
+    punches: int
+
+
+class TimeClockDailyResponse(BaseModel):
+    id: int
+    employee_id: int
+    work_date: date
+    first_in: Optional[datetime] = None
+    last_out: Optional[datetime] = None
+    punches: int
+    worked_minutes: int
+    expected_minutes: int
+    overtime_minutes: int
+    is_absence: bool
+    is_incomplete: bool
+    computed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class TimeClockMonthlyResponse(BaseModel):
+    employee_id: int
+    month: str
+    days: int
+    worked_hours: float
+    expected_hours: float
+    overtime_hours: float
+    absences: int
+    incomplete_days: int
+
+
+# ========== Valuation Schemas ==========
+
+class ValuationGroup(BaseModel):
+    name: Optional[str] = None
+    count: int
+    acquisition_value: float
+    book_value: float
+    accumulated_depreciation: float
+
+
+class ValuationSummaryResponse(BaseModel):
+    method: str
+    as_of: date
+    count: int
+    acquisition_value: float
+    book_value: float
+    accumulated_depreciation: float
+    by_category: List[ValuationGroup]
+    by_location: List[ValuationGroup]
+
+
+class ValuationItemResponse(BaseModel):
+    id: int
+    name: str
+    category: str
+    location: Optional[str] = None
+    acquisition_date: date
+    acquisition_value: float
+    book_value: float
+    accumulated_depreciation: float
+
+
+# ========== Search Schemas ==========
+
+class SearchResult(BaseModel):
+    type: str
+    id: int
+    name: str
+    document: Optional[str] = None
+    description: Optional[str] = None
+    is_active: Optional[bool] = None
+    score: float
+
+
+# ========== Response Wrappers ==========
+
+class MessageResponse(BaseModel):
+    message: str
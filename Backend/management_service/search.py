@@ -0,0 +1,262 @@
+"""
+Busca aproximada de prestadores e funcionários
+
+Índice de trigramas em memória, construído na inicialização do serviço (depois
+da preparação do schema) e mantido em sincronia nas rotas de criação/exclusão.
+Se as tabelas ainda não existirem (SCHEMA_MODE=skip antes da migração), o
+índice começa vazio e a reconstrução periódica o preenche. Nomes são normalizados
+(minúsculas, sem acentos) e CPF/CNPJ perdem a pontuação, de modo que
+"joao", "João da Silva" e "123.456" encontram os mesmos registros.
+"""
+import logging
+import math
+import re
+import time
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Provider, Employee
+
+PROVIDER = "provider"
+EMPLOYEE = "employee"
+KINDS = (PROVIDER, EMPLOYEE)
+
+# Pontuação entre dígitos (CPF/CNPJ, telefones) é removida antes da tokenização
+_DIGIT_PUNCTUATION = re.compile(r"(?<=\d)[.\-/\s]+(?=\d)")
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+Key = Tuple[str, int]
+
+logger = logging.getLogger("search")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Minúsculas, sem acentos, sem pontuação e com documentos contíguos"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    text = _DIGIT_PUNCTUATION.sub("", text)
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Trigramas de cada palavra, com bordas marcadas (como o pg_trgm)"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    """
+    Índice invertido trigrama -> registros, com ranking por similaridade.
+
+    Cada registro ocupa uma posição inteira (slot); as listas de postings
+    são convertidas sob demanda em arrays NumPy para que a contagem de
+    trigramas em comum seja feita de uma vez com bincount.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, set] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._slots: Dict[Key, int] = {}
+        self._keys: List[Optional[Key]] = []
+        self._free: List[int] = []
+        self._grams: Dict[Key, FrozenSet[str]] = {}
+        self._records: Dict[Key, dict] = {}
+        self._gram_counts = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _allocate(self, key: Key) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            if slot >= len(self._gram_counts):
+                grown = np.zeros(max(64, 2 * len(self._gram_counts)), dtype=np.int32)
+                grown[:len(self._gram_counts)] = self._gram_counts
+                self._gram_counts = grown
+        self._slots[key] = slot
+        return slot
+
+    def add(self, key: Key, texts: Iterable[Optional[str]], record: dict):
+        """Indexa (ou reindexa) um registro pelos textos informados"""
+        self.remove(key)
+        grams = trigrams(" ".join(normalize(text) for text in texts if text))
+        slot = self._allocate(key)
+        self._grams[key] = grams
+        self._records[key] = record
+        self._gram_counts[slot] = len(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(slot)
+            self._arrays.pop(gram, None)
+
+    def remove(self, key: Key):
+        """Remove um registro do índice (ignora chaves ausentes)"""
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        grams = self._grams.pop(key)
+        self._records.pop(key, None)
+        self._keys[slot] = None
+        self._free.append(slot)
+        self._gram_counts[slot] = 0
+        for gram in grams:
+            self._arrays.pop(gram, None)
+            slots = self._postings.get(gram)
+            if slots is None:
+                continue
+            slots.discard(slot)
+            if not slots:
+                del self._postings[gram]
+
+    def clear(self):
+        self._postings.clear()
+        self._arrays.clear()
+        self._slots.clear()
+        self._keys.clear()
+        self._free.clear()
+        self._grams.clear()
+        self._records.clear()
+        self._gram_counts = np.zeros(0, dtype=np.int32)
+
+    def _array(self, gram: str) -> Optional[np.ndarray]:
+        array = self._arrays.get(gram)
+        if array is None:
+            slots = self._postings.get(gram)
+            if not slots:
+                return None
+            array = self._arrays[gram] = np.fromiter(slots, dtype=np.int64, count=len(slots))
+        return array
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        kind: Optional[str] = None,
+        min_score: float = 0.0
+    ) -> List[dict]:
+        """
+        Retorna os `limit` registros mais parecidos com `query`.
+
+        A pontuação é a fração dos trigramas da consulta presentes no registro
+        (busca por trecho de nome ou documento); o empate é desfeito pela
+        similaridade de Jaccard, que favorece registros mais curtos.
+        """
+        query_grams = trigrams(normalize(query))
+        arrays = [array for array in map(self._array, query_grams) if array is not None]
+        if not arrays:
+            return []
+        size = len(query_grams)
+        hits = np.bincount(np.concatenate(arrays), minlength=len(self._keys))
+        needed = max(1, math.ceil(min_score * size - 1e-9))
+        candidates = np.flatnonzero(hits >= needed)
+        shared = hits[candidates]
+        jaccard = shared / (size + self._gram_counts[candidates] - shared)
+        # Ordena por acertos e Jaccard decrescentes, depois por slot
+        order = candidates[np.lexsort((candidates, -jaccard, -shared))]
+
+        results = []
+        for slot in order:
+            key = self._keys[slot]
+            if kind is not None and key[0] != kind:
+                continue
+            results.append({**self._records[key], "score": round(hits[slot] / size, 3)})
+            if len(results) >= limit:
+                break
+        return results
+
+
+def _provider_entry(provider) -> Tuple[Key, tuple, dict]:
+    record = {
+        "type": PROVIDER,
+        "id": provider.id,
+        "name": provider.name,
+        "document": provider.cnpj_cpf,
+        "description": provider.service_type,
+        "is_active": provider.is_active
+    }
+    return (PROVIDER, provider.id), (provider.name, provider.cnpj_cpf, provider.contact_person), record
+
+
+def _employee_entry(employee) -> Tuple[Key, tuple, dict]:
+    record = {
+        "type": EMPLOYEE,
+        "id": employee.id,
+        "name": employee.name,
+        "document": employee.cpf,
+        "description": employee.role,
+        "is_active": employee.is_active
+    }
+    return (EMPLOYEE, employee.id), (employee.name, employee.cpf), record
+
+
+class DirectorySearch:
+    """Índice de prestadores e funcionários compartilhado pelo processo"""
+
+    def __init__(self):
+        self.index = TrigramIndex()
+        self._built_at: Optional[float] = None
+
+    def ensure(self, db: Session):
+        """
+        Reconstrói o índice se ainda não foi construído ou se passou o
+        intervalo configurado (alterações feitas por outros workers).
+        """
+        interval = settings.SEARCH_REBUILD_INTERVAL_SECONDS
+        if self._built_at is None or (interval and time.monotonic() - self._built_at >= interval):
+            self.rebuild(db)
+
+    def rebuild(self, db: Session):
+        """Reconstrói o índice a partir do banco (vazio se as tabelas ainda não existem)"""
+        self.index.clear()
+        try:
+            providers = db.execute(select(
+                Provider.id, Provider.name, Provider.cnpj_cpf, Provider.service_type,
+                Provider.contact_person, Provider.is_active
+            )).all()
+            employees = db.execute(select(
+                Employee.id, Employee.name, Employee.cpf, Employee.role, Employee.is_active
+            )).all()
+        except SQLAlchemyError as exc:
+            db.rollback()
+            logger.warning("Índice de busca vazio até a próxima reconstrução: %s", exc)
+            # Sem reconstrução periódica, a próxima busca tenta de novo
+            self._built_at = time.monotonic() if settings.SEARCH_REBUILD_INTERVAL_SECONDS else None
+            return
+        for provider in providers:
+            self.index.add(*_provider_entry(provider))
+        for employee in employees:
+            self.index.add(*_employee_entry(employee))
+        self._built_at = time.monotonic()
+
+    def add_provider(self, provider):
+        self.index.add(*_provider_entry(provider))
+
+    def add_employee(self, employee):
+        self.index.add(*_employee_entry(employee))
+
+    def remove_provider(self, provider_id: int):
+        self.index.remove((PROVIDER, provider_id))
+
+    def remove_employee(self, employee_id: int):
+        self.index.remove((EMPLOYEE, employee_id))
+
+    def search(self, query: str, limit: int, kind: Optional[str] = None, min_score: float = 0.0) -> List[dict]:
+        return self.index.search(query, limit, kind, min_score)
+
+
+# Índice compartilhado pelo processo
+directory = DirectorySearch()
@@ -0,0 +1,275 @@
+"""
+Reconstrução do estado de funcionários e patrimônio em uma data ("as of")
+
+O histórico guarda alterações por campo (old_value/new_value). Para não
+reaplicar a cadeia inteira a cada consulta, cada registro tem snapshots
+completos: um base (estado na criação, history_id = 0) e outro a cada
+HISTORY_SNAPSHOT_INTERVAL alterações. A reconstrução parte do último
+snapshot anterior à data e aplica no máximo um intervalo de alterações.
+
+Os snapshots são materializados nas rotas de escrita, logo após o commit
+(sync), e por `python snapshots.py sync` para histórico gravado fora da API.
+A consulta "as of" só lê (pode vir de uma réplica): registros ainda sem
+snapshot base são reconstruídos em memória, sem gravar nada. Assume-se que
+o histórico é gravado em ordem cronológica (id crescente acompanha
+changed_at).
+"""
+import argparse
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Employee, EmployeeHistory, EmployeeSnapshot, Patrimony, PatrimonyHistory, PatrimonySnapshot
+
+
+class Tracked(NamedTuple):
+    """Entidade com histórico por campo e snapshots"""
+    model: type
+    history: type
+    snapshot: type
+    key: str
+
+
+EMPLOYEES = Tracked(Employee, EmployeeHistory, EmployeeSnapshot, "employee_id")
+PATRIMONY = Tracked(Patrimony, PatrimonyHistory, PatrimonySnapshot, "patrimony_id")
+
+
+def parse_as_of(value: str) -> datetime:
+    """
+    Converte o parâmetro ?as_of=. Uma data sem hora representa o fim do dia
+    (estado após todas as alterações daquele dia).
+    """
+    try:
+        if len(value) == 10:
+            return datetime.combine(date.fromisoformat(value) + timedelta(days=1), time.min) - timedelta(microseconds=1)
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="as_of deve ser uma data (AAAA-MM-DD) ou data/hora ISO 8601")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def to_text(value) -> Optional[str]:
+    """Representação textual de um valor, no formato de old_value/new_value"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def from_text(column, text: Optional[str]):
+    """Converte um valor textual do histórico para o tipo da coluna"""
+    if text is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is bool:
+        return text.strip().lower() in ("1", "true", "t", "yes", "sim")
+    if python_type is int:
+        return int(text)
+    if python_type is Decimal:
+        return Decimal(text)
+    if python_type is float:
+        return float(text)
+    if python_type is datetime:
+        return datetime.fromisoformat(text)
+    if python_type is date:
+        return date.fromisoformat(text[:10])
+    return text
+
+
+def _fields(tracked: Tracked) -> List[str]:
+    return [column.key for column in tracked.model.__table__.columns if column.key != "id"]
+
+
+def _apply(state: Dict[str, Optional[str]], changes: Iterable) -> Dict[str, Optional[str]]:
+    for change in changes:
+        if change.field_name in state:
+            state[change.field_name] = change.new_value
+    return state
+
+
+def _build(db: Session, tracked: Tracked, ids: Optional[List[int]] = None) -> List[dict]:
+    """
+    Snapshots pendentes dos registros `ids` (ou de todos), sem gravar: o
+    base dos registros que ainda não têm nenhum e um a cada
+    HISTORY_SNAPSHOT_INTERVAL alterações desde o último.
+    """
+    model, history, snapshot, key = tracked
+    interval = settings.HISTORY_SNAPSHOT_INTERVAL
+    owner = getattr(history, key)
+    snapshot_owner = getattr(snapshot, key)
+
+    last = select(snapshot_owner.label("owner"), func.max(snapshot.history_id).label("history_id"))
+    if ids is not None:
+        last = last.where(snapshot_owner.in_(ids))
+    last = last.group_by(snapshot_owner).subquery()
+
+    # Registros sem snapshot base
+    missing = select(model.id).outerjoin(last, last.c.owner == model.id).where(last.c.owner == None)
+    if ids is not None:
+        missing = missing.where(model.id.in_(ids))
+    missing = [row.id for row in db.execute(missing)]
+
+    # Registros com pelo menos um intervalo de alterações após o último snapshot
+    pending = db.execute(
+        select(owner, last.c.history_id)
+        .join(last, last.c.owner == owner)
+        .where(history.id > last.c.history_id)
+        .group_by(owner, last.c.history_id)
+        .having(func.count(history.id) >= interval)
+    ).all()
+
+    if not missing and not pending:
+        return []
+
+    fields = _fields(tracked)
+    states: Dict[int, Dict[str, Optional[str]]] = {}
+    since: Dict[int, int] = {}
+    if missing:
+        for row in db.execute(select(model.__table__).where(model.id.in_(missing))).mappings():
+            states[row["id"]] = {field: to_text(row[field]) for field in fields}
+            since[row["id"]] = 0
+    if pending:
+        snapshots = db.execute(
+            select(snapshot_owner, snapshot.data).join(
+                last, and_(last.c.owner == snapshot_owner, last.c.history_id == snapshot.history_id)
+            ).where(snapshot_owner.in_([owner_id for owner_id, _ in pending]))
+        ).all()
+        for owner_id, data in snapshots:
+            states[owner_id] = json.loads(data)
+        since.update(pending)
+
+    changes: Dict[int, list] = {owner_id: [] for owner_id in states}
+    rows = db.execute(
+        select(owner, history.id, history.field_name, history.old_value, history.new_value, history.changed_at)
+        .where(owner.in_(list(states)))
+        .order_by(history.id)
+    ).all()
+    for row in rows:
+        if row.id > since[row[0]]:
+            changes[row[0]].append(row)
+
+    created = {
+        row.id: row.created_at
+        for row in db.execute(select(model.id, model.created_at).where(model.id.in_(missing)))
+    } if missing else {}
+
+    new_snapshots = []
+    for owner_id, state in states.items():
+        entity_changes = changes[owner_id]
+        if since[owner_id] == 0:
+            # Estado na criação: desfaz todas as alterações a partir do atual
+            for change in reversed(entity_changes):
+                if change.field_name in state:
+                    state[change.field_name] = change.old_value
+            first_change = entity_changes[0].changed_at if entity_changes else None
+            taken_at = min(filter(None, (created[owner_id], first_change)), default=datetime.utcnow())
+            new_snapshots.append({key: owner_id, "history_id": 0, "taken_at": taken_at, "data": json.dumps(state)})
+        for start in range(0, len(entity_changes) - interval + 1, interval):
+            block = entity_changes[start:start + interval]
+            _apply(state, block)
+            new_snapshots.append({
+                key: owner_id, "history_id": block[-1].id, "taken_at": block[-1].changed_at, "data": json.dumps(state)
+            })
+
+    return new_snapshots
+
+
+def sync(db: Session, tracked: Tracked, ids: Optional[List[int]] = None) -> int:
+    """Materializa os snapshots pendentes (chamar nas escritas, após o commit); devolve quantos"""
+    new_snapshots = _build(db, tracked, ids)
+    if new_snapshots:
+        try:
+            db.execute(tracked.snapshot.__table__.insert(), new_snapshots)
+            db.commit()
+        except IntegrityError:
+            # Outro worker materializou os mesmos snapshots
+            db.rollback()
+            return 0
+    return len(new_snapshots)
+
+
+def reconstruct(db: Session, tracked: Tracked, ids: List[int], as_of: datetime) -> List[dict]:
+    """Estado dos registros `ids` em `as_of` (omitindo os que ainda não existiam); somente leitura"""
+    if not ids:
+        return []
+    model, history, snapshot, key = tracked
+    owner = getattr(history, key)
+    snapshot_owner = getattr(snapshot, key)
+
+    # Último snapshot de cada registro tirado até a data e o seguinte, que
+    # limita a faixa de alterações a reaplicar (no máximo um intervalo)
+    bounds = (
+        select(
+            snapshot_owner.label("owner"),
+            func.max(case((snapshot.taken_at <= as_of, snapshot.history_id))).label("history_id"),
+            func.min(case((snapshot.taken_at > as_of, snapshot.history_id))).label("next_id")
+        )
+        .where(snapshot_owner.in_(ids))
+        .group_by(snapshot_owner)
+        .subquery()
+    )
+    snapshots = db.execute(
+        select(snapshot_owner, snapshot.history_id, bounds.c.next_id, snapshot.data).join(
+            bounds, and_(bounds.c.owner == snapshot_owner, bounds.c.history_id == snapshot.history_id)
+        )
+    ).all()
+
+    # Registros sem snapshot gravado (histórico de fora da API, antes do job): snapshots em memória
+    stored = set(db.scalars(select(snapshot_owner).where(snapshot_owner.in_(ids)).distinct()))
+    unsynced = [owner_id for owner_id in ids if owner_id not in stored]
+    if unsynced:
+        built: Dict[int, list] = {}
+        for item in _build(db, tracked, unsynced):
+            built.setdefault(item[key], []).append(item)
+        for owner_id, items in built.items():
+            taken = [item for item in items if item["taken_at"] <= as_of]
+            if taken:
+                following = [item["history_id"] for item in items if item["taken_at"] > as_of]
+                snapshots.append((owner_id, taken[-1]["history_id"], following[0] if following else None, taken[-1]["data"]))
+    if not snapshots:
+        return []
+    states = {owner_id: json.loads(data) for owner_id, _, _, data in snapshots}
+
+    ranges = []
+    for owner_id, history_id, next_id, _ in snapshots:
+        condition = and_(owner == owner_id, history.id > history_id)
+        ranges.append(condition if next_id is None else and_(condition, history.id <= next_id))
+    deltas = db.execute(
+        select(owner, history.field_name, history.new_value)
+        .where(or_(*ranges), history.changed_at <= as_of)
+        .order_by(history.id)
+    ).all()
+    for change in deltas:
+        state = states[change[0]]
+        if change.field_name in state:
+            state[change.field_name] = change.new_value
+
+    columns = model.__table__.columns
+    return [
+        {"id": owner_id, **{field: from_text(columns[field], text) for field, text in states[owner_id].items() if field in columns}}
+        for owner_id in ids if owner_id in states
+    ]
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Snapshots do histórico (consultas as_of)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("sync", help="Materializa os snapshots pendentes de funcionários e patrimônio")
+    parser.parse_args()
+    with SessionLocal() as session:
+        for name, tracked in (("employees", EMPLOYEES), ("patrimony", PATRIMONY)):
+            print(f"{name}: {sync(session, tracked)} snapshot(s) gravados")
@@ -0,0 +1,277 @@
+"""
+Leitura e escrita de planilhas (CSV e XLSX) em streaming
+
+A escrita gera o arquivo em blocos, linha a linha, sem montar a planilha
+em memória. O XLSX é um pacote ZIP com XML (SpreadsheetML) escrito com a
+biblioteca padrão; a leitura percorre a aba com iterparse, liberando cada
+linha após processá-la.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import BinaryIO, Iterable, Iterator, List, Sequence
+from xml.etree.ElementTree import iterparse, parse
+from xml.sax.saxutils import escape
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+# Caracteres de controle não permitidos em XML 1.0
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Data base dos números seriais de data do Excel
+_EXCEL_EPOCH = date(1899, 12, 30)
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+# ========== CSV ==========
+
+class _LineBuffer:
+    """Destino do csv.writer que acumula a linha atual"""
+
+    def __init__(self):
+        self.line = ""
+
+    def write(self, text: str):
+        self.line += text
+
+
+def stream_csv(header: Sequence[str], rows: Iterable[Sequence], batch_size: int = 500) -> Iterator[bytes]:
+    """Gera o CSV (UTF-8 com BOM, para abrir corretamente no Excel) em blocos"""
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    chunk = ["﻿" + buffer.line]
+    for row in rows:
+        buffer.line = ""
+        writer.writerow([_text(value) for value in row])
+        chunk.append(buffer.line)
+        if len(chunk) >= batch_size:
+            yield "".join(chunk).encode()
+            chunk = []
+    if chunk:
+        yield "".join(chunk).encode()
+
+
+def read_csv(file: BinaryIO) -> Iterator[List[str]]:
+    """Linhas do CSV, detectando o separador (vírgula ou ponto e vírgula)"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    sample = text.readline()
+    delimiter = ";" if sample.count(";") > sample.count(",") else ","
+    yield from csv.reader(_chain(sample, text), delimiter=delimiter)
+
+
+def _chain(first: str, rest: Iterable[str]) -> Iterator[str]:
+    if first:
+        yield first
+    yield from rest
+
+
+# ========== XLSX ==========
+
+class _ChunkSink(io.RawIOBase):
+    """Arquivo somente escrita e não posicionável que acumula bytes para o gerador"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell(reference: str, value) -> str:
+    if value is None or value == "":
+        return ""
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML.sub("", _text(value)))
+    return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<Relationships xmlns="{_PACKAGE_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<Relationships xmlns="{_PACKAGE_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def stream_xlsx(
+    header: Sequence[str],
+    rows: Iterable[Sequence],
+    sheet_name: str = "Planilha1",
+    batch_size: int = 500
+) -> Iterator[bytes]:
+    """Gera um XLSX de uma aba em blocos, sem manter a planilha em memória"""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr("_rels/.rels", _ROOT_RELS)
+        package.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        package.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>'
+            f'<sheet name="{escape(sheet_name)}" sheetId="1" r:id="rId1"/>'
+            '</sheets></workbook>'
+        )
+        yield sink.drain()
+
+        letters = [_column_letter(index) for index in range(len(header))]
+        with package.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<worksheet xmlns="{_MAIN_NS}"><sheetData>'.encode()
+            )
+            number = 1
+            sheet.write(_row(number, letters, header).encode())
+            pending = 0
+            for row in rows:
+                number += 1
+                sheet.write(_row(number, letters, row).encode())
+                pending += 1
+                if pending >= batch_size:
+                    pending = 0
+                    yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+def _row(number: int, letters: List[str], values: Sequence) -> str:
+    cells = "".join(_cell(f"{letter}{number}", value) for letter, value in zip(letters, values))
+    return f'<row r="{number}">{cells}</row>'
+
+
+def _column_index(reference: str) -> int:
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _first_sheet(package: zipfile.ZipFile) -> str:
+    """Caminho da primeira aba declarada em xl/workbook.xml"""
+    try:
+        workbook = parse(package.open("xl/workbook.xml")).getroot()
+        sheet = workbook.find(f"{{{_MAIN_NS}}}sheets/{{{_MAIN_NS}}}sheet")
+        relation_id = sheet.get(f"{{{_REL_NS}}}id")
+        relations = parse(package.open("xl/_rels/workbook.xml.rels")).getroot()
+        for relation in relations:
+            if relation.get("Id") == relation_id:
+                target = relation.get("Target").lstrip("/")
+                return target if target.startswith("xl/") else f"xl/{target}"
+    except (KeyError, AttributeError):
+        pass
+    return "xl/worksheets/sheet1.xml"
+
+
+def _shared_strings(package: zipfile.ZipFile) -> List[str]:
+    try:
+        source = package.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings = []
+    for _, element in iterparse(source):
+        if element.tag == f"{{{_MAIN_NS}}}si":
+            strings.append("".join(text.text or "" for text in element.iter(f"{{{_MAIN_NS}}}t")))
+            element.clear()
+    return strings
+
+
+def read_xlsx(file: BinaryIO) -> Iterator[List]:
+    """
+    Linhas da primeira aba. Células de texto viram str e numéricas viram
+    float (datas digitadas no Excel chegam como número serial; ver excel_date).
+    """
+    package = zipfile.ZipFile(file)
+    strings = _shared_strings(package)
+    row_tag = f"{{{_MAIN_NS}}}row"
+    cell_tag = f"{{{_MAIN_NS}}}c"
+    value_tag = f"{{{_MAIN_NS}}}v"
+    text_tag = f"{{{_MAIN_NS}}}t"
+    for _, element in iterparse(package.open(_first_sheet(package))):
+        if element.tag != row_tag:
+            continue
+        values: List = []
+        for position, cell in enumerate(element.iter(cell_tag)):
+            reference = cell.get("r")
+            index = _column_index(reference) if reference else position
+            kind = cell.get("t")
+            raw = cell.findtext(value_tag)
+            if kind == "inlineStr":
+                value = "".join(text.text or "" for text in cell.iter(text_tag))
+            elif raw is None:
+                value = None
+            elif kind == "s":
+                value = strings[int(raw)]
+            elif kind == "b":
+                value = raw == "1"
+            elif kind in ("str", "e"):
+                value = raw
+            else:
+                value = float(raw)
+            values.extend([None] * (index - len(values) + 1))
+            values[index] = value
+        element.clear()
+        yield values
+
+
+def excel_date(value) -> date:
+    """Converte um número serial de data do Excel"""
+    return _EXCEL_EPOCH + timedelta(days=int(value))
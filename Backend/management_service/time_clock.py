@@ -0,0 +1,316 @@
+"""
+Ponto eletrônico: ingestão de marcações e consolidação diária
+
+As marcações (entrada/saída) são gravadas em lote em uma tabela somente de
+inserção; reenvios do terminal são descartados pela chave única
+(employee_id, punched_at). A consolidação em time_clock_daily é idempotente:
+cada dia afetado é recalculado por completo a partir das marcações e
+substituído na mesma transação que avança a marca d'água (último id de
+marcação processado e último dia com faltas apuradas).
+
+Um turno começa em uma entrada e termina na saída seguinte, desde que
+dentro de TIME_CLOCK_MAX_SHIFT_HOURS; ele conta no dia da entrada, o que
+cobre os turnos noturnos da portaria. Relatórios leem apenas a consolidação.
+
+Todas as marcações ficam no relógio local (TIME_CLOCK_TIMEZONE): as que
+chegam com fuso são convertidas para ele, as sem fuso já são locais. Assim o
+dia de trabalho e a jornada prevista saem do mesmo relógio para todas.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Integer, and_, cast, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Employee, TimeClockDaily, TimeClockRollupState, TimePunch
+
+PUNCH_IN = "in"
+PUNCH_OUT = "out"
+PUNCH_KINDS = (PUNCH_IN, PUNCH_OUT)
+
+DayKey = Tuple[int, date]
+
+
+def _insert_ignore(model):
+    """INSERT que descarta violações de chave única (reenvios); Core, para expor rowcount"""
+    return insert(model.__table__).prefix_with("OR IGNORE", dialect="sqlite").prefix_with("IGNORE", dialect="mysql")
+
+
+def ingest(db: Session, punches: List[dict]) -> Tuple[int, List[dict]]:
+    """
+    Grava um lote de marcações. Retorna (gravadas, rejeitadas), onde as
+    rejeitadas trazem o índice no lote e o motivo.
+    """
+    rejected = []
+    employee_ids = {punch["employee_id"] for punch in punches}
+    known = set(db.scalars(select(Employee.id).where(Employee.id.in_(employee_ids)))) if employee_ids else set()
+    rows = []
+    local = ZoneInfo(settings.TIME_CLOCK_TIMEZONE)
+    for position, punch in enumerate(punches):
+        if punch["employee_id"] not in known:
+            rejected.append({"index": position, "error": "Funcionário não encontrado"})
+        elif punch["kind"] not in PUNCH_KINDS:
+            rejected.append({"index": position, "error": "kind deve ser in ou out"})
+        else:
+            punched_at = punch["punched_at"]
+            if punched_at.tzinfo is not None:
+                # Mesmo instante com qualquer fuso: gravado no horário local, sem tzinfo
+                punched_at = punched_at.astimezone(local).replace(tzinfo=None)
+            rows.append({
+                "employee_id": punch["employee_id"],
+                "punched_at": punched_at.replace(microsecond=0),
+                "kind": punch["kind"],
+                "terminal_id": punch.get("terminal_id")
+            })
+    inserted = 0
+    if rows:
+        inserted = db.execute(_insert_ignore(TimePunch), rows).rowcount
+        db.commit()
+    return inserted, rejected
+
+
+def expected_minutes(day: date) -> int:
+    """Jornada prevista no dia (0 fora dos dias úteis configurados)"""
+    return settings.TIME_CLOCK_EXPECTED_MINUTES if day.weekday() in settings.TIME_CLOCK_WORKDAYS else 0
+
+
+def _shifts(punches: List[Tuple[datetime, str]]) -> Tuple[List[Tuple[datetime, datetime]], List[datetime]]:
+    """Pareia entradas e saídas em ordem; retorna (turnos, marcações órfãs)"""
+    max_shift = timedelta(hours=settings.TIME_CLOCK_MAX_SHIFT_HOURS)
+    shifts, orphans = [], []
+    opened: Optional[datetime] = None
+    for moment, kind in punches:
+        if kind == PUNCH_IN:
+            if opened is not None:
+                orphans.append(opened)
+            opened = moment
+        elif opened is not None and moment - opened <= max_shift:
+            shifts.append((opened, moment))
+            opened = None
+        else:
+            if opened is not None:
+                orphans.append(opened)
+                opened = None
+            orphans.append(moment)
+    if opened is not None:
+        orphans.append(opened)
+    return shifts, orphans
+
+
+def _employment(db: Session, employee_ids: Iterable[int]) -> Dict[int, Tuple[date, Optional[date]]]:
+    ids = list(employee_ids)
+    if not ids:
+        return {}
+    return {
+        row.id: (row.hire_date, row.termination_date)
+        for row in db.execute(
+            select(Employee.id, Employee.hire_date, Employee.termination_date).where(Employee.id.in_(ids))
+        )
+    }
+
+
+def _compute(db: Session, days: Set[DayKey], through: date) -> List[dict]:
+    """
+    Recalcula os dias informados a partir das marcações. Dias depois de
+    `through` ainda não terminaram: só geram linha se já tiverem marcações,
+    e nunca contam como falta.
+    """
+    if not days:
+        return []
+    margin = timedelta(hours=settings.TIME_CLOCK_MAX_SHIFT_HOURS)
+    first = datetime.combine(min(day for _, day in days), time.min) - margin
+    last = datetime.combine(max(day for _, day in days) + timedelta(days=1), time.min) + margin
+    employee_ids = {employee_id for employee_id, _ in days}
+
+    punches: Dict[int, List[Tuple[datetime, str]]] = {}
+    for employee_id, punched_at, kind in db.execute(
+        select(TimePunch.employee_id, TimePunch.punched_at, TimePunch.kind)
+        .where(TimePunch.employee_id.in_(employee_ids), TimePunch.punched_at >= first, TimePunch.punched_at < last)
+        .order_by(TimePunch.employee_id, TimePunch.punched_at)
+    ):
+        punches.setdefault(employee_id, []).append((punched_at, kind))
+
+    # Turnos e marcações por (funcionário, dia da marcação/entrada)
+    worked: Dict[DayKey, List[Tuple[datetime, datetime]]] = {}
+    orphans: Dict[DayKey, List[datetime]] = {}
+    counts: Dict[DayKey, int] = {}
+    for employee_id, employee_punches in punches.items():
+        shifts, loose = _shifts(employee_punches)
+        for start, end in shifts:
+            worked.setdefault((employee_id, start.date()), []).append((start, end))
+        for moment in loose:
+            orphans.setdefault((employee_id, moment.date()), []).append(moment)
+        for moment, _ in employee_punches:
+            key = (employee_id, moment.date())
+            counts[key] = counts.get(key, 0) + 1
+
+    employment = _employment(db, employee_ids)
+    rows = []
+    for key in sorted(days):
+        employee_id, day = key
+        hired, terminated = employment.get(employee_id, (None, None))
+        employed = (hired is None or hired <= day) and (terminated is None or day <= terminated)
+        shifts = worked.get(key, [])
+        minutes = sum(int((end - start).total_seconds() // 60) for start, end in shifts)
+        expected = expected_minutes(day) if employed else 0
+        punched = counts.get(key, 0)
+        if not shifts and not punched and (not expected or day > through):
+            continue
+        rows.append({
+            "employee_id": employee_id,
+            "work_date": day,
+            "first_in": shifts[0][0] if shifts else None,
+            "last_out": shifts[-1][1] if shifts else None,
+            "punches": punched,
+            "worked_minutes": minutes,
+            "expected_minutes": expected,
+            "overtime_minutes": max(0, minutes - expected),
+            "is_absence": expected > 0 and not shifts and not punched and day <= through,
+            "is_incomplete": key in orphans,
+            "computed_at": datetime.utcnow()
+        })
+    return rows
+
+
+def _replace(db: Session, days: Set[DayKey], rows: List[dict]):
+    """Substitui a consolidação dos dias informados (na transação corrente)"""
+    by_employee: Dict[int, List[date]] = {}
+    for employee_id, day in days:
+        by_employee.setdefault(employee_id, []).append(day)
+    for employee_id, dates in by_employee.items():
+        for start in range(0, len(dates), 500):
+            db.execute(delete(TimeClockDaily).where(
+                TimeClockDaily.employee_id == employee_id,
+                TimeClockDaily.work_date.in_(dates[start:start + 500])
+            ))
+    for start in range(0, len(rows), settings.TIME_CLOCK_ROLLUP_BATCH_SIZE):
+        db.execute(insert(TimeClockDaily), rows[start:start + settings.TIME_CLOCK_ROLLUP_BATCH_SIZE])
+
+
+def _state(db: Session) -> TimeClockRollupState:
+    # FOR UPDATE serializa consolidações concorrentes (cron em mais de um host)
+    state = db.get(TimeClockRollupState, 1, with_for_update=True)
+    if state is None:
+        state = TimeClockRollupState(id=1, last_punch_id=0)
+        db.add(state)
+    return state
+
+
+def _employees_between(db: Session, start: date, end: date) -> List[int]:
+    """Funcionários contratados em algum dia do intervalo"""
+    return list(db.scalars(
+        select(Employee.id).where(
+            Employee.hire_date <= end,
+            (Employee.termination_date == None) | (Employee.termination_date >= start)
+        )
+    ))
+
+
+def _dates(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def rollup(db: Session, until: Optional[date] = None) -> dict:
+    """
+    Consolidação incremental: recalcula os dias com marcações novas e os
+    vizinhos dentro de TIME_CLOCK_MAX_SHIFT_HOURS (uma marcação pode formar
+    turno com outra do dia anterior ou seguinte) e apura as faltas dos dias
+    ainda não apurados até `until` (padrão: ontem). Só dias até `until` (ou
+    até o último já apurado) são recalculados; os seguintes entram na
+    apuração das próximas execuções.
+    """
+    until = until or date.today() - timedelta(days=1)
+    state = _state(db)
+    new_punches = db.execute(
+        select(TimePunch.id, TimePunch.employee_id, TimePunch.punched_at)
+        .where(TimePunch.id > state.last_punch_id)
+        .order_by(TimePunch.id)
+    ).all()
+
+    margin = timedelta(hours=settings.TIME_CLOCK_MAX_SHIFT_HOURS)
+    through = max(until, state.absences_through or until)
+    days: Set[DayKey] = set()
+    last_punch_id = state.last_punch_id
+    for punch_id, employee_id, punched_at in new_punches:
+        last_day = min((punched_at + margin).date(), through)
+        days.update((employee_id, day) for day in _dates((punched_at - margin).date(), last_day))
+        last_punch_id = punch_id
+
+    # Faltas: dias ainda não apurados, a partir da primeira marcação existente
+    absences_from = state.absences_through + timedelta(days=1) if state.absences_through else None
+    if absences_from is None:
+        first_punch = db.scalar(select(func.min(TimePunch.punched_at)))
+        absences_from = first_punch.date() if first_punch else until + timedelta(days=1)
+    if absences_from <= until:
+        # Inclui quem marcou ponto fora do período de contrato, cujos dias ficaram para esta apuração
+        punched = db.scalars(
+            select(TimePunch.employee_id).distinct().where(
+                TimePunch.punched_at >= datetime.combine(absences_from, time.min),
+                TimePunch.punched_at < datetime.combine(until + timedelta(days=1), time.min)
+            )
+        )
+        for employee_id in set(_employees_between(db, absences_from, until)) | set(punched):
+            days.update((employee_id, day) for day in _dates(absences_from, until))
+
+    rows = _compute(db, days, through)
+    _replace(db, days, rows)
+    state.last_punch_id = last_punch_id
+    state.absences_through = through
+    db.commit()
+    return {"days": len(days), "rows": len(rows), "punches": len(new_punches)}
+
+
+def rebuild(db: Session, start: date, end: date) -> dict:
+    """Recalcula por completo a consolidação de um período (correções)"""
+    days = {
+        (employee_id, day)
+        for employee_id in _employees_between(db, start, end)
+        for day in _dates(start, end)
+    }
+    rows = _compute(db, days, date.today() - timedelta(days=1))
+    _replace(db, days, rows)
+    db.commit()
+    return {"days": len(days), "rows": len(rows), "punches": 0}
+
+
+def month_range(month: str) -> Tuple[date, date]:
+    """Primeiro e último dia de um mês AAAA-MM"""
+    first = datetime.strptime(month, "%Y-%m").date()
+    following = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, following - timedelta(days=1)
+
+
+def monthly_report(db: Session, month: str, employee_id: Optional[int] = None) -> List[dict]:
+    """Totais do mês por funcionário, lidos apenas da consolidação diária"""
+    first, last = month_range(month)
+    statement = (
+        select(
+            TimeClockDaily.employee_id,
+            func.count(TimeClockDaily.id).label("days"),
+            func.sum(TimeClockDaily.worked_minutes).label("worked_minutes"),
+            func.sum(TimeClockDaily.expected_minutes).label("expected_minutes"),
+            func.sum(TimeClockDaily.overtime_minutes).label("overtime_minutes"),
+            func.sum(cast(TimeClockDaily.is_absence, Integer)).label("absences"),
+            func.sum(cast(TimeClockDaily.is_incomplete, Integer)).label("incomplete_days")
+        )
+        .where(and_(TimeClockDaily.work_date >= first, TimeClockDaily.work_date <= last))
+        .group_by(TimeClockDaily.employee_id)
+        .order_by(TimeClockDaily.employee_id)
+    )
+    if employee_id is not None:
+        statement = statement.where(TimeClockDaily.employee_id == employee_id)
+    return [
+        {
+            "employee_id": row.employee_id,
+            "month": month,
+            "days": row.days,
+            "worked_hours": round((row.worked_minutes or 0) / 60, 2),
+            "expected_hours": round((row.expected_minutes or 0) / 60, 2),
+            "overtime_hours": round((row.overtime_minutes or 0) / 60, 2),
+            "absences": int(row.absences or 0),
+            "incomplete_days": int(row.incomplete_days or 0)
+        }
+        for row in db.execute(statement)
+    ]
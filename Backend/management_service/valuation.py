@@ -0,0 +1,206 @@
+"""
+Motor de depreciação e valoração do patrimônio
+
+O inventário é carregado uma única vez em arrays NumPy (uma coluna por
+array) e os valores contábeis de todos os bens são calculados em uma só
+passada vetorizada para qualquer data de referência. Os resumos por
+categoria/local ficam em cache (LRU, até VALUATION_CACHE_MAX_ENTRIES) até a
+próxima alteração do patrimônio.
+"""
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Patrimony
+
+STRAIGHT_LINE = "straight_line"
+DECLINING_BALANCE = "declining_balance"
+METHODS = (STRAIGHT_LINE, DECLINING_BALANCE)
+
+DAYS_PER_YEAR = 365.25
+
+
+class Inventory:
+    """Colunas do patrimônio ativo com data e valor de aquisição"""
+
+    def __init__(self, rows: List[Tuple]):
+        ids, names, categories, locations, dates, values = zip(*rows) if rows else ((),) * 6
+        self.ids = np.array(ids, dtype=np.int64)
+        self.names = np.array(names, dtype=object)
+        self.acquisition_dates = np.array(dates, dtype="datetime64[D]")
+        self.acquisition_values = np.array(values, dtype=np.float64)
+        # Códigos inteiros por categoria/local para agregações com bincount
+        self.categories, self.category_codes = np.unique(np.array(categories, dtype=object), return_inverse=True)
+        self.locations, self.location_codes = np.unique(
+            np.array([location or "" for location in locations], dtype=object), return_inverse=True
+        )
+        lives = np.array([
+            settings.DEPRECIATION_USEFUL_LIFE_YEARS.get(category, settings.DEPRECIATION_DEFAULT_USEFUL_LIFE_YEARS)
+            for category in self.categories
+        ], dtype=np.float64)
+        self.useful_lives = lives[self.category_codes]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def mask(self, category: Optional[str] = None, location: Optional[str] = None) -> np.ndarray:
+        """Seleção por categoria e/ou local comparando os códigos inteiros"""
+        selected = np.ones(len(self), dtype=bool)
+        if category is not None:
+            selected &= self.category_codes == _code(self.categories, category)
+        if location is not None:
+            selected &= self.location_codes == _code(self.locations, location)
+        return selected
+
+
+def _code(labels: np.ndarray, value: str) -> int:
+    """Código de um rótulo em labels (ordenado), ou -1 se ausente"""
+    index = int(np.searchsorted(labels, value)) if len(labels) else 0
+    return index if index < len(labels) and labels[index] == value else -1
+
+
+def book_values(inventory: Inventory, method: str, as_of: date) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Valores contábeis de todos os bens na data `as_of`.
+    Retorna (valores, owned), onde owned indica bens já adquiridos na data.
+    """
+    ages = (np.datetime64(as_of, "D") - inventory.acquisition_dates).astype(np.float64) / DAYS_PER_YEAR
+    owned = ages >= 0
+    ages = np.clip(ages, 0, None)
+    cost = inventory.acquisition_values
+    salvage = cost * settings.DEPRECIATION_SALVAGE_RATE
+
+    if method == STRAIGHT_LINE:
+        consumed = np.minimum(ages / inventory.useful_lives, 1.0)
+        values = cost - (cost - salvage) * consumed
+    elif method == DECLINING_BALANCE:
+        rate = np.minimum(settings.DEPRECIATION_DECLINING_FACTOR / inventory.useful_lives, 1.0)
+        values = np.maximum(cost * (1.0 - rate) ** ages, salvage)
+        # Ao fim da vida útil o bem é baixado ao valor residual
+        values = np.where(ages >= inventory.useful_lives, salvage, values)
+    else:
+        raise ValueError(f"Método de depreciação desconhecido: {method}")
+    return np.round(values, 2), owned
+
+
+def _group(codes: np.ndarray, labels: np.ndarray, selected: np.ndarray, cost: np.ndarray, values: np.ndarray) -> List[dict]:
+    size = len(labels)
+    counts = np.bincount(codes[selected], minlength=size)
+    costs = np.bincount(codes[selected], weights=cost[selected], minlength=size)
+    books = np.bincount(codes[selected], weights=values[selected], minlength=size)
+    return [
+        {
+            "name": labels[i] or None,
+            "count": int(counts[i]),
+            "acquisition_value": round(float(costs[i]), 2),
+            "book_value": round(float(books[i]), 2),
+            "accumulated_depreciation": round(float(costs[i] - books[i]), 2)
+        }
+        for i in np.flatnonzero(counts)
+    ]
+
+
+class ValuationEngine:
+    """Mantém o inventário em memória e o cache de resumos de valoração"""
+
+    def __init__(self):
+        self._inventory: Optional[Inventory] = None
+        self._loaded_at = 0.0
+        self._cache: "OrderedDict[tuple, Tuple[float, dict]]" = OrderedDict()
+
+    def invalidate(self):
+        """Descarta inventário e resumos (chamar após alterações no patrimônio)"""
+        self._inventory = None
+        self._cache.clear()
+
+    def inventory(self, db: Session) -> Inventory:
+        """Inventário em memória, recarregado após o TTL (alterações de outros workers)"""
+        expired = time.monotonic() - self._loaded_at >= settings.VALUATION_CACHE_TTL_SECONDS
+        if self._inventory is None or expired:
+            rows = db.execute(
+                select(
+                    Patrimony.id, Patrimony.name, Patrimony.category, Patrimony.location,
+                    Patrimony.acquisition_date, Patrimony.acquisition_value
+                ).where(
+                    Patrimony.is_active == True,
+                    Patrimony.acquisition_date != None,
+                    Patrimony.acquisition_value != None
+                ).order_by(Patrimony.id)
+            ).all()
+            self._inventory = Inventory(rows)
+            self._loaded_at = time.monotonic()
+        return self._inventory
+
+    def summary(
+        self,
+        db: Session,
+        method: str,
+        as_of: date,
+        category: Optional[str] = None,
+        location: Optional[str] = None
+    ) -> dict:
+        """Totais da carteira e agregados por categoria e local (com cache)"""
+        key = (method, as_of, category, location)
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < settings.VALUATION_CACHE_TTL_SECONDS:
+            self._cache.move_to_end(key)
+            return cached[1]
+
+        inventory = self.inventory(db)
+        values, owned = book_values(inventory, method, as_of)
+        selected = owned & inventory.mask(category, location)
+        cost = inventory.acquisition_values
+        total_cost = float(cost[selected].sum())
+        total_book = float(values[selected].sum())
+        result = {
+            "method": method,
+            "as_of": as_of,
+            "count": int(selected.sum()),
+            "acquisition_value": round(total_cost, 2),
+            "book_value": round(total_book, 2),
+            "accumulated_depreciation": round(total_cost - total_book, 2),
+            "by_category": _group(inventory.category_codes, inventory.categories, selected, cost, values),
+            "by_location": _group(inventory.location_codes, inventory.locations, selected, cost, values)
+        }
+        self._cache[key] = (time.monotonic(), result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > settings.VALUATION_CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+        return result
+
+    def items(
+        self,
+        db: Session,
+        method: str,
+        as_of: date,
+        category: Optional[str] = None,
+        location: Optional[str] = None
+    ) -> List[dict]:
+        """Valor contábil de cada bem"""
+        inventory = self.inventory(db)
+        values, owned = book_values(inventory, method, as_of)
+        selected = np.flatnonzero(owned & inventory.mask(category, location))
+        cost = inventory.acquisition_values
+        return [
+            {
+                "id": int(inventory.ids[i]),
+                "name": inventory.names[i],
+                "category": inventory.categories[inventory.category_codes[i]],
+                "location": inventory.locations[inventory.location_codes[i]] or None,
+                "acquisition_date": inventory.acquisition_dates[i].item(),
+                "acquisition_value": float(cost[i]),
+                "book_value": float(values[i]),
+                "accumulated_depreciation": round(float(cost[i] - values[i]), 2)
+            }
+            for i in selected
+        ]
+
+
+# Motor compartilhado pelo processo
+valuation_engine = ValuationEngine()
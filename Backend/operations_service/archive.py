@@ -0,0 +1,346 @@
+"""
+Arquivamento de visitantes e logs antigos em armazenamento frio
+
+Visitantes com saída registrada e entrada há mais de
+ARCHIVE_VISITORS_AFTER_DAYS dias, e logs com mais de ARCHIVE_LOGS_AFTER_DAYS
+dias, saem das tabelas e vão para arquivos Parquet (colunares, compressão
+ARCHIVE_COMPRESSION) em disco local, particionados por shard, tabela e mês:
+
+    ARCHIVE_DIR/<shard>/<tabela>/<AAAA-MM>/<primeiro id>-<último id>.parquet
+
+O arquivamento anda em lotes de ARCHIVE_BATCH_SIZE linhas (em ordem de id):
+cada lote é gravado (arquivo temporário, fsync e rename) e só depois apagado
+do banco, numa transação curta por lote. Se o processo cair entre as duas
+etapas, as linhas ficam nos dois lugares até a próxima execução arquivá-las
+de novo; as leituras descartam repetições pelo id.
+
+Uso (cron, fora do horário de pico; em todos os shards):
+    python archive.py run [--dry-run]
+    python archive.py status
+
+As leituras (/api/audit e o histórico de /api/visitors) só abrem o arquivo
+quando o intervalo pedido alcança meses arquivados, e então apenas as
+partições desses meses, com os filtros aplicados sobre as estatísticas de
+cada arquivo.
+"""
+import argparse
+import os
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from fastapi.responses import Response
+from sqlalchemy import DateTime, Integer, delete, func, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from listing import ListParams, resolve_columns
+from models import Log, Visitor
+from recurrence import to_naive_utc
+from serialization import json_response, rows_to_dicts
+from sharding import shards
+
+MONTH_FORMAT = "%Y-%m"
+
+
+def _arrow_type(column) -> pa.DataType:
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, DateTime):
+        # Como no banco: UTC sem fuso
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _month(value: datetime) -> date:
+    return value.date().replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _month_start(month: date) -> datetime:
+    return datetime.combine(month, time.min)
+
+
+def merge(hot: Iterable[dict], cold: Iterable[dict], key, reverse: bool = False) -> List[dict]:
+    """Junta linhas do banco e do arquivo sem repetir ids (a do banco prevalece), ordenadas por key"""
+    rows = {row["id"]: row for row in cold}
+    rows.update((row["id"], row) for row in hot)
+    return sorted(rows.values(), key=key, reverse=reverse)
+
+
+class ArchivedTable:
+    """Tabela cujas linhas antigas são movidas para Parquet, por mês da coluna de tempo"""
+
+    def __init__(self, model, time_column: str, after_days: int, archivable: Iterable = ()):
+        self.model = model
+        self.table = model.__table__
+        self.name = self.table.name
+        self.time_column = time_column
+        self.after_days = after_days
+        self.archivable = tuple(archivable)
+        self.schema = pa.schema([pa.field(column.key, _arrow_type(column)) for column in self.table.columns])
+
+    def directory(self, shard: str) -> Path:
+        return Path(settings.ARCHIVE_DIR) / shard / self.name
+
+    def months(self, shard: str) -> List[date]:
+        """Meses arquivados do shard, em ordem"""
+        try:
+            names = os.listdir(self.directory(shard))
+        except FileNotFoundError:
+            return []
+        months = []
+        for name in names:
+            try:
+                months.append(datetime.strptime(name, MONTH_FORMAT).date())
+            except ValueError:
+                continue
+        return sorted(months)
+
+    def _months_in(self, shard: str, start: Optional[datetime], end: Optional[datetime]) -> List[date]:
+        return [
+            month for month in self.months(shard)
+            if (start is None or start < _month_start(_next_month(month)))
+            and (end is None or _month_start(month) < end)
+        ]
+
+    def reaches(self, shard: str, start: Optional[datetime]) -> bool:
+        """Um intervalo a partir de `start` (None = sem limite) alcança algum mês arquivado?"""
+        months = self.months(shard)
+        return bool(months) and (start is None or to_naive_utc(start) < _month_start(_next_month(months[-1])))
+
+    # ---------- Escrita ----------
+
+    def archive(self, db: Session, now: datetime, batch_size: int, dry_run: bool = False) -> int:
+        """Move para o arquivo as linhas anteriores ao corte; devolve quantas (ou quantas seriam)"""
+        cutoff = now - timedelta(days=self.after_days)
+        conditions = (self.table.c[self.time_column] < cutoff,) + self.archivable
+        if dry_run:
+            return db.execute(select(func.count()).select_from(self.table).where(*conditions)).scalar()
+
+        shard = db.info["shard"]
+        archived = 0
+        while True:
+            statement = select(self.table).where(*conditions).order_by(self.table.c.id).limit(batch_size)
+            rows = [
+                {key: to_naive_utc(value) if isinstance(value, datetime) else value for key, value in row.items()}
+                for row in db.execute(statement).mappings()
+            ]
+            if not rows:
+                break
+            by_month: Dict[date, List[dict]] = {}
+            for row in rows:
+                by_month.setdefault(_month(row[self.time_column]), []).append(row)
+            for month, month_rows in by_month.items():
+                self._write(shard, month, month_rows)
+            # Apaga só depois de os arquivos estarem em disco
+            db.execute(delete(self.table).where(self.table.c.id.in_([row["id"] for row in rows])))
+            db.commit()
+            archived += len(rows)
+            if len(rows) < batch_size:
+                break
+        return archived
+
+    def _write(self, shard: str, month: date, rows: List[dict]):
+        directory = self.directory(shard) / month.strftime(MONTH_FORMAT)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{rows[0]['id']}-{rows[-1]['id']}.parquet"
+        # Prefixo ".": ignorado pelas leituras enquanto não é renomeado
+        temporary = directory / f".{path.name}.tmp"
+        with open(temporary, "wb") as sink:
+            pq.write_table(pa.Table.from_pylist(rows, schema=self.schema), sink, compression=settings.ARCHIVE_COMPRESSION)
+            sink.flush()
+            os.fsync(sink.fileno())
+        os.replace(temporary, path)
+
+    # ---------- Leitura ----------
+
+    def _files(self, shard: str, month: date) -> List[Tuple[int, int, Path]]:
+        """Arquivos do mês como (primeiro id, último id, caminho)"""
+        files = []
+        for path in (self.directory(shard) / month.strftime(MONTH_FORMAT)).glob("*.parquet"):
+            first, _, last = path.stem.partition("-")
+            files.append((int(first), int(last), path))
+        return files
+
+    def _expression(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        filters: Dict[str, object],
+        after: Optional[int] = None
+    ):
+        expression = None
+        conditions = [ds.field(name) == value for name, value in filters.items() if value is not None]
+        if start is not None:
+            conditions.append(ds.field(self.time_column) >= start)
+        if end is not None:
+            conditions.append(ds.field(self.time_column) < end)
+        if after is not None:
+            conditions.append(ds.field("id") > after)
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def _read(self, source, expression, columns: Optional[List[str]] = None) -> List[dict]:
+        dataset = ds.dataset(str(source), schema=self.schema, format="parquet")
+        return dataset.to_table(columns=columns, filter=expression).to_pylist()
+
+    def _read_month(
+        self,
+        shard: str,
+        month: date,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        filters: Dict[str, object]
+    ) -> List[dict]:
+        return self._read(self.directory(shard) / month.strftime(MONTH_FORMAT), self._expression(start, end, filters))
+
+    def newest(
+        self,
+        shard: str,
+        hot: List[dict],
+        count: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        filters: Optional[Dict[str, object]] = None
+    ) -> List[dict]:
+        """
+        As `count` linhas mais recentes (por tempo e id) somando banco e arquivo,
+        a partir de `hot`, as `count` mais recentes do banco. Lê os meses do
+        mais novo para o mais antigo e para quando nenhum mês restante pode
+        entrar na página.
+        """
+        start, end = to_naive_utc(start), to_naive_utc(end)
+
+        def key(row):
+            return row[self.time_column], row["id"]
+
+        page, cold = hot, []
+        for month in reversed(self._months_in(shard, start, end)):
+            if len(page) >= count and page[-1][self.time_column] >= _month_start(_next_month(month)):
+                break
+            cold.extend(self._read_month(shard, month, start, end, filters or {}))
+            page = merge(hot, cold, key, reverse=True)[:count]
+        return page
+
+    def listing(
+        self,
+        db: Session,
+        params: ListParams,
+        conditions: Iterable,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        filters: Dict[str, object]
+    ) -> Response:
+        """
+        Como listing.list_collection (cursor por id, projeção e limite),
+        somando as linhas arquivadas no intervalo. Os arquivos são lidos em
+        ordem de id (pelo nome, <primeiro id>-<último id>) até completar a
+        página; com ?stream=true, todos, com o resultado montado em memória.
+        """
+        columns = resolve_columns(self.model, params.fields)
+        keys = [column.key for column in columns]
+        statement = select(*columns).where(*conditions)
+        if params.after is not None:
+            statement = statement.where(self.table.c.id > params.after)
+        statement = statement.order_by(self.table.c.id)
+        wanted = None if params.stream else params.limit + 1
+        if wanted is not None:
+            statement = statement.limit(wanted)
+        hot = rows_to_dicts(keys, db.execute(statement))
+
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        shard = db.info["shard"]
+        files = sorted(
+            (first, last, path)
+            for month in self._months_in(shard, start, end)
+            for first, last, path in self._files(shard, month)
+            if params.after is None or last > params.after
+        )
+        expression = self._expression(start, end, filters, params.after)
+
+        def key(row):
+            return row["id"]
+
+        rows = hot
+        for first, _, path in files:
+            # Arquivos seguintes só têm ids maiores que os da página já completa
+            if wanted is not None and len(rows) >= wanted and first > rows[wanted - 1]["id"]:
+                break
+            rows = merge(rows, self._read(path, expression, keys), key)[:wanted]
+        if params.stream:
+            return json_response(rows)
+
+        headers = {}
+        if len(rows) > params.limit:
+            rows = rows[:params.limit]
+            headers["X-Next-Cursor"] = str(rows[-1]["id"])
+        return json_response(rows, headers)
+
+
+archived_visitors = ArchivedTable(
+    Visitor, "entry_time", settings.ARCHIVE_VISITORS_AFTER_DAYS, archivable=[Visitor.exit_time != None]  # noqa: E711
+)
+archived_logs = ArchivedTable(Log, "created_at", settings.ARCHIVE_LOGS_AFTER_DAYS)
+ARCHIVED_TABLES = (archived_visitors, archived_logs)
+
+
+def run(dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    """Arquiva todas as tabelas em todos os shards; linhas por shard e tabela"""
+    now = datetime.utcnow()
+    return shards.fan_out(lambda db: {
+        table.name: table.archive(db, now, settings.ARCHIVE_BATCH_SIZE, dry_run) for table in ARCHIVED_TABLES
+    })
+
+
+def status() -> List[dict]:
+    """Partições arquivadas: shard, tabela, mês, arquivos, linhas e bytes"""
+    partitions = []
+    for shard in shards.engines:
+        for table in ARCHIVED_TABLES:
+            for month in table.months(shard):
+                files = sorted((table.directory(shard) / month.strftime(MONTH_FORMAT)).glob("*.parquet"))
+                partitions.append({
+                    "shard": shard,
+                    "table": table.name,
+                    "month": month.strftime(MONTH_FORMAT),
+                    "files": len(files),
+                    "rows": sum(pq.ParquetFile(path).metadata.num_rows for path in files),
+                    "bytes": sum(path.stat().st_size for path in files),
+                })
+    return partitions
+
+
+def main(argv: Optional[List[str]] = None):
+    """Linha de comando: run, status"""
+    parser = argparse.ArgumentParser(description="Arquivamento de visitantes e logs antigos")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Move as linhas antigas para o arquivo")
+    run_parser.add_argument("--dry-run", action="store_true", help="Só conta as linhas que seriam arquivadas")
+    commands.add_parser("status", help="Lista as partições arquivadas")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        verb = "a arquivar" if args.dry_run else "arquivadas"
+        for shard, counts in run(args.dry_run).items():
+            for table, count in counts.items():
+                print(f"{shard}/{table}: {count} linha(s) {verb}")
+    else:
+        partitions = status()
+        for item in partitions:
+            print(
+                f"{item['shard']}/{item['table']}/{item['month']}  {item['files']:>4} arquivo(s)  "
+                f"{item['rows']:>9} linhas  {item['bytes'] / 1024:>9.1f} KiB"
+            )
+        print(f"{len(partitions)} partição(ões) em {Path(settings.ARCHIVE_DIR).resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Execução em produção: gunicorn com workers uvicorn
+
+    gunicorn -c gunicorn_conf.py main:app
+
+- Um único worker: o hub de push (realtime.py) é por processo. Com mais de
+  um, eventos publicados em um worker não chegam às conexões SSE/WebSocket
+  de outro e os ids de Last-Event-ID colidem entre workers. WEB_CONCURRENCY
+  é ignorado até que os eventos passem por um broker entre processos; para
+  mais vazão, rode mais instâncias, cada uma com seus clientes de push.
+- O app é importado no processo mestre antes do fork (preload): os workers
+  compartilham o código já carregado e sobem mais rápido. Os engines do
+  SQLAlchemy descartam no filho as conexões herdadas (database.py).
+- Pool de conexões: com DB_MAX_CONNECTIONS, o pool do worker tem esse
+  tamanho (e o limite de concorrência o acompanha); sem ele, DB_POOL_SIZE +
+  DB_MAX_OVERFLOW.
+- Reciclagem: cada worker é substituído após WORKER_MAX_REQUESTS
+  requisições (mais um jitter aleatório, para não reiniciarem juntos).
+- Reinício gracioso: SIGTERM/SIGQUIT no mestre param de aceitar conexões e
+  aguardam as requisições em andamento por até WORKER_GRACEFUL_TIMEOUT
+  segundos. Com preload, SIGHUP recria os workers com o código já
+  carregado; para publicar código novo sem derrubar requisições, envie
+  SIGUSR2 (sobe um novo mestre com o código atual) e depois SIGTERM ao
+  mestre antigo.
+"""
+from config import settings
+
+
+def split_pool(total: int, workers: int):
+    """Divide o total de conexões entre os workers (pool fixo, sem overflow)"""
+    per_worker = max(1, total // workers)
+    settings.DB_POOL_SIZE = per_worker
+    settings.DB_MAX_OVERFLOW = 0
+    # 0 (padrão) já acompanha o pool
+    if settings.MAX_CONCURRENT_REQUESTS > per_worker:
+        settings.MAX_CONCURRENT_REQUESTS = per_worker
+
+
+# Hub de push em processo: um worker (ver docstring)
+workers = 1
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"{settings.API_HOST}:{settings.API_PORT}"
+preload_app = True
+
+max_requests = settings.WORKER_MAX_REQUESTS
+max_requests_jitter = settings.WORKER_MAX_REQUESTS_JITTER
+graceful_timeout = settings.WORKER_GRACEFUL_TIMEOUT
+timeout = settings.WORKER_TIMEOUT
+keepalive = settings.KEEPALIVE_SECONDS
+
+# O app é importado depois deste arquivo: os engines já nascem com o pool de cada worker
+if settings.DB_MAX_CONNECTIONS:
+    split_pool(settings.DB_MAX_CONNECTIONS, workers)
+
+
+def on_starting(server):
+    if settings.WEB_CONCURRENCY > 1:
+        server.log.warning("WEB_CONCURRENCY=%s ignorado: o hub de push exige um único worker", settings.WEB_CONCURRENCY)
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s: pool de %s (+%s) conexões", worker.pid, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
@@ -0,0 +1,89 @@
+"""
+Listagens paginadas, projetadas e em streaming do Operations Service
+
+Todas as coleções usam a mesma convenção:
+- paginação por chave (keyset) sobre `id`: `?after=<último id>&limit=N`,
+  com o próximo cursor no header `X-Next-Cursor`;
+- projeção esparsa com `?fields=a,b,c`, selecionando apenas essas colunas;
+- `?stream=true` para exportações: devolve todas as linhas como um array
+  JSON gerado aos poucos com `yield_per`, mantendo a memória constante.
+"""
+from typing import Iterable, Iterator, List, Optional
+
+from fastapi import HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config import settings
+from serialization import dumps, json_response, rows_to_dicts
+
+
+class ListParams:
+    """Parâmetros comuns de listagem (usar com Depends())"""
+
+    def __init__(
+        self,
+        after: Optional[int] = Query(None, description="Cursor: retorna registros com id maior que este"),
+        limit: int = Query(100, ge=1, le=settings.LIST_MAX_LIMIT),
+        fields: Optional[str] = Query(None, description="Colunas separadas por vírgula"),
+        stream: bool = Query(False, description="Exporta todos os registros em streaming")
+    ):
+        self.after = after
+        self.limit = limit
+        self.fields = fields
+        self.stream = stream
+
+
+def equals(model, **values) -> List:
+    """Condições de igualdade para os filtros informados (ignora None)"""
+    return [getattr(model, name) == value for name, value in values.items() if value is not None]
+
+
+def resolve_columns(model, fields: Optional[str]) -> List:
+    """Colunas selecionadas por ?fields= (id sempre incluído)"""
+    table_columns = model.__table__.columns
+    if not fields:
+        return list(table_columns)
+    names = ["id"]
+    for name in (field.strip() for field in fields.split(",")):
+        if not name or name in names:
+            continue
+        if name not in table_columns:
+            raise HTTPException(status_code=400, detail=f"Campo desconhecido: {name}")
+        names.append(name)
+    return [table_columns[name] for name in names]
+
+
+def _stream_rows(db: Session, statement, keys: List[str], batch_size: int) -> Iterator[bytes]:
+    result = db.execute(statement.execution_options(yield_per=batch_size))
+    yield b"["
+    separator = b""
+    for partition in result.partitions():
+        chunk = b",".join(dumps(dict(zip(keys, row))) for row in partition)
+        yield separator + chunk
+        separator = b","
+    yield b"]"
+
+
+def list_collection(db: Session, model, params: ListParams, conditions: Iterable = ()) -> Response:
+    """Executa a listagem de `model` aplicando filtros, cursor, projeção e limite"""
+    columns = resolve_columns(model, params.fields)
+    keys = [column.key for column in columns]
+    statement = select(*columns).where(*conditions)
+    if params.after is not None:
+        statement = statement.where(model.id > params.after)
+    statement = statement.order_by(model.id)
+
+    if params.stream:
+        return StreamingResponse(
+            _stream_rows(db, statement, keys, settings.LIST_STREAM_BATCH_SIZE),
+            media_type="application/json"
+        )
+
+    rows = db.execute(statement.limit(params.limit + 1)).all()
+    headers = {}
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        headers["X-Next-Cursor"] = str(rows[-1].id)
+    return json_response(rows_to_dicts(keys, rows), headers)
@@ -2,20 +2,51 @@
 Operations Service - Microserviço de Operações
 Sistema de Condomínio
 """
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Request, WebSocket, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List
-from pydantic import BaseModel
-from datetime import date, datetime, time
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from contextlib import aclosing
+import asyncio
 
 from config import settings
-from database import get_db, engine, Base
-from models import (Area, Scheduling, Budget, BudgetHistory, Event, Meeting, MeetingHistory,
-                    Minute, MinuteHistory, Document, Visitor, Notice, NoticeHistory, Log)
-
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
+from database import Base, engine
+from models import (Area, Scheduling, SchedulingException, Budget, BudgetHistory, Event, EventException,
+                    Meeting, MeetingHistory, Minute, MinuteHistory, Document, Visitor, Notice, NoticeHistory, Log)
+from schemas import (
+    AreaCreate, AreaResponse,
+    SchedulingCreate, SchedulingResponse, SchedulingOccurrenceResponse,
+    SchedulingExceptionCreate, SchedulingExceptionResponse,
+    BudgetCreate, BudgetResponse, BudgetHistoryResponse,
+    EventCreate, EventResponse, EventOccurrenceResponse,
+    EventExceptionCreate, EventExceptionResponse,
+    MeetingCreate, MeetingResponse, MeetingHistoryResponse,
+    MinuteCreate, MinuteResponse, MinuteHistoryResponse,
+    DocumentCreate, DocumentResponse,
+    VisitorCreate, VisitorResponse,
+    NoticeCreate, NoticeResponse, NoticeHistoryResponse,
+    LogResponse, MessageResponse
+)
+from realtime import hub, serialize_entity, user_channel, unit_channel, BROADCAST_CHANNEL
+from serialization import entity_dict, json_response, rows_response
+from listing import ListParams, list_collection, equals
+from recurrence import RecurrenceRule, Series, Occurrence, OccurrenceOverride, find_overlap, to_naive_utc
+from migrator import Migrator, startup as prepare_schema
+from migrations import MIGRATIONS, migrator
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, REGISTRY, CONTENT_TYPE, instrument_engine
+from profiler import SQLProfilerMiddleware, profiler, profile_engine
+from replicas import ReplicaRoutingMiddleware, replicas
+from ratelimit import RateLimitMiddleware
+from response_cache import response_cache
+from sharding import shards, get_tenant_db
+from counters import Counter, CounterSet
+from archive import archived_logs, archived_visitors
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -23,9 +54,35 @@ app = FastAPI(
     description="Microserviço de Operações - Sistema de Condomínio",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse
 )
 
+# Token opcional: só as rotas de administração o exigem
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+
+def token_claims(token: Optional[str] = Depends(oauth2_scheme)) -> dict:
+    """Valida o JWT localmente (sem ida ao Auth Service)"""
+    try:
+        claims = jwt.decode(token or "", settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        claims = {}
+    if claims.get("user_id") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não foi possível validar as credenciais",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims
+
+
+def admin_claims(claims: dict = Depends(token_claims)) -> dict:
+    """Exige um usuário de um dos grupos em ADMIN_GROUP_IDS"""
+    if claims.get("group_id") not in settings.ADMIN_GROUP_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso restrito à administração")
+    return claims
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -35,174 +92,476 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ========== Schemas ==========
-
-class AreaCreate(BaseModel):
-    name: str
-    description: str = None
-    capacity: int = None
-    hourly_rate: float = None
-    requires_approval: bool = False
-
-class SchedulingCreate(BaseModel):
-    area_id: int
-    unit_id: int
-    user_id: int
-    start_datetime: datetime
-    end_datetime: datetime
-    purpose: str = None
-    guests_count: int = None
-
-class BudgetCreate(BaseModel):
-    type: str
-    title: str
-    description: str = None
-    provider_id: int = None
-    amount: float
-    requested_by: int
-
-class EventCreate(BaseModel):
-    title: str
-    description: str = None
-    event_date: date
-    start_time: time = None
-    end_time: time = None
-    location: str = None
-    organizer_id: int
-
-class MeetingCreate(BaseModel):
-    title: str
-    description: str = None
-    meeting_date: datetime
-    location: str = None
-    organizer_id: int
-
-class MinuteCreate(BaseModel):
-    meeting_id: int
-    content: str
-    attendees: str = None
-    decisions: str = None
-    issued_by: int
-
-class DocumentCreate(BaseModel):
-    title: str
-    type: str
-    description: str = None
-    file_path: str
-    file_name: str
-    file_size: int = None
-    mime_type: str = None
-    uploaded_by: int
-    is_public: bool = False
-
-class VisitorCreate(BaseModel):
-    name: str
-    document: str = None
-    unit_id: int
-    entry_time: datetime
-    vehicle_plate: str = None
-    purpose: str = None
-    registered_by: int
-
-class NoticeCreate(BaseModel):
-    title: str
-    content: str
-    type: str
-    priority: str = 'normal'
-    published_by: int
-    expires_at: datetime = None
+# Compressão gzip/brotli e ETag/304
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Métricas: latência por rota, consultas SQL e pool de conexões
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    for replica in replicas.replicas:
+        instrument_engine(replica.engine, pool_metrics=False)
+    for shard_engine in shards.extra_engines().values():
+        instrument_engine(shard_engine, pool_metrics=False)
+    app.add_middleware(MetricsMiddleware)
+
+# Profiler de SQL: header X-SQL-Profile e /debug/sql-profile
+if settings.SQL_PROFILER_ENABLED:
+    profile_engine(engine)
+    for replica in replicas.replicas:
+        profile_engine(replica.engine)
+    for shard_engine in shards.extra_engines().values():
+        profile_engine(shard_engine)
+    app.add_middleware(SQLProfilerMiddleware)
+
+# Réplicas de leitura: GET/HEAD leem das réplicas, respeitando read-your-writes
+if replicas:
+    app.add_middleware(ReplicaRoutingMiddleware)
+
+# Limite de taxa por usuário/IP/rota e descarte de carga (429/503 antes de qualquer outro processamento)
+if settings.RATE_LIMIT_ENABLED or settings.LOAD_SHED_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+
+@app.on_event("startup")
+def prepare_database():
+    """Prepara o schema conforme SCHEMA_MODE (migrate, check ou skip), em todos os shards"""
+    prepare_schema(migrator, settings.SCHEMA_MODE)
+    for shard_engine in shards.extra_engines().values():
+        prepare_schema(Migrator(shard_engine, Base.metadata, MIGRATIONS), settings.SCHEMA_MODE)
 
 # ========== Rotas de Áreas ==========
 
-@app.get("/api/areas", tags=["Áreas Comuns"])
-async def list_areas(db: Session = Depends(get_db)):
-    return db.query(Area).all()
+@app.get("/api/areas", response_model=List[AreaResponse], tags=["Áreas Comuns"])
+@response_cache.cached("areas")
+async def list_areas(
+    is_active: bool = None,
+    requires_approval: bool = None,
+    params: ListParams = Depends(),
+    db: Session = Depends(get_tenant_db)
+):
+    conditions = equals(Area, is_active=is_active, requires_approval=requires_approval)
+    return list_collection(db, Area, params, conditions)
 
-@app.post("/api/areas", status_code=201, tags=["Áreas Comuns"])
-async def create_area(area_data: AreaCreate, db: Session = Depends(get_db)):
+@app.post("/api/areas", response_model=AreaResponse, status_code=201, tags=["Áreas Comuns"])
+async def create_area(area_data: AreaCreate, db: Session = Depends(get_tenant_db)):
     area = Area(**area_data.dict())
     db.add(area)
     db.commit()
+    response_cache.invalidate("areas")
     db.refresh(area)
     return area
 
+# ========== Recorrência ==========
+
+# Status que ocupam a área comum
+ACTIVE_SCHEDULING_STATUSES = ("pending", "approved")
+
+def _parse_rule(text: Optional[str]) -> Optional[RecurrenceRule]:
+    if not text:
+        return None
+    try:
+        return RecurrenceRule.parse(text, max_count=settings.RECURRENCE_MAX_COUNT)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Regra de recorrência inválida: {exc}")
+
+def _check_window(start: datetime, end: datetime):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="O fim da janela deve ser posterior ao início")
+    if end - start > timedelta(days=settings.RECURRENCE_MAX_WINDOW_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Janela máxima de {settings.RECURRENCE_MAX_WINDOW_DAYS} dias"
+        )
+
+def _scheduling_series(scheduling: Scheduling) -> Series:
+    start = to_naive_utc(scheduling.start_datetime)
+    duration = to_naive_utc(scheduling.end_datetime) - start
+    if not scheduling.recurrence_rule:
+        return Series(start, duration)
+    overrides = {
+        to_naive_utc(exc.original_start): OccurrenceOverride(
+            exc.is_cancelled, to_naive_utc(exc.start_datetime), to_naive_utc(exc.end_datetime)
+        )
+        for exc in scheduling.exceptions
+    }
+    return Series(start, duration, RecurrenceRule.parse(scheduling.recurrence_rule), overrides)
+
+def _scheduling_occurrence(scheduling: Scheduling, occurrence: Occurrence) -> dict:
+    data = entity_dict(scheduling)
+    data.update(
+        start_datetime=occurrence.start,
+        end_datetime=occurrence.end,
+        original_start=occurrence.original_start,
+        is_exception=occurrence.is_exception
+    )
+    return data
+
+def _find_scheduling_conflict(
+    db: Session, area_id: int, series: Series, exclude_id: int = None
+) -> Optional[Scheduling]:
+    """
+    Primeiro agendamento ativo da área que conflita com a série informada.
+    Registros avulsos são filtrados por intervalo no banco; séries recorrentes
+    são comparadas sem materializar todas as ocorrências (ver find_overlap).
+    """
+    bound = series.end_bound
+    query = db.query(Scheduling).filter(
+        Scheduling.area_id == area_id,
+        Scheduling.status.in_(ACTIVE_SCHEDULING_STATUSES)
+    )
+    if exclude_id is not None:
+        query = query.filter(Scheduling.id != exclude_id)
+    if bound is not None:
+        # Séries que começam depois podem ter ocorrências remarcadas para antes
+        query = query.filter(or_(
+            Scheduling.start_datetime < bound,
+            Scheduling.exceptions.any(SchedulingException.start_datetime < bound)
+        ))
+
+    concrete = query.filter(
+        Scheduling.recurrence_rule == None,
+        Scheduling.end_datetime > series.start_bound
+    )
+    if series.rule is None:
+        conflict = concrete.first()
+        if conflict:
+            return conflict
+    else:
+        for row in concrete.order_by(Scheduling.start_datetime).yield_per(500):
+            if find_overlap(series, _scheduling_series(row), settings.RECURRENCE_CONFLICT_HORIZON_DAYS):
+                return row
+
+    recurring = query.filter(
+        Scheduling.recurrence_rule != None,
+        or_(Scheduling.recurrence_end == None, Scheduling.recurrence_end > series.start_bound)
+    ).options(selectinload(Scheduling.exceptions))
+    for row in recurring:
+        if find_overlap(series, _scheduling_series(row), settings.RECURRENCE_CONFLICT_HORIZON_DAYS):
+            return row
+    return None
+
+def _event_series(event: Event) -> Series:
+    start = datetime.combine(event.event_date, event.start_time or time.min)
+    if event.start_time and event.end_time and event.end_time > event.start_time:
+        duration = datetime.combine(event.event_date, event.end_time) - start
+    else:
+        # Sem horário de término, o evento ocupa o restante do dia
+        duration = datetime.combine(event.event_date + timedelta(days=1), time.min) - start
+    if not event.recurrence_rule:
+        return Series(start, duration)
+    overrides = {}
+    for exc in event.exceptions:
+        moved_date = exc.event_date or exc.original_date
+        overrides[datetime.combine(exc.original_date, event.start_time or time.min)] = OccurrenceOverride(
+            exc.is_cancelled,
+            datetime.combine(moved_date, exc.start_time or event.start_time or time.min),
+            datetime.combine(moved_date, exc.end_time) if exc.end_time else None
+        )
+    return Series(start, duration, RecurrenceRule.parse(event.recurrence_rule), overrides)
+
+def _event_occurrence(event: Event, occurrence: Occurrence) -> dict:
+    data = entity_dict(event)
+    data.update(
+        event_date=occurrence.start.date(),
+        original_date=occurrence.original_start.date(),
+        is_exception=occurrence.is_exception
+    )
+    if event.start_time:
+        data["start_time"] = occurrence.start.time()
+    if event.end_time:
+        data["end_time"] = occurrence.end.time()
+    return data
+
 # ========== Rotas de Agendamentos ==========
 
-@app.get("/api/schedulings", tags=["Agendamentos"])
-async def list_schedulings(db: Session = Depends(get_db)):
-    return db.query(Scheduling).all()
+@app.get("/api/schedulings", response_model=List[SchedulingResponse], tags=["Agendamentos"])
+async def list_schedulings(
+    area_id: int = None,
+    unit_id: int = None,
+    user_id: int = None,
+    status: str = None,
+    start_from: datetime = None,
+    start_to: datetime = None,
+    params: ListParams = Depends(),
+    db: Session = Depends(get_tenant_db)
+):
+    conditions = equals(Scheduling, area_id=area_id, unit_id=unit_id, user_id=user_id, status=status)
+    if start_from:
+        conditions.append(Scheduling.start_datetime >= start_from)
+    if start_to:
+        conditions.append(Scheduling.start_datetime < start_to)
+    return list_collection(db, Scheduling, params, conditions)
+
+@app.get("/api/schedulings/occurrences", response_model=List[SchedulingOccurrenceResponse], tags=["Agendamentos"])
+async def list_scheduling_occurrences(
+    start: datetime,
+    end: datetime,
+    area_id: int = None,
+    unit_id: int = None,
+    db: Session = Depends(get_tenant_db)
+):
+    """Ocorrências avulsas e recorrentes dentro da janela [start, end)"""
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    _check_window(start, end)
+    query = db.query(Scheduling).filter(Scheduling.start_datetime < end)
+    if area_id:
+        query = query.filter(Scheduling.area_id == area_id)
+    if unit_id:
+        query = query.filter(Scheduling.unit_id == unit_id)
+
+    concrete = query.filter(Scheduling.recurrence_rule == None, Scheduling.end_datetime > start).all()
+    recurring = query.filter(
+        Scheduling.recurrence_rule != None,
+        or_(Scheduling.recurrence_end == None, Scheduling.recurrence_end > start)
+    ).options(selectinload(Scheduling.exceptions)).all()
+    occurrences = []
+    for row in concrete + recurring:
+        occurrences.extend(
+            _scheduling_occurrence(row, occurrence)
+            for occurrence in _scheduling_series(row).occurrences(start, end)
+        )
+    occurrences.sort(key=lambda item: item["start_datetime"])
+    return occurrences
+
+@app.post("/api/schedulings", response_model=SchedulingResponse, status_code=201, tags=["Agendamentos"])
+async def create_scheduling(scheduling_data: SchedulingCreate, db: Session = Depends(get_tenant_db)):
+    rule = _parse_rule(scheduling_data.recurrence_rule)
+    start = to_naive_utc(scheduling_data.start_datetime)
+    end = to_naive_utc(scheduling_data.end_datetime)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="O término deve ser posterior ao início")
+
+    series = Series(start, end - start, rule)
+    conflict = _find_scheduling_conflict(db, scheduling_data.area_id, series)
+    if conflict:
+        raise HTTPException(status_code=409, detail=f"Conflito com o agendamento {conflict.id}")
 
-@app.post("/api/schedulings", status_code=201, tags=["Agendamentos"])
-async def create_scheduling(scheduling_data: SchedulingCreate, db: Session = Depends(get_db)):
     scheduling = Scheduling(**scheduling_data.dict())
+    scheduling.start_datetime = start
+    scheduling.end_datetime = end
+    if rule:
+        scheduling.recurrence_end = series.end_bound
     db.add(scheduling)
     db.commit()
     db.refresh(scheduling)
+    if scheduling.status == 'pending':
+        dashboard_counters.add(db.info["shard"], "pending_schedulings")
     return scheduling
 
-@app.put("/api/schedulings/{scheduling_id}/approve", tags=["Agendamentos"])
-async def approve_scheduling(scheduling_id: int, approved_by: int, db: Session = Depends(get_db)):
+@app.post("/api/schedulings/{scheduling_id}/exceptions", response_model=SchedulingExceptionResponse, status_code=201, tags=["Agendamentos"])
+async def create_scheduling_exception(
+    scheduling_id: int,
+    exception_data: SchedulingExceptionCreate,
+    db: Session = Depends(get_tenant_db)
+):
+    """Cancelar ou remarcar uma ocorrência de agendamento recorrente"""
+    scheduling = db.query(Scheduling).filter(Scheduling.id == scheduling_id).first()
+    if not scheduling:
+        raise HTTPException(status_code=404, detail="Agendamento não encontrado")
+    if not scheduling.recurrence_rule:
+        raise HTTPException(status_code=400, detail="Agendamento não é recorrente")
+
+    series = _scheduling_series(scheduling)
+    original = to_naive_utc(exception_data.original_start)
+    if original in series.overrides:
+        raise HTTPException(status_code=409, detail="Ocorrência já possui exceção")
+    if next(series.rule.iter_starts(series.dtstart, original, original + timedelta(microseconds=1)), None) != original:
+        raise HTTPException(status_code=400, detail="Data não corresponde a uma ocorrência do agendamento")
+
+    start = end = None
+    if not exception_data.is_cancelled:
+        start = to_naive_utc(exception_data.start_datetime) or original
+        end = to_naive_utc(exception_data.end_datetime) or start + series.duration
+        if end <= start:
+            raise HTTPException(status_code=400, detail="O término deve ser posterior ao início")
+        conflict = _find_scheduling_conflict(db, scheduling.area_id, Series(start, end - start), exclude_id=scheduling.id)
+        if conflict:
+            raise HTTPException(status_code=409, detail=f"Conflito com o agendamento {conflict.id}")
+        if scheduling.recurrence_end is not None and end > to_naive_utc(scheduling.recurrence_end):
+            scheduling.recurrence_end = end
+
+    exception = SchedulingException(
+        scheduling_id=scheduling.id,
+        original_start=original,
+        is_cancelled=exception_data.is_cancelled,
+        start_datetime=start,
+        end_datetime=end,
+        notes=exception_data.notes
+    )
+    db.add(exception)
+    db.commit()
+    db.refresh(exception)
+    return exception
+
+@app.put("/api/schedulings/{scheduling_id}/approve", response_model=SchedulingResponse, tags=["Agendamentos"])
+async def approve_scheduling(scheduling_id: int, approved_by: int, db: Session = Depends(get_tenant_db)):
     scheduling = db.query(Scheduling).filter(Scheduling.id == scheduling_id).first()
     if not scheduling:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
+    was_pending = scheduling.status == 'pending'
     scheduling.status = 'approved'
     scheduling.approved_by = approved_by
     scheduling.approved_at = datetime.utcnow()
     db.commit()
+    db.refresh(scheduling)
+    if was_pending:
+        dashboard_counters.add(db.info["shard"], "pending_schedulings", -1)
+    hub.publish(
+        "scheduling.approved",
+        serialize_entity(scheduling),
+        [user_channel(scheduling.user_id), unit_channel(scheduling.unit_id)]
+    )
     return scheduling
 
 # ========== Rotas de Orçamentos ==========
 
-@app.get("/api/budgets", tags=["Orçamentos"])
-async def list_budgets(db: Session = Depends(get_db)):
-    return db.query(Budget).all()
+# Aguardando aprovação: status inicial do orçamento (padrão do modelo e do script SQL)
+PENDING_BUDGET_STATUS = "draft"
 
-@app.post("/api/budgets", status_code=201, tags=["Orçamentos"])
-async def create_budget(budget_data: BudgetCreate, db: Session = Depends(get_db)):
+def _pending_budget():
+    return (Budget.status == PENDING_BUDGET_STATUS) & (Budget.approved_at == None)
+
+@app.get("/api/budgets", response_model=List[BudgetResponse], tags=["Orçamentos"])
+async def list_budgets(
+    type: str = None,
+    status: str = None,
+    provider_id: int = None,
+    requested_by: int = None,
+    params: ListParams = Depends(),
+    db: Session = Depends(get_tenant_db)
+):
+    conditions = equals(Budget, type=type, status=status, provider_id=provider_id, requested_by=requested_by)
+    return list_collection(db, Budget, params, conditions)
+
+@app.post("/api/budgets", response_model=BudgetResponse, status_code=201, tags=["Orçamentos"])
+async def create_budget(budget_data: BudgetCreate, db: Session = Depends(get_tenant_db)):
     budget = Budget(**budget_data.dict())
     db.add(budget)
     db.commit()
     db.refresh(budget)
+    if budget.status == PENDING_BUDGET_STATUS and budget.approved_at is None:
+        dashboard_counters.add(db.info["shard"], "pending_budgets")
     return budget
 
-@app.get("/api/budgets/{budget_id}/history", tags=["Orçamentos"])
-async def get_budget_history(budget_id: int, db: Session = Depends(get_db)):
+@app.get("/api/budgets/{budget_id}/history", response_model=List[BudgetHistoryResponse], tags=["Orçamentos"])
+async def get_budget_history(budget_id: int, db: Session = Depends(get_tenant_db)):
     return db.query(BudgetHistory).filter(BudgetHistory.budget_id == budget_id).all()
 
 # ========== Rotas de Eventos ==========
 
-@app.get("/api/events", tags=["Eventos"])
-async def list_events(db: Session = Depends(get_db)):
-    return db.query(Event).all()
-
-@app.post("/api/events", status_code=201, tags=["Eventos"])
-async def create_event(event_data: EventCreate, db: Session = Depends(get_db)):
+@app.get("/api/events", response_model=List[EventResponse], tags=["Eventos"])
+@response_cache.coalesced("events")
+async def list_events(
+    organizer_id: int = None,
+    is_public: bool = None,
+    date_from: date = None,
+    date_to: date = None,
+    params: ListParams = Depends(),
+    db: Session = Depends(get_tenant_db)
+):
+    conditions = equals(Event, organizer_id=organizer_id, is_public=is_public)
+    if date_from:
+        conditions.append(Event.event_date >= date_from)
+    if date_to:
+        conditions.append(Event.event_date <= date_to)
+    return list_collection(db, Event, params, conditions)
+
+@app.get("/api/events/occurrences", response_model=List[EventOccurrenceResponse], tags=["Eventos"])
+async def list_event_occurrences(start_date: date, end_date: date, db: Session = Depends(get_tenant_db)):
+    """Ocorrências avulsas e recorrentes entre start_date e end_date (inclusive)"""
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(end_date + timedelta(days=1), time.min)
+    _check_window(start, end)
+    query = db.query(Event).filter(Event.event_date <= end_date)
+
+    concrete = query.filter(Event.recurrence_rule == None, Event.event_date >= start_date).all()
+    recurring = query.filter(
+        Event.recurrence_rule != None,
+        or_(Event.recurrence_end_date == None, Event.recurrence_end_date >= start_date)
+    ).options(selectinload(Event.exceptions)).all()
+    occurrences = []
+    for event in concrete + recurring:
+        occurrences.extend(
+            _event_occurrence(event, occurrence)
+            for occurrence in _event_series(event).occurrences(start, end)
+        )
+    occurrences.sort(key=lambda item: (item["event_date"], item["start_time"] or time.min))
+    return occurrences
+
+@app.post("/api/events", response_model=EventResponse, status_code=201, tags=["Eventos"])
+async def create_event(event_data: EventCreate, db: Session = Depends(get_tenant_db)):
+    rule = _parse_rule(event_data.recurrence_rule)
     event = Event(**event_data.dict())
+    if rule:
+        last = rule.last_start(datetime.combine(event.event_date, event.start_time or time.min))
+        event.recurrence_end_date = last.date() if last else None
     db.add(event)
     db.commit()
+    response_cache.invalidate("events")
     db.refresh(event)
     return event
 
-# ========== Rotas de Reuniões ==========
+@app.post("/api/events/{event_id}/exceptions", response_model=EventExceptionResponse, status_code=201, tags=["Eventos"])
+async def create_event_exception(
+    event_id: int,
+    exception_data: EventExceptionCreate,
+    db: Session = Depends(get_tenant_db)
+):
+    """Cancelar ou remarcar uma ocorrência de evento recorrente"""
+    event = db.query(Event).filter(Event.id == event_id).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Evento não encontrado")
+    if not event.recurrence_rule:
+        raise HTTPException(status_code=400, detail="Evento não é recorrente")
+
+    series = _event_series(event)
+    original = datetime.combine(exception_data.original_date, event.start_time or time.min)
+    if original in series.overrides:
+        raise HTTPException(status_code=409, detail="Ocorrência já possui exceção")
+    if next(series.rule.iter_starts(series.dtstart, original, original + timedelta(microseconds=1)), None) != original:
+        raise HTTPException(status_code=400, detail="Data não corresponde a uma ocorrência do evento")
+
+    exception = EventException(event_id=event.id, **exception_data.dict())
+    if not exception.is_cancelled and exception.event_date and event.recurrence_end_date:
+        event.recurrence_end_date = max(event.recurrence_end_date, exception.event_date)
+    db.add(exception)
+    db.commit()
+    db.refresh(exception)
+    return exception
 
-@app.get("/api/meetings", tags=["Reuniões"])
-async def list_meetings(db: Session = Depends(get_db)):
-    return db.query(Meeting).all()
+# ========== Rotas de Reuniões ==========
 
-@app.post("/api/meetings", status_code=201, tags=["Reuniões"])
-async def create_meeting(meeting_data: MeetingCreate, db: Session = Depends(get_db)):
+@app.get("/api/meetings", response_model=List[MeetingResponse], tags=["Reuniões"])
+async def list_meetings(
+    organizer_id: int = None,
+    status: str = None,
+    date_from: datetime = None,
+    date_to: datetime = None,
+    params: ListParams = Depends(),
+    db: Session = Depends(get_tenant_db)
+):
+    conditions = equals(Meeting, organizer_id=organizer_id, status=status)
+    if date_from:
+        conditions.append(Meeting.meeting_date >= date_from)
+    if date_to:
+        conditions.append(Meeting.meeting_date < date_to)
+    return list_collection(db, Meeting, params, conditions)
+
+@app.post("/api/meetings", response_model=MeetingResponse, status_code=201, tags=["Reuniões"])
+async def create_meeting(meeting_data: MeetingCreate, db: Session = Depends(get_tenant_db)):
     meeting = Meeting(**meeting_data.dict())
     db.add(meeting)
     db.commit()
     db.refresh(meeting)
     return meeting
 
-@app.get("/api/meetings/{meeting_id}/history", tags=["Reuniões"])
-async def get_meeting_history(meeting_id: int, db: Session = Depends(get_db)):
+@app.get("/api/meetings/{meeting_id}/history", response_model=List[MeetingHistoryResponse], tags=["Reuniões"])
+async def get_meeting_history(meeting_id: int, db: Session = Depends(get_tenant_db)):
     return db.query(MeetingHistory).filter(MeetingHistory.meeting_id == meeting_id).all()
 
-@app.post("/api/meetings/{meeting_id}/send-email", tags=["Reuniões"])
-async def send_meeting_email(meeting_id: int, db: Session = Depends(get_db)):
+@app.post("/api/meetings/{meeting_id}/send-email", response_model=MessageResponse, tags=["Reuniões"])
+async def send_meeting_email(meeting_id: int, db: Session = Depends(get_tenant_db)):
     meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
     if not meeting:
         raise HTTPException(status_code=404, detail="Reunião não encontrada")
@@ -211,24 +570,30 @@ async def send_meeting_email(meeting_id: int, db: Session = Depends(get_db)):
 
 # ========== Rotas de Atas ==========
 
-@app.get("/api/minutes", tags=["Atas"])
-async def list_minutes(db: Session = Depends(get_db)):
-    return db.query(Minute).all()
+@app.get("/api/minutes", response_model=List[MinuteResponse], tags=["Atas"])
+async def list_minutes(
+    meeting_id: int = None,
+    issued_by: int = None,
+    params: ListParams = Depends(),
+    db: Session = Depends(get_tenant_db)
+):
+    conditions = equals(Minute, meeting_id=meeting_id, issued_by=issued_by)
+    return list_collection(db, Minute, params, conditions)
 
-@app.post("/api/minutes", status_code=201, tags=["Atas"])
-async def create_minute(minute_data: MinuteCreate, db: Session = Depends(get_db)):
+@app.post("/api/minutes", response_model=MinuteResponse, status_code=201, tags=["Atas"])
+async def create_minute(minute_data: MinuteCreate, db: Session = Depends(get_tenant_db)):
     minute = Minute(**minute_data.dict())
     db.add(minute)
     db.commit()
     db.refresh(minute)
     return minute
 
-@app.get("/api/minutes/{minute_id}/history", tags=["Atas"])
-async def get_minute_history(minute_id: int, db: Session = Depends(get_db)):
+@app.get("/api/minutes/{minute_id}/history", response_model=List[MinuteHistoryResponse], tags=["Atas"])
+async def get_minute_history(minute_id: int, db: Session = Depends(get_tenant_db)):
     return db.query(MinuteHistory).filter(MinuteHistory.minute_id == minute_id).all()
 
-@app.post("/api/minutes/{minute_id}/send-email", tags=["Atas"])
-async def send_minute_email(minute_id: int, db: Session = Depends(get_db)):
+@app.post("/api/minutes/{minute_id}/send-email", response_model=MessageResponse, tags=["Atas"])
+async def send_minute_email(minute_id: int, db: Session = Depends(get_tenant_db)):
     minute = db.query(Minute).filter(Minute.id == minute_id).first()
     if not minute:
         raise HTTPException(status_code=404, detail="Ata não encontrada")
@@ -239,12 +604,19 @@ async def send_minute_email(minute_id: int, db: Session = Depends(get_db)):
 
 # ========== Rotas de Documentos ==========
 
-@app.get("/api/documents", tags=["Documentos"])
-async def list_documents(db: Session = Depends(get_db)):
-    return db.query(Document).all()
+@app.get("/api/documents", response_model=List[DocumentResponse], tags=["Documentos"])
+async def list_documents(
+    type: str = None,
+    uploaded_by: int = None,
+    is_public: bool = None,
+    params: ListParams = Depends(),
+    db: Session = Depends(get_tenant_db)
+):
+    conditions = equals(Document, type=type, uploaded_by=uploaded_by, is_public=is_public)
+    return list_collection(db, Document, params, conditions)
 
-@app.post("/api/documents", status_code=201, tags=["Documentos"])
-async def create_document(document_data: DocumentCreate, db: Session = Depends(get_db)):
+@app.post("/api/documents", response_model=DocumentResponse, status_code=201, tags=["Documentos"])
+async def create_document(document_data: DocumentCreate, db: Session = Depends(get_tenant_db)):
     document = Document(**document_data.dict())
     db.add(document)
     db.commit()
@@ -253,84 +625,293 @@ async def create_document(document_data: DocumentCreate, db: Session = Depends(g
 
 # ========== Rotas de Visitantes ==========
 
-@app.get("/api/visitors", tags=["Visitantes"])
-async def list_visitors(db: Session = Depends(get_db)):
-    return db.query(Visitor).all()
-
-@app.post("/api/visitors", status_code=201, tags=["Visitantes"])
-async def create_visitor(visitor_data: VisitorCreate, db: Session = Depends(get_db)):
+@app.get("/api/visitors", response_model=List[VisitorResponse], tags=["Visitantes"])
+@response_cache.versioned("visitors")
+async def list_visitors(
+    unit_id: int = None,
+    registered_by: int = None,
+    present: bool = None,
+    entry_from: datetime = None,
+    entry_to: datetime = None,
+    params: ListParams = Depends(),
+    db: Session = Depends(get_tenant_db)
+):
+    conditions = equals(Visitor, unit_id=unit_id, registered_by=registered_by)
+    if present is not None:
+        conditions.append(Visitor.exit_time == None if present else Visitor.exit_time != None)
+    if entry_from:
+        conditions.append(Visitor.entry_time >= entry_from)
+    if entry_to:
+        conditions.append(Visitor.entry_time < entry_to)
+    # Histórico: só visitantes com saída são arquivados
+    if entry_from and present is not True and archived_visitors.reaches(db.info["shard"], entry_from):
+        filters = {"unit_id": unit_id, "registered_by": registered_by}
+        return archived_visitors.listing(db, params, conditions, entry_from, entry_to, filters)
+    return list_collection(db, Visitor, params, conditions)
+
+@app.post("/api/visitors", response_model=VisitorResponse, status_code=201, tags=["Visitantes"])
+async def create_visitor(visitor_data: VisitorCreate, db: Session = Depends(get_tenant_db)):
     visitor = Visitor(**visitor_data.dict())
     db.add(visitor)
     db.commit()
+    response_cache.invalidate("visitors")
     db.refresh(visitor)
+    shard = db.info["shard"]
+    start, end = _day_bounds(datetime.utcnow())
+    if start <= to_naive_utc(visitor.entry_time) < end:
+        dashboard_counters.add(shard, "visitors_today")
+    if visitor.exit_time is None:
+        dashboard_counters.add(shard, "visitors_present")
+    hub.publish("visitor.arrived", serialize_entity(visitor), [unit_channel(visitor.unit_id)])
     return visitor
 
-@app.put("/api/visitors/{visitor_id}/exit", tags=["Visitantes"])
-async def register_exit(visitor_id: int, db: Session = Depends(get_db)):
+@app.put("/api/visitors/{visitor_id}/exit", response_model=VisitorResponse, tags=["Visitantes"])
+async def register_exit(visitor_id: int, db: Session = Depends(get_tenant_db)):
     visitor = db.query(Visitor).filter(Visitor.id == visitor_id).first()
     if not visitor:
         raise HTTPException(status_code=404, detail="Visitante não encontrado")
+    was_present = visitor.exit_time is None
     visitor.exit_time = datetime.utcnow()
     db.commit()
+    response_cache.invalidate("visitors")
+    if was_present:
+        dashboard_counters.add(db.info["shard"], "visitors_present", -1)
     return visitor
 
 # ========== Rotas de Avisos ==========
 
-@app.get("/api/notices", tags=["Avisos"])
-async def list_notices(db: Session = Depends(get_db)):
-    return db.query(Notice).filter(Notice.is_active == True).all()
+@app.get("/api/notices", response_model=List[NoticeResponse], tags=["Avisos"])
+@response_cache.versioned("notices")
+async def list_notices(db: Session = Depends(get_tenant_db)):
+    return rows_response(db, select(Notice.__table__).where(Notice.is_active == True))
 
-@app.post("/api/notices", status_code=201, tags=["Avisos"])
-async def create_notice(notice_data: NoticeCreate, db: Session = Depends(get_db)):
+@app.post("/api/notices", response_model=NoticeResponse, status_code=201, tags=["Avisos"])
+async def create_notice(notice_data: NoticeCreate, db: Session = Depends(get_tenant_db)):
     notice = Notice(**notice_data.dict())
     db.add(notice)
     db.commit()
+    response_cache.invalidate("notices")
     db.refresh(notice)
+    expires_at = to_naive_utc(notice.expires_at)
+    if notice.is_active and (expires_at is None or expires_at > datetime.utcnow()):
+        dashboard_counters.add(db.info["shard"], "active_notices", until=expires_at)
+    hub.publish("notice.created", serialize_entity(notice), [BROADCAST_CHANNEL])
     return notice
 
-@app.get("/api/notices/{notice_id}/history", tags=["Avisos"])
-async def get_notice_history(notice_id: int, db: Session = Depends(get_db)):
+@app.get("/api/notices/{notice_id}/history", response_model=List[NoticeHistoryResponse], tags=["Avisos"])
+async def get_notice_history(notice_id: int, db: Session = Depends(get_tenant_db)):
     return db.query(NoticeHistory).filter(NoticeHistory.notice_id == notice_id).all()
 
-@app.get("/api/notice-board", tags=["Avisos"])
-async def get_notice_board(db: Session = Depends(get_db)):
+@app.get("/api/notice-board", response_model=List[NoticeResponse], tags=["Avisos"])
+@response_cache.versioned("notices")
+@response_cache.coalesced("notices")
+async def get_notice_board(db: Session = Depends(get_tenant_db)):
     """Quadro de avisos - avisos ativos e não expirados"""
     now = datetime.utcnow()
-    return db.query(Notice).filter(
-        Notice.is_active == True,
-        (Notice.expires_at == None) | (Notice.expires_at > now)
-    ).order_by(Notice.published_at.desc()).all()
+    return rows_response(db, select(Notice.__table__).where(_active_notice(now)).order_by(Notice.published_at.desc()))
+
+# ========== Rotas do Dashboard ==========
+
+def _day_bounds(now: datetime):
+    start = datetime.combine(now.date(), time.min)
+    return start, start + timedelta(days=1)
+
+def _count(db: Session, model, *conditions) -> int:
+    return db.scalar(select(func.count()).select_from(model).where(*conditions))
+
+def _active_notice(now: datetime):
+    return (Notice.is_active == True) & ((Notice.expires_at == None) | (Notice.expires_at > now))
+
+def _count_visitors_today(db: Session, now: datetime) -> int:
+    start, end = _day_bounds(now)
+    return _count(db, Visitor, Visitor.entry_time >= start, Visitor.entry_time < end)
+
+def _next_notice_expiry(db: Session, now: datetime) -> Optional[datetime]:
+    return db.scalar(select(func.min(Notice.expires_at)).where(Notice.is_active == True, Notice.expires_at > now))
+
+dashboard_counters = CounterSet([
+    Counter("pending_schedulings", lambda db, now: _count(db, Scheduling, Scheduling.status == 'pending')),
+    Counter("pending_budgets", lambda db, now: _count(db, Budget, _pending_budget())),
+    Counter("visitors_today", _count_visitors_today, lambda db, now: _day_bounds(now)[1]),
+    Counter("visitors_present", lambda db, now: _count(db, Visitor, Visitor.exit_time == None)),
+    Counter("active_notices", lambda db, now: _count(db, Notice, _active_notice(now)), _next_notice_expiry),
+])
+
+@app.get("/api/dashboard/counters", tags=["Dashboard"])
+async def get_dashboard_counters(db: Session = Depends(get_tenant_db)):
+    """
+    Contadores do painel (agendamentos e orçamentos pendentes, visitantes
+    do dia e presentes, avisos ativos), servidos da memória. São do shard do
+    condomínio: somam todos os condomínios que compartilham o shard.
+    """
+    return dashboard_counters.snapshot(db.info["shard"], db)
+
+# ========== Rotas de Tempo Real ==========
+
+def _push_channels(user_id: Optional[int], unit_ids: List[int]) -> List[str]:
+    channels = [BROADCAST_CHANNEL]
+    if user_id is not None:
+        channels.append(user_channel(user_id))
+    channels.extend(unit_channel(unit_id) for unit_id in unit_ids)
+    return channels
+
+@app.get("/api/stream", tags=["Tempo Real"])
+async def stream_events(
+    request: Request,
+    user_id: int = None,
+    unit_id: List[int] = Query(default=[]),
+    last_event_id: int = None,
+    last_event_id_header: Optional[int] = Header(default=None, alias="Last-Event-ID")
+):
+    """Stream Server-Sent Events de avisos, visitantes e aprovações de agendamento"""
+    channels = _push_channels(user_id, unit_id)
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+
+    async def event_source():
+        # Intervalo de reconexão sugerido ao EventSource do navegador
+        yield "retry: 3000\n\n"
+        async with aclosing(hub.listen(channels, resume_from, settings.PUSH_KEEPALIVE_SECONDS)) as events:
+            async for event in events:
+                if event is None:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                else:
+                    yield event.to_sse()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/api/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    user_id: int = None,
+    unit_id: List[int] = Query(default=[]),
+    last_event_id: int = None
+):
+    """Stream WebSocket com os mesmos eventos do endpoint SSE"""
+    await websocket.accept()
+    channels = _push_channels(user_id, unit_id)
+
+    async def send_events():
+        async with aclosing(hub.listen(channels, last_event_id, settings.PUSH_KEEPALIVE_SECONDS)) as events:
+            async for event in events:
+                if event is None:
+                    await websocket.send_json({"type": "keepalive"})
+                else:
+                    await websocket.send_json(event.to_dict())
+
+    async def wait_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    sender = asyncio.create_task(send_events())
+    receiver = asyncio.create_task(wait_disconnect())
+    done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    if sender in done and not sender.cancelled() and sender.exception() is None:
+        # Assinatura encerrada pelo hub (consumidor lento): cliente deve retomar
+        await websocket.close()
 
 # ========== Rotas de Logs e Auditoria ==========
 
-@app.get("/api/logs", tags=["Auditoria"])
-async def list_logs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(Log).order_by(Log.created_at.desc()).offset(skip).limit(limit).all()
+@app.get("/api/logs", response_model=List[LogResponse], tags=["Auditoria"])
+async def list_logs(skip: int = 0, limit: int = 100, db: Session = Depends(get_tenant_db)):
+    return rows_response(db, select(Log.__table__).order_by(Log.created_at.desc()).offset(skip).limit(limit))
 
-@app.get("/api/audit", tags=["Auditoria"])
+@app.get("/api/audit", response_model=List[LogResponse], tags=["Auditoria"])
 async def get_audit(
     user_id: int = None,
     action: str = None,
     entity_type: str = None,
+    created_from: datetime = None,
+    created_to: datetime = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    all_shards: bool = Query(False, description="Consulta todos os shards (administração)"),
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: Session = Depends(get_tenant_db)
 ):
-    """Auditoria com filtros"""
-    query = db.query(Log)
+    """Auditoria com filtros (inclui os logs arquivados quando o intervalo os alcança)"""
+    if all_shards:
+        admin_claims(token_claims(token))
+    query = select(Log.__table__)
     if user_id:
-        query = query.filter(Log.user_id == user_id)
+        query = query.where(Log.user_id == user_id)
     if action:
-        query = query.filter(Log.action == action)
+        query = query.where(Log.action == action)
     if entity_type:
-        query = query.filter(Log.entity_type == entity_type)
-    return query.order_by(Log.created_at.desc()).offset(skip).limit(limit).all()
+        query = query.where(Log.entity_type == entity_type)
+    if created_from:
+        query = query.where(Log.created_at >= created_from)
+    if created_to:
+        query = query.where(Log.created_at < created_to)
+    query = query.order_by(Log.created_at.desc(), Log.id.desc())
+    if not all_shards and not archived_logs.reaches(db.info["shard"], created_from):
+        return rows_response(db, query.offset(skip).limit(limit))
+
+    filters = {"user_id": user_id or None, "action": action or None, "entity_type": entity_type or None}
+
+    def newest(shard_db: Session) -> list:
+        # As skip + limit primeiras linhas do shard, do banco e do arquivo
+        hot = [dict(row) for row in shard_db.execute(query.limit(skip + limit)).mappings()]
+        return archived_logs.newest(shard_db.info["shard"], hot, skip + limit, created_from, created_to, filters)
+
+    if not all_shards:
+        return json_response(newest(db)[skip:skip + limit])
+
+    # A página sai da junção ordenada das primeiras linhas de cada shard
+    per_shard = shards.fan_out(newest)
+    rows = sorted(
+        (row for result in per_shard.values() for row in result),
+        key=lambda row: (row["created_at"], row["id"]), reverse=True
+    )
+    return json_response(rows[skip:skip + limit])
+
+# ========== Rotas de Administração ==========
+
+@app.get("/api/admin/shards", tags=["Administração"])
+async def shard_stats(claims: dict = Depends(admin_claims)):
+    """Condomínios mapeados e volume por shard (para rebalanceamento, só administradores)"""
+    counted = (Visitor, Scheduling, Notice, Log)
+    counts = shards.fan_out(lambda shard_db: {
+        model.__tablename__: shard_db.execute(select(func.count()).select_from(model)).scalar() for model in counted
+    })
+    return [
+        {
+            "shard": name,
+            "condominiums": sorted(c for c, shard in shards.assignments.items() if shard == name),
+            "rows": counts[name]
+        }
+        for name in shards.engines
+    ]
 
 # ========== Health Check ==========
 
 @app.get("/health", tags=["Sistema"])
 async def health_check():
-    return {"status": "healthy", "service": "operations_service"}
+    health = {"status": "healthy", "service": "operations_service"}
+    if replicas:
+        health["replicas"] = replicas.status()
+    return health
+
+
+@app.get("/metrics", tags=["Sistema"], include_in_schema=False)
+async def metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/debug/sql-profile", tags=["Sistema"], include_in_schema=False)
+async def sql_profile(suspects: bool = False):
+    """Perfis de SQL das requisições recentes (apenas com SQL_PROFILER_ENABLED)"""
+    if not settings.SQL_PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler de SQL desativado")
+    return profiler.recent(only_suspects=suspects)
 
 if __name__ == "__main__":
     import uvicorn
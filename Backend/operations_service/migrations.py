@@ -0,0 +1,40 @@
+"""
+Migrações do schema do Operations Service
+
+Uso: python migrations.py upgrade|status|check|stamp <versão>
+"""
+from pathlib import Path
+
+from database import Base, engine
+import models  # noqa: F401 (registra as tabelas no metadata)
+from migrator import Migration, Migrator, add_columns, create_indexes, create_tables, main
+
+SCRIPT = Path(__file__).resolve().parents[2] / "Script" / "03_create_operations_tables.sql"
+
+
+def baseline(connection, metadata):
+    create_tables(
+        connection, metadata,
+        "areas", "schedulings", "budgets", "budget_history", "events", "meetings", "meeting_history",
+        "minutes", "minute_history", "documents", "visitors", "notices", "notice_history", "logs"
+    )
+
+
+def recurrence(connection, metadata):
+    add_columns(connection, metadata, "schedulings", "recurrence_rule", "recurrence_end")
+    add_columns(connection, metadata, "events", "recurrence_rule", "recurrence_end_date")
+    create_indexes(connection, metadata, "schedulings", ["recurrence_end"])
+    create_indexes(connection, metadata, "events", ["recurrence_end_date"])
+    create_tables(connection, metadata, "scheduling_exceptions", "event_exceptions")
+
+
+MIGRATIONS = [
+    Migration("0001", "Schema inicial", baseline),
+    Migration("0002", "Recorrência de agendamentos e eventos", recurrence),
+]
+
+migrator = Migrator(engine, Base.metadata, MIGRATIONS)
+
+
+if __name__ == "__main__":
+    main(migrator, SCRIPT)
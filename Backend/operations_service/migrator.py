@@ -0,0 +1,280 @@
+"""
+Migrações versionadas do schema
+
+Substitui o create_all na importação do main.py. Cada serviço declara em
+migrations.py uma lista ordenada de migrações; as aplicadas ficam na tabela
+schema_migrations. As operações disponíveis são idempotentes (criam apenas o
+que falta), de modo que um banco criado pelos Script/*.sql ou pelo antigo
+create_all é reconciliado aplicando a lista inteira.
+
+Na inicialização do serviço o comportamento segue SCHEMA_MODE:
+- migrate: aplica as migrações pendentes (uma consulta quando está em dia);
+- check: falha se houver migrações pendentes, sem alterar o banco;
+- skip: não toca no schema (produção, com migrações aplicadas no deploy).
+"""
+import argparse
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+
+MIGRATE = "migrate"
+CHECK = "check"
+SKIP = "skip"
+MODES = (MIGRATE, CHECK, SKIP)
+
+# Tabela de controle, fora do metadata dos modelos
+_control = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _control,
+    Column("version", String(50), primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+class Migration(NamedTuple):
+    """Migração versionada: upgrade recebe a conexão da transação"""
+    version: str
+    description: str
+    upgrade: Callable[[Connection, MetaData], None]
+
+
+# ========== Operações idempotentes ==========
+
+def create_tables(connection: Connection, metadata: MetaData, *names: str):
+    """Cria as tabelas (com índices) que ainda não existem"""
+    metadata.create_all(connection, tables=[metadata.tables[name] for name in names], checkfirst=True)
+
+
+def add_columns(connection: Connection, metadata: MetaData, table_name: str, *column_names: str):
+    """Adiciona as colunas do modelo que faltam na tabela"""
+    existing = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    table = metadata.tables[table_name]
+    for name in column_names:
+        if name not in existing:
+            ddl = CreateColumn(table.columns[name]).compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {ddl}"))
+
+
+def create_indexes(connection: Connection, metadata: MetaData, table_name: str, *column_sets: Iterable[str]):
+    """
+    Cria os índices do modelo sobre as colunas informadas que ainda não
+    existem. A comparação é pelas colunas, pois os scripts SQL usam nomes
+    (idx_*) diferentes dos gerados pelo SQLAlchemy (ix_*).
+    """
+    inspector = inspect(connection)
+    existing = {tuple(index["column_names"]) for index in inspector.get_indexes(table_name)}
+    existing |= {tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table_name)}
+    wanted = {tuple(columns) for columns in column_sets}
+    for index in metadata.tables[table_name].indexes:
+        columns = tuple(column.name for column in index.columns)
+        if columns in wanted and columns not in existing:
+            index.create(connection)
+
+
+# ========== Execução ==========
+
+class Migrator:
+    """Aplica e inspeciona as migrações de um serviço"""
+
+    def __init__(self, engine: Engine, metadata: MetaData, migrations: List[Migration]):
+        versions = [migration.version for migration in migrations]
+        if versions != sorted(versions) or len(set(versions)) != len(versions):
+            raise ValueError("Versões de migração devem ser únicas e crescentes")
+        self.engine = engine
+        self.metadata = metadata
+        self.migrations = migrations
+
+    def applied(self, connection: Connection) -> Dict[str, datetime]:
+        if not inspect(connection).has_table(schema_migrations.name):
+            return {}
+        return {
+            row.version: row.applied_at
+            for row in connection.execute(select(schema_migrations.c.version, schema_migrations.c.applied_at))
+        }
+
+    def pending(self) -> List[Migration]:
+        with self.engine.connect() as connection:
+            applied = self.applied(connection)
+        return [migration for migration in self.migrations if migration.version not in applied]
+
+    def upgrade(self, target: Optional[str] = None) -> List[str]:
+        """Aplica as migrações pendentes (até `target`, se informado)"""
+        pending = self.pending()
+        if not pending:
+            return []
+        applied = []
+        with self._lock():
+            _control.create_all(self.engine, checkfirst=True)
+            for migration in self.pending():
+                if target is not None and migration.version > target:
+                    break
+                with self.engine.begin() as connection:
+                    migration.upgrade(connection, self.metadata)
+                    try:
+                        with connection.begin_nested():
+                            connection.execute(schema_migrations.insert().values(
+                                version=migration.version,
+                                description=migration.description,
+                                applied_at=datetime.utcnow()
+                            ))
+                    except IntegrityError:
+                        # Aplicada em paralelo por outro processo
+                        pass
+                applied.append(migration.version)
+        return applied
+
+    def stamp(self, version: str):
+        """Marca as migrações até `version` como aplicadas, sem executá-las"""
+        _control.create_all(self.engine, checkfirst=True)
+        with self.engine.begin() as connection:
+            applied = self.applied(connection)
+            for migration in self.migrations:
+                if migration.version > version:
+                    break
+                if migration.version not in applied:
+                    connection.execute(schema_migrations.insert().values(
+                        version=migration.version, description=migration.description, applied_at=datetime.utcnow()
+                    ))
+
+    def status(self) -> List[dict]:
+        with self.engine.connect() as connection:
+            applied = self.applied(connection)
+        return [
+            {"version": migration.version, "description": migration.description, "applied_at": applied.get(migration.version)}
+            for migration in self.migrations
+        ]
+
+    def drift(self) -> List[str]:
+        """Diferenças entre os modelos e o banco (tabelas, colunas e índices faltantes)"""
+        problems = []
+        with self.engine.connect() as connection:
+            inspector = inspect(connection)
+            tables = set(inspector.get_table_names())
+            for table in self.metadata.sorted_tables:
+                if table.name not in tables:
+                    problems.append(f"tabela ausente: {table.name}")
+                    continue
+                columns = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in columns:
+                        problems.append(f"coluna ausente: {table.name}.{column.name}")
+                indexed = {tuple(index["column_names"]) for index in inspector.get_indexes(table.name)}
+                indexed |= {tuple(item["column_names"]) for item in inspector.get_unique_constraints(table.name)}
+                for index in table.indexes:
+                    columns = tuple(column.name for column in index.columns)
+                    if columns not in indexed and columns != tuple(table.primary_key.columns.keys()):
+                        problems.append(f"índice ausente: {table.name}({', '.join(columns)})")
+        return problems
+
+    def _lock(self):
+        return _MigrationLock(self.engine)
+
+
+class _MigrationLock:
+    """Lock consultivo do MySQL para que só um worker aplique migrações"""
+
+    def __init__(self, engine: Engine):
+        self.connection = engine.connect() if engine.dialect.name == "mysql" else None
+
+    def __enter__(self):
+        if self.connection is not None:
+            self.connection.execute(text("SELECT GET_LOCK('schema_migrations', 300)"))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.connection is not None:
+            self.connection.execute(text("SELECT RELEASE_LOCK('schema_migrations')"))
+            self.connection.close()
+
+
+def startup(migrator: Migrator, mode: str):
+    """Preparação do schema na inicialização do serviço, conforme SCHEMA_MODE"""
+    if mode == SKIP:
+        return
+    if mode == CHECK:
+        pending = migrator.pending()
+        if pending:
+            versions = ", ".join(migration.version for migration in pending)
+            raise RuntimeError(f"Migrações pendentes: {versions} (execute: python migrations.py upgrade)")
+        return
+    if mode == MIGRATE:
+        migrator.upgrade()
+        return
+    raise ValueError(f"SCHEMA_MODE deve ser um de: {', '.join(MODES)}")
+
+
+# ========== Reconciliação com Script/*.sql ==========
+
+_CREATE_TABLE = re.compile(r"CREATE TABLE IF NOT EXISTS\s+(\w+)\s*\((.*?)\n\);", re.S | re.I)
+_NOT_COLUMN = ("INDEX", "KEY", "UNIQUE", "FOREIGN", "PRIMARY", "CONSTRAINT")
+
+
+def script_tables(path: Path) -> Dict[str, List[str]]:
+    """Tabelas e colunas declaradas em um script SQL"""
+    tables = {}
+    for name, body in _CREATE_TABLE.findall(path.read_text(encoding="utf-8")):
+        columns = []
+        for line in body.splitlines():
+            line = line.strip()
+            if not line or line.startswith("--") or line.upper().startswith(_NOT_COLUMN):
+                continue
+            columns.append(line.split()[0].strip("`"))
+        tables[name] = columns
+    return tables
+
+
+def script_drift(metadata: MetaData, path: Path) -> List[str]:
+    """Diferenças entre os modelos e o script SQL do serviço"""
+    problems = []
+    declared = script_tables(path)
+    for table in metadata.sorted_tables:
+        if table.name not in declared:
+            problems.append(f"tabela ausente no script: {table.name}")
+            continue
+        columns = set(declared[table.name])
+        for column in table.columns:
+            if column.name not in columns:
+                problems.append(f"coluna ausente no script: {table.name}.{column.name}")
+        for name in columns - set(table.columns.keys()):
+            problems.append(f"coluna sem modelo: {table.name}.{name}")
+    for name in set(declared) - set(metadata.tables):
+        problems.append(f"tabela sem modelo: {name}")
+    return problems
+
+
+def main(migrator: Migrator, script: Path, argv: Optional[List[str]] = None):
+    """Linha de comando: upgrade, status, check, stamp"""
+    parser = argparse.ArgumentParser(description="Migrações do schema")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade = commands.add_parser("upgrade", help="Aplica as migrações pendentes")
+    upgrade.add_argument("--target", help="Para nesta versão")
+    commands.add_parser("status", help="Lista as migrações e quando foram aplicadas")
+    commands.add_parser("check", help="Compara modelos, banco e script SQL")
+    stamp = commands.add_parser("stamp", help="Marca migrações como aplicadas sem executá-las")
+    stamp.add_argument("version")
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        applied = migrator.upgrade(args.target)
+        print("Schema em dia" if not applied else f"Aplicadas: {', '.join(applied)}")
+    elif args.command == "status":
+        for item in migrator.status():
+            applied_at = item["applied_at"].isoformat(sep=" ", timespec="seconds") if item["applied_at"] else "pendente"
+            print(f"{item['version']}  {applied_at:<19}  {item['description']}")
+    elif args.command == "stamp":
+        migrator.stamp(args.version)
+        print(f"Marcadas até {args.version}")
+    else:
+        problems = [f"[banco] {problem}" for problem in migrator.drift()]
+        problems += [f"[{script.name}] {problem}" for problem in script_drift(migrator.metadata, script)]
+        for problem in problems:
+            print(problem)
+        print("Sem divergências" if not problems else f"{len(problems)} divergência(s)")
+        raise SystemExit(1 if problems else 0)
@@ -1,7 +1,8 @@
 """
 Modelos de dados do Operations Service
 """
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, DECIMAL, Date, Time
+from sqlalchemy import (Boolean, Column, Integer, String, Text, DateTime, ForeignKey, DECIMAL, Date, Time,
+                        UniqueConstraint)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -40,10 +41,30 @@ class Scheduling(Base):
     approved_by = Column(Integer)
     approved_at = Column(DateTime(timezone=True))
     notes = Column(Text)
+    recurrence_rule = Column(String(255))
+    recurrence_end = Column(DateTime(timezone=True), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     area = relationship("Area", back_populates="schedulings")
+    exceptions = relationship("SchedulingException", back_populates="scheduling", cascade="all, delete-orphan")
+
+
+class SchedulingException(Base):
+    """Modelo de Exceção de Ocorrência de Agendamento Recorrente"""
+    __tablename__ = "scheduling_exceptions"
+    __table_args__ = (UniqueConstraint("scheduling_id", "original_start"),)
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    scheduling_id = Column(Integer, ForeignKey("schedulings.id"), nullable=False, index=True)
+    original_start = Column(DateTime(timezone=True), nullable=False)
+    is_cancelled = Column(Boolean, default=False, nullable=False)
+    start_datetime = Column(DateTime(timezone=True))
+    end_datetime = Column(DateTime(timezone=True))
+    notes = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    scheduling = relationship("Scheduling", back_populates="exceptions")
 
 
 class Budget(Base):
@@ -96,8 +117,30 @@ class Event(Base):
     location = Column(String(255))
     organizer_id = Column(Integer, nullable=False, index=True)
     is_public = Column(Boolean, default=True, index=True)
+    recurrence_rule = Column(String(255))
+    recurrence_end_date = Column(Date, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    exceptions = relationship("EventException", back_populates="event", cascade="all, delete-orphan")
+
+
+class EventException(Base):
+    """Modelo de Exceção de Ocorrência de Evento Recorrente"""
+    __tablename__ = "event_exceptions"
+    __table_args__ = (UniqueConstraint("event_id", "original_date"),)
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, index=True)
+    original_date = Column(Date, nullable=False)
+    is_cancelled = Column(Boolean, default=False, nullable=False)
+    event_date = Column(Date)
+    start_time = Column(Time)
+    end_time = Column(Time)
+    notes = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    event = relationship("Event", back_populates="exceptions")
 
 
 class Meeting(Base):
@@ -0,0 +1,180 @@
+"""
+Canal de push em tempo real (SSE/WebSocket) do Operations Service
+"""
+import asyncio
+from collections import deque
+from itertools import count
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+from config import settings
+from serialization import dumps, entity_dict
+
+# Canal recebido por todas as conexões (ex.: avisos do quadro)
+BROADCAST_CHANNEL = "all"
+
+
+def user_channel(user_id: int) -> str:
+    """Nome do canal de um usuário"""
+    return f"user:{user_id}"
+
+
+def unit_channel(unit_id: int) -> str:
+    """Nome do canal de uma unidade"""
+    return f"unit:{unit_id}"
+
+
+def serialize_entity(obj) -> dict:
+    """Converte um modelo SQLAlchemy em dict serializável (apenas colunas)"""
+    return jsonable_encoder(entity_dict(obj))
+
+
+class PushEvent:
+    """Evento publicado no hub"""
+    __slots__ = ("id", "type", "channels", "data")
+
+    def __init__(self, event_id: int, event_type: str, channels: frozenset, data: dict):
+        self.id = event_id
+        self.type = event_type
+        self.channels = channels
+        self.data = data
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "type": self.type, "data": self.data}
+
+    def to_sse(self) -> str:
+        """Formata o evento no protocolo text/event-stream"""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {dumps(self.data).decode()}\n\n"
+
+
+class Subscription:
+    """Assinatura de uma conexão em um conjunto de canais"""
+    __slots__ = ("channels", "queue", "closed")
+
+    def __init__(self, channels: frozenset, queue_size: int):
+        self.channels = channels
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def push(self, event: PushEvent) -> bool:
+        """Entrega o evento; retorna False se o consumidor estiver atrasado demais"""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self):
+        """Encerra a assinatura; o consumidor deve retomar com Last-Event-ID"""
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class EventHub:
+    """
+    Hub pub/sub em processo.
+
+    Mantém um índice canal -> assinaturas para entregar cada evento apenas às
+    conexões interessadas, e um buffer circular com os últimos eventos para
+    permitir a retomada a partir do último ID recebido pelo cliente.
+    """
+
+    def __init__(self, history_size: int = 1000, queue_size: int = 100):
+        self._ids = count(1)
+        self._history: Deque[PushEvent] = deque(maxlen=history_size)
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self._queue_size = queue_size
+
+    @property
+    def connections(self) -> int:
+        """Número de assinaturas ativas"""
+        subscriptions = set()
+        for subs in self._channels.values():
+            subscriptions.update(subs)
+        return len(subscriptions)
+
+    @property
+    def last_event_id(self) -> int:
+        return self._history[-1].id if self._history else 0
+
+    def publish(self, event_type: str, data: dict, channels: Iterable[str]) -> PushEvent:
+        """Publica um evento nos canais informados"""
+        event = PushEvent(next(self._ids), event_type, frozenset(channels), jsonable_encoder(data))
+        self._history.append(event)
+
+        targets: Set[Subscription] = set()
+        for channel in event.channels:
+            targets.update(self._channels.get(channel, ()))
+        for subscription in targets:
+            if not subscription.push(event):
+                # Consumidor lento: desconecta para que retome pelo histórico
+                self.unsubscribe(subscription)
+                subscription.close()
+        return event
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        """Cria uma assinatura nos canais informados"""
+        subscription = Subscription(frozenset(channels), self._queue_size)
+        for channel in subscription.channels:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove uma assinatura de todos os seus canais"""
+        for channel in subscription.channels:
+            subs = self._channels.get(channel)
+            if subs is None:
+                continue
+            subs.discard(subscription)
+            if not subs:
+                del self._channels[channel]
+
+    def replay(self, channels: frozenset, last_event_id: int) -> List[PushEvent]:
+        """Eventos do histórico posteriores a last_event_id nos canais informados"""
+        if not self._history or last_event_id >= self._history[-1].id:
+            return []
+        return [
+            event for event in self._history
+            if event.id > last_event_id and not channels.isdisjoint(event.channels)
+        ]
+
+    async def listen(
+        self,
+        channels: Iterable[str],
+        last_event_id: Optional[int] = None,
+        keepalive: float = 15.0
+    ) -> AsyncIterator[Optional[PushEvent]]:
+        """
+        Itera sobre os eventos dos canais, retomando após last_event_id.
+        Produz None a cada `keepalive` segundos sem eventos.
+        """
+        subscription = self.subscribe(channels)
+        try:
+            delivered = 0
+            if last_event_id is not None:
+                for event in self.replay(subscription.channels, last_event_id):
+                    delivered = event.id
+                    yield event
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    break
+                if event.id <= delivered:
+                    continue
+                yield event
+        finally:
+            self.unsubscribe(subscription)
+
+
+# Hub compartilhado pelo processo
+hub = EventHub(history_size=settings.PUSH_HISTORY_SIZE, queue_size=settings.PUSH_QUEUE_SIZE)
@@ -0,0 +1,414 @@
+"""
+Regras de recorrência (subconjunto do RRULE da RFC 5545) para agendamentos e eventos
+
+As ocorrências nunca são materializadas no banco: cada série guarda apenas a
+regra e as exceções, e a expansão é feita sob demanda somente dentro da janela
+consultada.
+"""
+import calendar
+from datetime import date, datetime, time, timedelta, timezone
+from math import gcd
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Normaliza datetimes com fuso para UTC sem tzinfo (padrão do banco)"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class Occurrence(NamedTuple):
+    """Ocorrência expandida de uma série (ou de um registro avulso)"""
+    start: datetime
+    end: datetime
+    original_start: datetime
+    is_exception: bool = False
+
+
+class OccurrenceOverride(NamedTuple):
+    """Exceção aplicada a uma ocorrência, identificada pelo início original"""
+    is_cancelled: bool
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+class RecurrenceRule:
+    """Regra RRULE com FREQ, INTERVAL, COUNT, UNTIL, BYDAY e BYMONTHDAY"""
+
+    def __init__(
+        self,
+        freq: str,
+        interval: int = 1,
+        count: Optional[int] = None,
+        until: Optional[datetime] = None,
+        byday: Tuple[Tuple[Optional[int], int], ...] = (),
+        bymonthday: Tuple[int, ...] = ()
+    ):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.byday = byday
+        self.bymonthday = bymonthday
+
+    @classmethod
+    def parse(cls, text: str, max_count: Optional[int] = None) -> "RecurrenceRule":
+        """
+        Interpreta uma string RRULE; lança ValueError se inválida ou se COUNT
+        passar de `max_count` (as séries com COUNT são percorridas desde o início).
+        """
+        text = text.strip()
+        if text.upper().startswith("RRULE:"):
+            text = text[6:]
+        parts = {}
+        for item in filter(None, text.split(";")):
+            key, sep, value = item.partition("=")
+            if not sep or not value:
+                raise ValueError(f"Parte inválida na regra: {item!r}")
+            parts[key.strip().upper()] = value.strip().upper()
+
+        freq = parts.pop("FREQ", None)
+        if freq not in FREQUENCIES:
+            raise ValueError("FREQ deve ser DAILY, WEEKLY, MONTHLY ou YEARLY")
+        interval = int(parts.pop("INTERVAL", 1))
+        if interval < 1:
+            raise ValueError("INTERVAL deve ser maior que zero")
+        count = parts.pop("COUNT", None)
+        count = int(count) if count is not None else None
+        if count is not None and count < 1:
+            raise ValueError("COUNT deve ser maior que zero")
+        if count is not None and max_count is not None and count > max_count:
+            raise ValueError(f"COUNT deve ser no máximo {max_count}")
+        until = parts.pop("UNTIL", None)
+        if until is not None:
+            until = cls._parse_until(until)
+        if count is not None and until is not None:
+            raise ValueError("COUNT e UNTIL não podem ser usados juntos")
+
+        byday = []
+        for token in filter(None, parts.pop("BYDAY", "").split(",")):
+            ordinal, weekday = token[:-2], token[-2:]
+            if weekday not in WEEKDAYS:
+                raise ValueError(f"Dia da semana inválido: {token!r}")
+            if ordinal and freq != "MONTHLY":
+                raise ValueError("BYDAY com ordinal só é suportado em FREQ=MONTHLY")
+            ordinal = int(ordinal) if ordinal else None
+            if ordinal is not None and not (1 <= abs(ordinal) <= 5):
+                raise ValueError(f"Ordinal inválido em BYDAY: {token!r}")
+            byday.append((ordinal, WEEKDAYS[weekday]))
+        if byday and freq not in ("WEEKLY", "MONTHLY"):
+            raise ValueError("BYDAY só é suportado em FREQ=WEEKLY ou MONTHLY")
+
+        bymonthday = tuple(int(day) for day in filter(None, parts.pop("BYMONTHDAY", "").split(",")))
+        if bymonthday and freq != "MONTHLY":
+            raise ValueError("BYMONTHDAY só é suportado em FREQ=MONTHLY")
+        if any(day == 0 or abs(day) > 31 for day in bymonthday):
+            raise ValueError("BYMONTHDAY deve estar entre 1 e 31 (ou -31 e -1)")
+
+        if parts:
+            raise ValueError(f"Partes não suportadas: {', '.join(sorted(parts))}")
+        return cls(freq, interval, count, until, tuple(byday), bymonthday)
+
+    @staticmethod
+    def _parse_until(value: str) -> datetime:
+        for fmt in ("%Y%m%dT%H%M%SZ", "%Y%m%dT%H%M%S", "%Y%m%d"):
+            try:
+                parsed = datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            # UNTIL só com data inclui o dia inteiro
+            return parsed.replace(hour=23, minute=59, second=59) if fmt == "%Y%m%d" else parsed
+        raise ValueError(f"UNTIL inválido: {value!r}")
+
+    @property
+    def is_infinite(self) -> bool:
+        return self.count is None and self.until is None
+
+    @property
+    def cycle_days(self) -> Optional[int]:
+        """Período em dias após o qual o padrão se repete (apenas DAILY/WEEKLY)"""
+        if self.freq == "DAILY":
+            return self.interval
+        if self.freq == "WEEKLY":
+            return 7 * self.interval
+        return None
+
+    # ---------- Expansão ----------
+
+    def _period_start(self, dtstart: datetime, index: int) -> date:
+        """Primeiro dia do período de índice `index`"""
+        day = dtstart.date()
+        if self.freq == "DAILY":
+            return day + timedelta(days=index * self.interval)
+        if self.freq == "WEEKLY":
+            return day - timedelta(days=day.weekday()) + timedelta(weeks=index * self.interval)
+        if self.freq == "MONTHLY":
+            months = day.year * 12 + day.month - 1 + index * self.interval
+            return date(months // 12, months % 12 + 1, 1)
+        return date(day.year + index * self.interval, 1, 1)
+
+    def _first_index(self, dtstart: datetime, window_start: datetime) -> int:
+        """Índice do período que contém window_start (salto sem iterar)"""
+        start, target = dtstart.date(), window_start.date()
+        if target <= start:
+            return 0
+        if self.freq == "DAILY":
+            return (target - start).days // self.interval
+        if self.freq == "WEEKLY":
+            weeks = ((target - timedelta(days=target.weekday())) - (start - timedelta(days=start.weekday()))).days // 7
+            return weeks // self.interval
+        if self.freq == "MONTHLY":
+            return ((target.year - start.year) * 12 + target.month - start.month) // self.interval
+        return (target.year - start.year) // self.interval
+
+    def _candidates(self, dtstart: datetime, period: date) -> List[date]:
+        """Datas de ocorrência dentro de um período, em ordem"""
+        if self.freq == "DAILY":
+            return [period]
+        if self.freq == "WEEKLY":
+            weekdays = sorted({weekday for _, weekday in self.byday}) or [dtstart.weekday()]
+            return [period + timedelta(days=weekday) for weekday in weekdays]
+        if self.freq == "YEARLY":
+            try:
+                return [date(period.year, dtstart.month, dtstart.day)]
+            except ValueError:
+                return []  # 29/02 em ano não bissexto
+
+        year, month = period.year, period.month
+        days_in_month = calendar.monthrange(year, month)[1]
+        days = set()
+        for day in self.bymonthday:
+            day = day if day > 0 else days_in_month + day + 1
+            if 1 <= day <= days_in_month:
+                days.add(day)
+        for ordinal, weekday in self.byday:
+            first = (weekday - date(year, month, 1).weekday()) % 7 + 1
+            matches = list(range(first, days_in_month + 1, 7))
+            if ordinal is None:
+                days.update(matches)
+            elif abs(ordinal) <= len(matches):
+                days.add(matches[ordinal - 1] if ordinal > 0 else matches[ordinal])
+        if not self.bymonthday and not self.byday and dtstart.day <= days_in_month:
+            days.add(dtstart.day)
+        return [date(year, month, day) for day in sorted(days)]
+
+    def iter_starts(
+        self,
+        dtstart: datetime,
+        window_start: Optional[datetime] = None,
+        window_end: Optional[datetime] = None
+    ) -> Iterator[datetime]:
+        """
+        Gera os inícios das ocorrências a partir de window_start (inclusive)
+        até window_end (exclusive), sem percorrer os períodos anteriores
+        quando a regra não usa COUNT.
+        """
+        index = 0
+        if window_start is not None and self.count is None:
+            index = self._first_index(dtstart, window_start)
+        emitted = 0
+        clock = dtstart.time()
+        while True:
+            period = self._period_start(dtstart, index)
+            if window_end is not None and datetime.combine(period, time.min) >= window_end:
+                return
+            if self.until is not None and datetime.combine(period, time.min) > self.until:
+                return
+            for day in self._candidates(dtstart, period):
+                start = datetime.combine(day, clock)
+                if start < dtstart:
+                    continue
+                if self.until is not None and start > self.until:
+                    return
+                emitted += 1
+                if self.count is not None and emitted > self.count:
+                    return
+                if window_end is not None and start >= window_end:
+                    return
+                if window_start is None or start >= window_start:
+                    yield start
+            index += 1
+
+    def last_start(self, dtstart: datetime) -> Optional[datetime]:
+        """Início da última ocorrência (None se a série for infinita)"""
+        if self.is_infinite:
+            return None
+        last = None
+        if self.count is not None:
+            for last in self.iter_starts(dtstart):
+                pass
+            return last
+
+        # Com UNTIL, procura de trás para frente ampliando a janela
+        period_days = {"DAILY": 1, "WEEKLY": 7, "MONTHLY": 31, "YEARLY": 366}[self.freq]
+        lookback = timedelta(days=period_days * self.interval)
+        window_end = self.until + timedelta(microseconds=1)
+        while True:
+            window_start = max(dtstart, window_end - lookback)
+            for last in self.iter_starts(dtstart, window_start, window_end):
+                pass
+            if last is not None or window_start == dtstart:
+                return last
+            lookback *= 4
+
+
+def expand(
+    dtstart: datetime,
+    duration: timedelta,
+    rule: Optional[RecurrenceRule],
+    window_start: datetime,
+    window_end: datetime,
+    overrides: Optional[Dict[datetime, OccurrenceOverride]] = None
+) -> List[Occurrence]:
+    """
+    Ocorrências que se sobrepõem a [window_start, window_end), ordenadas pelo
+    início, já com as exceções aplicadas.
+    """
+    overrides = overrides or {}
+    if rule is None:
+        starts = [dtstart] if dtstart < window_end and dtstart + duration > window_start else []
+    else:
+        starts = rule.iter_starts(dtstart, window_start - duration, window_end)
+
+    occurrences = []
+    for start in starts:
+        override = overrides.get(start)
+        if override is None:
+            if start + duration > window_start:
+                occurrences.append(Occurrence(start, start + duration, start))
+            continue
+        if override.is_cancelled:
+            continue
+        occurrence = _moved(start, duration, override)
+        if occurrence.start < window_end and occurrence.end > window_start:
+            occurrences.append(occurrence)
+
+    # Ocorrências remarcadas para dentro da janela a partir de fora dela
+    seen = {occurrence.original_start for occurrence in occurrences}
+    for original, override in overrides.items():
+        if override.is_cancelled or original in seen:
+            continue
+        occurrence = _moved(original, duration, override)
+        if occurrence.start < window_end and occurrence.end > window_start:
+            if original < window_start - duration or original >= window_end:
+                occurrences.append(occurrence)
+
+    occurrences.sort()
+    return occurrences
+
+
+def _moved(original: datetime, duration: timedelta, override: OccurrenceOverride) -> Occurrence:
+    start = override.start or original
+    end = override.end or (start + duration)
+    return Occurrence(start, end, original, True)
+
+
+def first_overlap(a: List[Occurrence], b: List[Occurrence]) -> Optional[Tuple[Occurrence, Occurrence]]:
+    """Primeiro par sobreposto entre duas listas ordenadas pelo início"""
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i].end <= b[j].start:
+            i += 1
+        elif b[j].end <= a[i].start:
+            j += 1
+        else:
+            return a[i], b[j]
+    return None
+
+
+class Series:
+    """Agendamento avulso ou recorrente visto como série de ocorrências"""
+
+    def __init__(
+        self,
+        dtstart: datetime,
+        duration: timedelta,
+        rule: Optional[RecurrenceRule] = None,
+        overrides: Optional[Dict[datetime, OccurrenceOverride]] = None
+    ):
+        self.dtstart = dtstart
+        self.duration = duration
+        self.rule = rule
+        self.overrides = overrides or {}
+
+    def _moved(self) -> List[Occurrence]:
+        return [
+            _moved(original, self.duration, override)
+            for original, override in self.overrides.items() if not override.is_cancelled
+        ]
+
+    @property
+    def start_bound(self) -> datetime:
+        """Início mínimo das ocorrências, incluindo as remarcadas para antes da série"""
+        return min([self.dtstart] + [occurrence.start for occurrence in self._moved()])
+
+    @property
+    def end_bound(self) -> Optional[datetime]:
+        """Fim máximo das ocorrências, incluindo as remarcadas (None se infinita)"""
+        if self.rule is None:
+            last_end = self.dtstart + self.duration
+        else:
+            last = self.rule.last_start(self.dtstart)
+            if last is None:
+                return None
+            last_end = last + self.duration
+        return max([last_end] + [occurrence.end for occurrence in self._moved()])
+
+    def occurrences(self, window_start: datetime, window_end: datetime, with_overrides: bool = True):
+        return expand(
+            self.dtstart, self.duration, self.rule, window_start, window_end,
+            self.overrides if with_overrides else None
+        )
+
+
+def find_overlap(a: Series, b: Series, horizon_days: int) -> Optional[Tuple[Occurrence, Occurrence]]:
+    """
+    Verifica se duas séries têm ocorrências sobrepostas sem materializá-las
+    por inteiro.
+
+    - Se alguma das séries é finita, expande apenas o intervalo comum.
+    - Se ambas são infinitas e periódicas (DAILY/WEEKLY), o padrão combinado
+      se repete a cada MMC dos períodos, então basta um ciclo a partir do
+      início comum (ignorando cancelamentos, que são finitos).
+    - Caso contrário, limita a busca a `horizon_days`.
+    Ocorrências remarcadas entram nos limites das séries finitas e, no caso
+    periódico, são verificadas individualmente.
+    """
+    window_start = max(a.start_bound, b.start_bound)
+    bounds = [bound for bound in (a.end_bound, b.end_bound) if bound is not None]
+    with_overrides = True
+    if bounds:
+        window_end = min(bounds)
+    else:
+        cycle_a = a.rule.cycle_days if a.rule else None
+        cycle_b = b.rule.cycle_days if b.rule else None
+        if cycle_a and cycle_b:
+            cycle = cycle_a * cycle_b // gcd(cycle_a, cycle_b)
+            window_start = max(a.dtstart, b.dtstart)
+            window_end = window_start + timedelta(days=cycle) + max(a.duration, b.duration)
+            with_overrides = False
+        else:
+            window_end = window_start + timedelta(days=horizon_days)
+    if window_end <= window_start:
+        return None
+
+    overlap = first_overlap(
+        a.occurrences(window_start, window_end, with_overrides),
+        b.occurrences(window_start, window_end, with_overrides)
+    )
+    if overlap or with_overrides:
+        return overlap
+
+    for series, other in ((a, b), (b, a)):
+        for original, override in series.overrides.items():
+            if override.is_cancelled:
+                continue
+            moved = _moved(original, series.duration, override)
+            hit = first_overlap([moved], other.occurrences(moved.start, moved.end))
+            if hit:
+                return hit if series is a else (hit[1], hit[0])
+    return None
@@ -0,0 +1,436 @@
+"""
+Cache em processo de respostas GET (LRU com TTL)
+
+Uso declarativo nas rotas:
+
+    @app.get("/api/areas", ...)
+    @response_cache.cached("areas")
+    async def list_areas(...): ...
+
+e, nas rotas de escrita do mesmo serviço, response_cache.invalidate("areas")
+depois do commit.
+
+- Chave: caminho, query string (parâmetros ordenados), header
+  X-Condominium-Id e grupo do usuário (quando a rota recebe o usuário
+  corrente, qualquer argumento com `group_id`). Respostas de usuários do mesmo grupo são compartilhadas.
+- Guarda o corpo já serializado; um acerto devolve os bytes sem consultar o
+  banco nem serializar (as dependências da rota, como a autenticação, ainda
+  executam).
+- Só respostas 200 completas entram no cache; StreamingResponse e erros
+  passam direto.
+- Uma invalidação durante o cálculo de uma falta impede que o resultado,
+  possivelmente anterior à escrita, seja guardado.
+- O cache é por processo: com vários workers, a invalidação vale para o
+  worker que atendeu a escrita e RESPONSE_CACHE_TTL_SECONDS limita o atraso
+  nos demais.
+
+Acertos, faltas e a taxa de acerto por rota são expostos em /metrics.
+
+GET condicional: cada entrada guarda o ETag do corpo, e um If-None-Match
+igual é respondido com 304 antes de executar a rota. Rotas sem cache podem
+usar @response_cache.versioned(tags): o ETag deriva da versão das tags
+(incrementada por invalidate), da chave da requisição e de uma janela de
+ETAG_VERSION_WINDOW_SECONDS, que limita o tempo em que um ETag continua
+válido sem escrita local (escritas em outros workers, dados dependentes do
+relógio).
+
+Coalescência (single-flight): @response_cache.coalesced(tags) faz com que
+requisições GET idênticas (mesma chave do cache: rota, parâmetros, tenant e
+grupo do usuário) simultâneas compartilhem uma única execução da rota. A
+primeira executa; as demais aguardam e recebem uma cópia da mesma resposta
+serializada (header X-Coalesced: SHARED). O resultado continua valendo por
+COALESCE_WINDOW_SECONDS depois de pronto, para quem chegar logo em seguida.
+Uma invalidação das tags encerra o compartilhamento: quem chega depois da
+escrita executa de novo. Erros (HTTPException etc.) são repassados a quem
+estava aguardando, mas não ficam retidos na janela.
+
+As dependências (get_db/get_tenant_db, autenticação) executam normalmente
+em cada requisição; como a sessão do SQLAlchemy só obtém uma conexão do
+pool na primeira consulta, quem aguarda não ocupa conexão. Rotas `async`
+que consultam o banco de forma síncrona não cedem o event loop durante a
+execução: as requisições idênticas ficam na fila e é a janela que as faz
+reaproveitar o resultado.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import Response, StreamingResponse
+from fastapi.routing import serialize_response
+
+from compression import etag_for, etag_matches
+from config import settings
+from metrics import REGISTRY, Counter, Gauge
+
+HEADER = "X-Cache"
+COALESCED_HEADER = "X-Coalesced"
+REQUEST_PARAMETER = "_cache_request"
+
+# Distingue os ETags de versão de processos diferentes (contadores são locais)
+_BOOT = os.urandom(8).hex()
+
+cache_requests = REGISTRY.register(Counter(
+    "response_cache_requests_total", "Consultas ao cache de respostas", ("route", "result")
+))
+coalesced_requests = REGISTRY.register(Counter(
+    "coalesced_requests_total", "Requisições GET coalescidas (leader executou, shared aguardou)", ("route", "role")
+))
+
+
+class CacheEntry:
+    __slots__ = ("body", "status_code", "headers", "tags", "expires", "etag")
+
+    def __init__(self, body: bytes, status_code: int, headers: Dict[str, str], tags: Tuple[str, ...], expires: float):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers
+        self.tags = tags
+        self.expires = expires
+        self.etag = headers.get("etag") or etag_for(body)
+
+    def response(self, result: str) -> Response:
+        return Response(self.body, self.status_code, headers={**self.headers, "etag": self.etag, HEADER: result})
+
+
+class _Flight:
+    """Execução em andamento (ou recém-concluída) de uma chave coalescida"""
+    __slots__ = ("future", "generations", "expires")
+
+    def __init__(self, future: asyncio.Future, generations: Tuple[int, ...]):
+        self.future = future
+        self.generations = generations
+        self.expires: Optional[float] = None
+
+    def joinable(self, generations: Tuple[int, ...], now: float) -> bool:
+        if generations != self.generations:
+            return False
+        return self.expires is None or self.expires > now
+
+
+class ResponseCache:
+    """Entradas em ordem de uso (LRU), com validade e índice por tag"""
+
+    def __init__(self, max_entries: int, ttl: float, enabled: bool = True, coalesce_window: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.coalesce_window = coalesce_window
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self._by_tag: Dict[str, Set[tuple]] = {}
+        self._generations: Dict[str, int] = {}
+        self._hits: Dict[str, int] = {}
+        self._lookups: Dict[str, int] = {}
+        self._flights: Dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: CacheEntry, generations: Tuple[int, ...]):
+        with self._lock:
+            if generations != self._generation(entry.tags):
+                # Houve escrita enquanto a resposta era calculada
+                return
+            self._discard(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+
+    def _generation(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def generation(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return self._generation(tags)
+
+    def invalidate(self, *tags: str):
+        """Remove as entradas marcadas com qualquer uma das tags"""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in self._by_tag.pop(tag, ()):
+                    self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def record(self, route: str, result: str):
+        cache_requests.inc(route, result)
+        if result == "bypass":
+            return
+        with self._lock:
+            self._lookups[route] = self._lookups.get(route, 0) + 1
+            if result == "hit":
+                self._hits[route] = self._hits.get(route, 0) + 1
+
+    def hit_ratios(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return {(route,): self._hits.get(route, 0) / lookups for route, lookups in self._lookups.items()}
+
+    def cached(self, *tags: str, ttl: Optional[float] = None):
+        """Decorador de rota GET: guarda a resposta serializada sob as tags dadas"""
+
+        def decorator(endpoint):
+            if not self.enabled:
+                return endpoint
+            signature, call = _with_request(endpoint)
+
+            @functools.wraps(endpoint)
+            async def wrapper(*args, _cache_request: Request, **kwargs):
+                route = _cache_request.scope["route"]
+                key = self._key(_cache_request, kwargs)
+                entry = self.get(key)
+                if entry is not None:
+                    self.record(route.path, "hit")
+                    if settings.ETAGS_ENABLED and etag_matches(_cache_request.headers.get("if-none-match"), entry.etag):
+                        return not_modified(entry.etag)
+                    return entry.response("HIT")
+
+                generations = self.generation(tags)
+                result = await call(_cache_request, args, kwargs)
+                entry = await self._entry(route, result, tags, ttl)
+                if entry is None:
+                    self.record(route.path, "bypass")
+                    return result
+                self.put(key, entry, generations)
+                self.record(route.path, "miss")
+                return entry.response("MISS")
+
+            wrapper.__signature__ = signature
+            return wrapper
+
+        return decorator
+
+    def versioned(self, *tags: str):
+        """Decorador de rota GET: ETag pela versão das tags, com 304 antes de executar a rota"""
+
+        def decorator(endpoint):
+            if not settings.ETAGS_ENABLED:
+                return endpoint
+            signature, call = _with_request(endpoint)
+
+            @functools.wraps(endpoint)
+            async def wrapper(*args, _cache_request: Request, **kwargs):
+                window = int(time.time() // settings.ETAG_VERSION_WINDOW_SECONDS)
+                version = repr((_BOOT, self._key(_cache_request, kwargs), self.generation(tags), window))
+                etag = 'W/"v' + hashlib.blake2b(version.encode(), digest_size=12).hexdigest() + '"'
+                if etag_matches(_cache_request.headers.get("if-none-match"), etag):
+                    return not_modified(etag)
+
+                result = await call(_cache_request, args, kwargs)
+                if isinstance(result, StreamingResponse):
+                    return result
+                response = result if isinstance(result, Response) else await self._render(
+                    _cache_request.scope["route"], result
+                )
+                if response.status_code == 200:
+                    response.headers["etag"] = etag
+                return response
+
+            wrapper.__signature__ = signature
+            return wrapper
+
+        return decorator
+
+    def coalesced(self, *tags: str, window: Optional[float] = None):
+        """Decorador de rota GET: requisições idênticas simultâneas compartilham uma execução"""
+
+        def decorator(endpoint):
+            if not settings.COALESCE_ENABLED:
+                return endpoint
+            signature, call = _with_request(endpoint)
+
+            async def execute(request, args, kwargs):
+                result = await call(request, args, kwargs)
+                return await self._shareable(request.scope["route"], result), result
+
+            @functools.wraps(endpoint)
+            async def wrapper(*args, _cache_request: Request, **kwargs):
+                route = _cache_request.scope["route"]
+                key = self._key(_cache_request, kwargs)
+                generations = self.generation(tags)
+                flight = self._flights.get(key)
+                if flight is not None and flight.joinable(generations, time.monotonic()):
+                    try:
+                        shared = await asyncio.shield(flight.future)
+                    except asyncio.CancelledError:
+                        # Só a execução compartilhada foi cancelada: executa por conta própria
+                        if not flight.future.cancelled():
+                            raise
+                        shared = None
+                    if shared is not None:
+                        coalesced_requests.inc(route.path, "shared")
+                        return _copy(shared, {COALESCED_HEADER: "SHARED"})
+                    shared, result = await execute(_cache_request, args, kwargs)
+                    return result if shared is None else _copy(shared)
+
+                flight = _Flight(asyncio.get_running_loop().create_future(), generations)
+                self._flights[key] = flight
+                try:
+                    shared, result = await execute(_cache_request, args, kwargs)
+                except BaseException as exc:
+                    self._land(key, flight, None)
+                    if isinstance(exc, asyncio.CancelledError):
+                        flight.future.cancel()
+                    else:
+                        flight.future.set_exception(exc)
+                        # Marca a exceção como recuperada mesmo sem ninguém aguardando
+                        flight.future.exception()
+                    raise
+                flight.future.set_result(shared)
+                window_seconds = None
+                if shared is not None:
+                    window_seconds = self.coalesce_window if window is None else window
+                self._land(key, flight, window_seconds)
+                coalesced_requests.inc(route.path, "leader")
+                return result if shared is None else _copy(shared)
+
+            wrapper.__signature__ = signature
+            return wrapper
+
+        return decorator
+
+    def _land(self, key: tuple, flight: _Flight, window: Optional[float]):
+        """Fim da execução: mantém o resultado pela janela ou libera a chave"""
+        now = time.monotonic()
+        if window:
+            flight.expires = now + window
+        elif self._flights.get(key) is flight:
+            del self._flights[key]
+        if len(self._flights) > self.max_entries:
+            for stale in [k for k, f in self._flights.items() if f.expires is not None and f.expires <= now]:
+                del self._flights[stale]
+
+    async def _shareable(self, route, result) -> Optional[Tuple[bytes, int, Dict[str, str]]]:
+        """Corpo, status e headers da resposta, ou None se ela não pode ser copiada (streaming)"""
+        if isinstance(result, StreamingResponse) or (isinstance(result, Response) and result.background):
+            return None
+        response = result if isinstance(result, Response) else await self._render(route, result)
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in response.raw_headers if name != b"content-length"
+        }
+        return response.body, response.status_code, headers
+
+    @staticmethod
+    def _key(request: Request, kwargs: dict) -> tuple:
+        group = None
+        for value in kwargs.values():
+            group = getattr(value, "group_id", None)
+            if group is not None:
+                break
+        # O tenant (X-Condominium-Id) também separa as entradas
+        tenant = request.headers.get("x-condominium-id")
+        return request.url.path, tuple(sorted(request.query_params.multi_items())), group, tenant
+
+    async def _entry(self, route, result, tags: Tuple[str, ...], ttl: Optional[float]) -> Optional[CacheEntry]:
+        if isinstance(result, StreamingResponse):
+            return None
+        response = result if isinstance(result, Response) else await self._render(route, result)
+        if response.status_code != 200:
+            return None
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in response.raw_headers if name != b"content-length"
+        }
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        return CacheEntry(response.body, response.status_code, headers, tags, expires)
+
+    @staticmethod
+    async def _render(route, result) -> Response:
+        """Mesma validação/serialização que o FastAPI aplicaria com o response_model da rota"""
+        content = await serialize_response(
+            field=route.response_field,
+            response_content=result,
+            include=route.response_model_include,
+            exclude=route.response_model_exclude,
+            by_alias=route.response_model_by_alias,
+            exclude_unset=route.response_model_exclude_unset,
+            exclude_defaults=route.response_model_exclude_defaults,
+            exclude_none=route.response_model_exclude_none,
+        )
+        response_class = route.response_class
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+        return response_class(content, status_code=route.status_code or 200)
+
+
+def _with_request(endpoint):
+    """
+    Assinatura da rota acrescida do Request (injetado pelo FastAPI só para
+    montar a chave) e a chamada da rota original. O FastAPI injeta um único
+    parâmetro Request por rota, então decoradores empilhados compartilham o
+    mesmo _cache_request.
+    """
+    signature = inspect.signature(endpoint)
+    forward = REQUEST_PARAMETER in signature.parameters
+    if not forward:
+        signature = signature.replace(parameters=list(signature.parameters.values()) + [
+            inspect.Parameter(REQUEST_PARAMETER, inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+        ])
+    is_coroutine = inspect.iscoroutinefunction(endpoint)
+
+    async def call(request: Request, args: tuple, kwargs: dict):
+        if forward:
+            kwargs = {**kwargs, REQUEST_PARAMETER: request}
+        if is_coroutine:
+            return await endpoint(*args, **kwargs)
+        return await run_in_threadpool(endpoint, *args, **kwargs)
+
+    return signature, call
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"etag": etag})
+
+
+def _copy(shared: Tuple[bytes, int, Dict[str, str]], extra: Optional[Dict[str, str]] = None) -> Response:
+    body, status_code, headers = shared
+    return Response(body, status_code, headers={**headers, **(extra or {})})
+
+
+response_cache = ResponseCache(
+    settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_TTL_SECONDS, settings.RESPONSE_CACHE_ENABLED,
+    settings.COALESCE_WINDOW_SECONDS
+)
+
+REGISTRY.register(Gauge(
+    "response_cache_entries", "Entradas no cache de respostas", collect=lambda: {(): len(response_cache)}
+))
+REGISTRY.register(Gauge(
+    "response_cache_hit_ratio", "Taxa de acerto do cache de respostas por rota", ("route",),
+    collect=response_cache.hit_ratios
+))
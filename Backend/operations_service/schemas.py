@@ -0,0 +1,407 @@
+"""
+Schemas Pydantic para validação de dados
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date, datetime, time
+
+
+# ========== Area Schemas ==========
+
+class AreaCreate(BaseModel):
+    name: str
+    description: str = None
+    capacity: int = None
+    hourly_rate: float = None
+    requires_approval: bool = False
+
+
+class AreaResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    capacity: Optional[int] = None
+    hourly_rate: Optional[float] = None
+    requires_approval: Optional[bool] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Scheduling Schemas ==========
+
+class SchedulingCreate(BaseModel):
+    area_id: int
+    unit_id: int
+    user_id: int
+    start_datetime: datetime
+    end_datetime: datetime
+    purpose: str = None
+    guests_count: int = None
+    recurrence_rule: str = None
+
+
+class SchedulingResponse(BaseModel):
+    id: int
+    area_id: int
+    unit_id: int
+    user_id: int
+    start_datetime: datetime
+    end_datetime: datetime
+    status: str
+    purpose: Optional[str] = None
+    guests_count: Optional[int] = None
+    approved_by: Optional[int] = None
+    approved_at: Optional[datetime] = None
+    notes: Optional[str] = None
+    recurrence_rule: Optional[str] = None
+    recurrence_end: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class SchedulingOccurrenceResponse(SchedulingResponse):
+    original_start: datetime
+    is_exception: bool
+
+
+# ========== Scheduling Exception Schemas ==========
+
+class SchedulingExceptionCreate(BaseModel):
+    original_start: datetime
+    is_cancelled: bool = False
+    start_datetime: datetime = None
+    end_datetime: datetime = None
+    notes: str = None
+
+
+class SchedulingExceptionResponse(BaseModel):
+    id: int
+    scheduling_id: int
+    original_start: datetime
+    is_cancelled: bool
+    start_datetime: Optional[datetime] = None
+    end_datetime: Optional[datetime] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Budget Schemas ==========
+
+class BudgetCreate(BaseModel):
+    type: str
+    title: str
+    description: str = None
+    provider_id: int = None
+    amount: float
+    requested_by: int
+
+
+class BudgetResponse(BaseModel):
+    id: int
+    type: str
+    title: str
+    description: Optional[str] = None
+    provider_id: Optional[int] = None
+    amount: float
+    status: str
+    requested_by: int
+    approved_by: Optional[int] = None
+    requested_at: Optional[datetime] = None
+    approved_at: Optional[datetime] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class BudgetHistoryResponse(BaseModel):
+    id: int
+    budget_id: int
+    old_status: Optional[str] = None
+    new_status: str
+    changed_by: int
+    comments: Optional[str] = None
+    changed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Event Schemas ==========
+
+class EventCreate(BaseModel):
+    title: str
+    description: str = None
+    event_date: date
+    start_time: time = None
+    end_time: time = None
+    location: str = None
+    organizer_id: int
+    recurrence_rule: str = None
+
+
+class EventResponse(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    event_date: date
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    location: Optional[str] = None
+    organizer_id: int
+    is_public: Optional[bool] = None
+    recurrence_rule: Optional[str] = None
+    recurrence_end_date: Optional[date] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class EventOccurrenceResponse(EventResponse):
+    original_date: date
+    is_exception: bool
+
+
+# ========== Event Exception Schemas ==========
+
+class EventExceptionCreate(BaseModel):
+    original_date: date
+    is_cancelled: bool = False
+    event_date: date = None
+    start_time: time = None
+    end_time: time = None
+    notes: str = None
+
+
+class EventExceptionResponse(BaseModel):
+    id: int
+    event_id: int
+    original_date: date
+    is_cancelled: bool
+    event_date: Optional[date] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Meeting Schemas ==========
+
+class MeetingCreate(BaseModel):
+    title: str
+    description: str = None
+    meeting_date: datetime
+    location: str = None
+    organizer_id: int
+
+
+class MeetingResponse(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    meeting_date: datetime
+    location: Optional[str] = None
+    organizer_id: int
+    status: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class MeetingHistoryResponse(BaseModel):
+    id: int
+    meeting_id: int
+    field_name: str
+    old_value: Optional[str] = None
+    new_value: Optional[str] = None
+    changed_by: int
+    changed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Minute Schemas ==========
+
+class MinuteCreate(BaseModel):
+    meeting_id: int
+    content: str
+    attendees: str = None
+    decisions: str = None
+    issued_by: int
+
+
+class MinuteResponse(BaseModel):
+    id: int
+    meeting_id: int
+    content: str
+    attendees: Optional[str] = None
+    decisions: Optional[str] = None
+    issued_by: int
+    issued_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class MinuteHistoryResponse(BaseModel):
+    id: int
+    minute_id: int
+    field_name: str
+    old_value: Optional[str] = None
+    new_value: Optional[str] = None
+    changed_by: int
+    changed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Document Schemas ==========
+
+class DocumentCreate(BaseModel):
+    title: str
+    type: str
+    description: str = None
+    file_path: str
+    file_name: str
+    file_size: int = None
+    mime_type: str = None
+    uploaded_by: int
+    is_public: bool = False
+
+
+class DocumentResponse(BaseModel):
+    id: int
+    title: str
+    type: str
+    description: Optional[str] = None
+    file_path: str
+    file_name: str
+    file_size: Optional[int] = None
+    mime_type: Optional[str] = None
+    uploaded_by: int
+    is_public: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Visitor Schemas ==========
+
+class VisitorCreate(BaseModel):
+    name: str
+    document: str = None
+    unit_id: int
+    entry_time: datetime
+    vehicle_plate: str = None
+    purpose: str = None
+    registered_by: int
+
+
+class VisitorResponse(BaseModel):
+    id: int
+    name: str
+    document: Optional[str] = None
+    unit_id: int
+    entry_time: datetime
+    exit_time: Optional[datetime] = None
+    vehicle_plate: Optional[str] = None
+    purpose: Optional[str] = None
+    authorized_by: Optional[int] = None
+    registered_by: int
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Notice Schemas ==========
+
+class NoticeCreate(BaseModel):
+    title: str
+    content: str
+    type: str
+    priority: str = 'normal'
+    published_by: int
+    expires_at: datetime = None
+
+
+class NoticeResponse(BaseModel):
+    id: int
+    title: str
+    content: str
+    type: str
+    priority: str
+    published_by: int
+    published_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class NoticeHistoryResponse(BaseModel):
+    id: int
+    notice_id: int
+    field_name: str
+    old_value: Optional[str] = None
+    new_value: Optional[str] = None
+    changed_by: int
+    changed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Log Schemas ==========
+
+class LogResponse(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    action: str
+    entity_type: Optional[str] = None
+    entity_id: Optional[int] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    request_method: Optional[str] = None
+    request_path: Optional[str] = None
+    request_data: Optional[str] = None
+    response_status: Optional[int] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+# ========== Response Wrappers ==========
+
+class MessageResponse(BaseModel):
+    message: str
@@ -0,0 +1,45 @@
+"""
+Serialização rápida de respostas com orjson
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi.responses import Response
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+
+def _default(value):
+    # DECIMAL é devolvido como número, como faz o jsonable_encoder
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    """Serializa para JSON (datetime, date e time em ISO 8601)"""
+    return orjson.dumps(content, default=_default)
+
+
+def entity_dict(obj) -> dict:
+    """Colunas de um modelo SQLAlchemy como dict (sem relacionamentos)"""
+    mapper = inspect(obj).mapper
+    return {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs}
+
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[Sequence]) -> List[dict]:
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def json_response(content, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=dumps(content), media_type="application/json", headers=headers)
+
+
+def rows_response(db: Session, statement, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Executa um select() de colunas e serializa as tuplas diretamente,
+    sem construir objetos ORM nem passar pelo jsonable_encoder.
+    """
+    result = db.execute(statement)
+    return json_response(rows_to_dicts(list(result.keys()), result), headers)
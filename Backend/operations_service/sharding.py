@@ -0,0 +1,115 @@
+"""
+Sharding por condomínio (tenant)
+
+O mapa de shards vem da configuração:
+- SHARD_URLS: nome do shard -> URL do banco (ex.: {"grandes": "mysql+pymysql://..."});
+- SHARD_MAP: condominium_id -> nome do shard.
+
+Condomínios fora do mapa ficam no shard "default", o banco de DATABASE_URL
+(com réplicas de leitura, se configuradas). Sem SHARD_URLS o serviço
+funciona como antes, com um único banco.
+
+Nas rotas, o tenant vem do header X-Condominium-Id e get_tenant_db devolve
+uma sessão no shard dele. Fora de requisições, tenant_session(id) faz o
+mesmo. Consultas administrativas que precisam de todos os tenants usam
+shards.fan_out, que executa a função em cada shard em paralelo (uma thread
+e uma sessão por shard).
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from fastapi import Header, HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from config import settings
+from database import SessionLocal, engine, pool_options
+
+DEFAULT_SHARD = "default"
+TENANT_HEADER = "X-Condominium-Id"
+
+
+class ShardRouter:
+    """Mapa condomínio -> shard e uma fábrica de sessões por shard"""
+
+    def __init__(self, urls: Dict[str, str], assignments: Dict[int, str]):
+        unknown = set(assignments.values()) - set(urls) - {DEFAULT_SHARD}
+        if unknown:
+            raise ValueError(f"SHARD_MAP referencia shards sem URL: {', '.join(sorted(unknown))}")
+        self.assignments = dict(assignments)
+        self.engines: Dict[str, Engine] = {DEFAULT_SHARD: engine}
+        self._factories: Dict[str, sessionmaker] = {DEFAULT_SHARD: SessionLocal}
+        for name, url in urls.items():
+            if name == DEFAULT_SHARD:
+                raise ValueError(f'"{DEFAULT_SHARD}" é o banco de DATABASE_URL e não pode estar em SHARD_URLS')
+            shard_engine = create_engine(url, pool_pre_ping=True, pool_recycle=3600, echo=False, **pool_options(url))
+            self.engines[name] = shard_engine
+            self._factories[name] = sessionmaker(autocommit=False, autoflush=False, bind=shard_engine)
+        os.register_at_fork(after_in_child=self._discard_inherited_connections)
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def _discard_inherited_connections(self):
+        for shard_engine in self.extra_engines().values():
+            shard_engine.dispose(close=False)
+
+    def shard_for(self, condominium_id: Optional[int]) -> str:
+        if condominium_id is None:
+            return DEFAULT_SHARD
+        return self.assignments.get(condominium_id, DEFAULT_SHARD)
+
+    def session(self, condominium_id: Optional[int]) -> Session:
+        """Sessão no shard do condomínio; o nome do shard fica em session.info["shard"]"""
+        name = self.shard_for(condominium_id)
+        db = self._factories[name]()
+        db.info["shard"] = name
+        return db
+
+    def extra_engines(self) -> Dict[str, Engine]:
+        """Engines além do padrão (para migrações e instrumentação)"""
+        return {name: shard_engine for name, shard_engine in self.engines.items() if name != DEFAULT_SHARD}
+
+    def fan_out(self, func: Callable[[Session], object]) -> Dict[str, object]:
+        """Executa func(sessão) em todos os shards em paralelo; resultado por nome do shard (também em sessão.info["shard"])"""
+
+        def run(name: str):
+            with self._factories[name]() as db:
+                db.info["shard"] = name
+                return func(db)
+
+        if len(self.engines) == 1:
+            return {DEFAULT_SHARD: run(DEFAULT_SHARD)}
+        with ThreadPoolExecutor(max_workers=len(self.engines)) as executor:
+            futures = {name: executor.submit(run, name) for name in self.engines}
+            return {name: future.result() for name, future in futures.items()}
+
+
+shards = ShardRouter(settings.SHARD_URLS, settings.SHARD_MAP)
+
+
+@contextmanager
+def tenant_session(condominium_id: Optional[int]) -> Iterator[Session]:
+    """Sessão no shard do condomínio, para uso fora de requisições"""
+    db = shards.session(condominium_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_tenant_db(x_condominium_id: Optional[int] = Header(None, description="Condomínio (tenant) da requisição")):
+    """
+    Dependency: sessão no shard do condomínio do header X-Condominium-Id
+    (sem o header, shard padrão)
+    """
+    if x_condominium_id is not None and x_condominium_id <= 0:
+        raise HTTPException(status_code=400, detail=f"{TENANT_HEADER} inválido")
+    db = shards.session(x_condominium_id)
+    try:
+        yield db
+    finally:
+        db.close()
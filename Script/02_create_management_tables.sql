@@ -61,6 +61,19 @@ CREATE TABLE IF NOT EXISTS employee_history (
     INDEX idx_emp_history_changed_at (changed_at)
 );
 
+-- Tabela: employee_snapshots (estado completo a cada N alterações do histórico)
+CREATE TABLE IF NOT EXISTS employee_snapshots (
+    id SERIAL PRIMARY KEY,
+    employee_id BIGINT UNSIGNED NOT NULL,
+    history_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    taken_at TIMESTAMP NOT NULL,
+    data TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (employee_id) REFERENCES employees(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_emp_snapshot (employee_id, history_id),
+    INDEX idx_emp_snapshot_taken_at (taken_at)
+);
+
 -- Tabela: patrimonies
 CREATE TABLE IF NOT EXISTS patrimonies (
     id SERIAL PRIMARY KEY,
@@ -79,6 +92,7 @@ CREATE TABLE IF NOT EXISTS patrimonies (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_patrimony_name (name),
     INDEX idx_patrimony_category (category),
+    INDEX idx_patrimony_serial (serial_number),
     INDEX idx_patrimony_active (is_active)
 );
 
@@ -96,6 +110,88 @@ CREATE TABLE IF NOT EXISTS patrimony_history (
     INDEX idx_pat_history_changed_at (changed_at)
 );
 
+-- Tabela: patrimony_snapshots (estado completo a cada N alterações do histórico)
+CREATE TABLE IF NOT EXISTS patrimony_snapshots (
+    id SERIAL PRIMARY KEY,
+    patrimony_id BIGINT UNSIGNED NOT NULL,
+    history_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    taken_at TIMESTAMP NOT NULL,
+    data TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (patrimony_id) REFERENCES patrimonies(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_pat_snapshot (patrimony_id, history_id),
+    INDEX idx_pat_snapshot_taken_at (taken_at)
+);
+
+-- Tabela: patrimony_audits (sessões de inventário físico)
+CREATE TABLE IF NOT EXISTS patrimony_audits (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'open',
+    started_by BIGINT UNSIGNED,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    closed_at TIMESTAMP NULL,
+    notes TEXT,
+    INDEX idx_audit_status (status)
+);
+
+-- Tabela: patrimony_audit_items (leituras e bens não encontrados por sessão)
+CREATE TABLE IF NOT EXISTS patrimony_audit_items (
+    id SERIAL PRIMARY KEY,
+    audit_id BIGINT UNSIGNED NOT NULL,
+    serial_number VARCHAR(100) NOT NULL,
+    patrimony_id BIGINT UNSIGNED,
+    location VARCHAR(255),
+    expected_location VARCHAR(255),
+    result VARCHAR(20) NOT NULL,
+    device_id VARCHAR(100),
+    scanned_at TIMESTAMP NULL,
+    FOREIGN KEY (audit_id) REFERENCES patrimony_audits(id) ON DELETE CASCADE,
+    FOREIGN KEY (patrimony_id) REFERENCES patrimonies(id) ON DELETE SET NULL,
+    UNIQUE KEY uq_audit_item_serial (audit_id, serial_number),
+    INDEX idx_audit_item_result (result)
+);
+
+-- Tabela: time_punches (marcações de ponto, somente inserção)
+CREATE TABLE IF NOT EXISTS time_punches (
+    id SERIAL PRIMARY KEY,
+    employee_id BIGINT UNSIGNED NOT NULL,
+    punched_at DATETIME NOT NULL,
+    kind VARCHAR(3) NOT NULL,
+    terminal_id VARCHAR(50),
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (employee_id) REFERENCES employees(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_punch_employee_time (employee_id, punched_at),
+    INDEX idx_punch_punched_at (punched_at)
+);
+
+-- Tabela: time_clock_daily (consolidação diária do ponto)
+CREATE TABLE IF NOT EXISTS time_clock_daily (
+    id SERIAL PRIMARY KEY,
+    employee_id BIGINT UNSIGNED NOT NULL,
+    work_date DATE NOT NULL,
+    first_in DATETIME,
+    last_out DATETIME,
+    punches INT NOT NULL DEFAULT 0,
+    worked_minutes INT NOT NULL DEFAULT 0,
+    expected_minutes INT NOT NULL DEFAULT 0,
+    overtime_minutes INT NOT NULL DEFAULT 0,
+    is_absence BOOLEAN NOT NULL DEFAULT FALSE,
+    is_incomplete BOOLEAN NOT NULL DEFAULT FALSE,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (employee_id) REFERENCES employees(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_daily_employee_date (employee_id, work_date),
+    INDEX idx_daily_date_employee (work_date, employee_id)
+);
+
+-- Tabela: time_clock_rollup_state (marca d'água da consolidação)
+CREATE TABLE IF NOT EXISTS time_clock_rollup_state (
+    id INT PRIMARY KEY,
+    last_punch_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    absences_through DATE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
 -- ============================================
 -- Dados Iniciais (Seed Data)
 -- ============================================
@@ -36,6 +36,8 @@ CREATE TABLE IF NOT EXISTS schedulings (
     approved_by BIGINT UNSIGNED,
     approved_at TIMESTAMP,
     notes TEXT,
+    recurrence_rule VARCHAR(255),
+    recurrence_end TIMESTAMP NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (area_id) REFERENCES areas(id) ON DELETE RESTRICT,
@@ -43,7 +45,23 @@ CREATE TABLE IF NOT EXISTS schedulings (
     INDEX idx_scheduling_unit (unit_id),
     INDEX idx_scheduling_user (user_id),
     INDEX idx_scheduling_status (status),
-    INDEX idx_scheduling_dates (start_datetime, end_datetime)
+    INDEX idx_scheduling_dates (start_datetime, end_datetime),
+    INDEX idx_scheduling_recurrence_end (recurrence_end)
+);
+
+-- Tabela: scheduling_exceptions
+CREATE TABLE IF NOT EXISTS scheduling_exceptions (
+    id SERIAL PRIMARY KEY,
+    scheduling_id BIGINT UNSIGNED NOT NULL,
+    original_start TIMESTAMP NOT NULL,
+    is_cancelled BOOLEAN NOT NULL DEFAULT FALSE,
+    start_datetime TIMESTAMP NULL,
+    end_datetime TIMESTAMP NULL,
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (scheduling_id) REFERENCES schedulings(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_scheduling_exception (scheduling_id, original_start),
+    INDEX idx_scheduling_exception_scheduling (scheduling_id)
 );
 
 -- Tabela: budgets
@@ -93,11 +111,30 @@ CREATE TABLE IF NOT EXISTS events (
     location VARCHAR(255),
     organizer_id BIGINT UNSIGNED NOT NULL,
     is_public BOOLEAN DEFAULT TRUE,
+    recurrence_rule VARCHAR(255),
+    recurrence_end_date DATE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_event_date (event_date),
     INDEX idx_event_organizer (organizer_id),
-    INDEX idx_event_public (is_public)
+    INDEX idx_event_public (is_public),
+    INDEX idx_event_recurrence_end (recurrence_end_date)
+);
+
+-- Tabela: event_exceptions
+CREATE TABLE IF NOT EXISTS event_exceptions (
+    id SERIAL PRIMARY KEY,
+    event_id BIGINT UNSIGNED NOT NULL,
+    original_date DATE NOT NULL,
+    is_cancelled BOOLEAN NOT NULL DEFAULT FALSE,
+    event_date DATE,
+    start_time TIME,
+    end_time TIME,
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_event_exception (event_id, original_date),
+    INDEX idx_event_exception_event (event_id)
 );
 
 -- Tabela: meetings